@@ -6,7 +6,7 @@ from webbrowser import open as webopen
 from dotenv import dotenv_values
 from bs4 import BeautifulSoup
 from rich import print
-from groq import Groq
+from Backend.LLMGateway import gateway
 import webbrowser
 import subprocess
 import requests
@@ -18,22 +18,14 @@ from typing import Optional, Dict, Any, List
 env_vars = dotenv_values(".env")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-# Initialize Groq client with error handling
-client = None
-
 classes = ["zCubwf", "hgKELc", "LTKOO SY7ric", "ZOLcW", "gsrt vk_bk FzvWSb YwPhnf", "pclqee", "tw-Data-text tw-text-small tw-ta",
            "IZ6rdc", "05uR6d LTKOO", "vlzY6d", "webanswers-webanswers_table_webanswers-table", "dDoNo ikb4Bb gsrt", "sXLa0e", 
            "LWkfKe", "VQF4g", "qv3Wpe", "kno-rdesc", "SPZz6b"]
 
 useragent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.75 Safari/537.36'
 
-# Initialize Groq client only if API key exists
-if GroqAPIKey and client is None:
-    try:
-        client = Groq(api_key=GroqAPIKey)
-    except Exception as e:
-        print(f"Error initializing Groq client in Automation: {e}")
-        client = None
+# Models for long-form content, in order of preference
+CONTENT_MODELS = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"]
 
 professional_responses = [
     "Your satisfaction is my top priority; feel free to reach out if there's anything else I can help you with.",
@@ -67,16 +59,17 @@ def Content(topic):
             return False
 
     def ContentWriterAI(prompt):
-        if not client:
+        if not gateway.available:
             print("Error: Groq API key not found. Please check your .env file.")
             return "Error: Unable to generate content - API key missing."
         
         try:
             messages.append({"role": "user", "content": f"{prompt}"})
 
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
+            completion = gateway.chat(
                 messages=SystemChatBot + messages,
+                models=CONTENT_MODELS,
+                route="content",
                 max_tokens=2048,
                 temperature=0.7,
                 top_p=1,
@@ -0,0 +1,177 @@
+"""
+ChatLog Service for JARVIS
+Single in-memory owner of Data/ChatLog.json. Every module reads windows of the
+log from memory and appends through this service; changes are persisted by a
+debounced background writer using write-to-temp + atomic rename.
+"""
+
+import atexit
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+CHATLOG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data", "ChatLog.json")
+CHATLOG_FLUSH_DELAY = 1.0  # Seconds of quiet before pending changes are written
+
+
+class ChatLogService:
+    """
+    Thread-safe chat log ({"role", "content"} messages) with write-behind persistence
+
+    Mutations update memory immediately and mark the log dirty; a background
+    writer waits until no change has arrived for flush_delay seconds and then
+    writes one snapshot. flush() forces a synchronous write (also run at exit).
+    """
+
+    def __init__(self, path: str = CHATLOG_FILE, flush_delay: float = CHATLOG_FLUSH_DELAY):
+        """
+        Initialize ChatLog Service
+
+        Args:
+            path: JSON file backing the log
+            flush_delay: Debounce delay for background writes in seconds
+        """
+        self.path = path
+        self.flush_delay = flush_delay
+        self._messages: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._dirty = False
+        self._generation = 0  # Bumped on every mutation
+        self._writer: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()  # Serializes file writes
+        self._written_generation = 0
+        self.load()
+        atexit.register(self.flush)
+
+    def load(self):
+        """Load the log from disk (creating an empty one if missing or corrupted)"""
+        messages = []
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    messages = json.load(f)
+                if not isinstance(messages, list):
+                    raise ValueError("ChatLog.json does not contain a list")
+        except (ValueError, OSError) as e:
+            print(f"ChatLog.json is empty or corrupted ({e}). Initializing with an empty list.")
+            messages = []
+        with self._lock:
+            self._messages = messages
+            self._generation += 1
+        if not os.path.exists(self.path):
+            self._write(messages, self.generation)
+
+    # ---- Reads (served from memory) ----
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._messages)
+
+    @property
+    def generation(self) -> int:
+        """Counter that changes whenever the log changes"""
+        with self._lock:
+            return self._generation
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Copy of the whole log"""
+        with self._lock:
+            return list(self._messages)
+
+    def window(self, count: int) -> List[Dict[str, str]]:
+        """The last `count` messages, oldest first"""
+        with self._lock:
+            if count <= 0:
+                return []
+            return self._messages[-count:]
+
+    def slice(self, start: int, end: Optional[int] = None) -> List[Dict[str, str]]:
+        """Messages[start:end] (same semantics as list slicing)"""
+        with self._lock:
+            return self._messages[start:end]
+
+    # ---- Writes (persisted in the background) ----
+
+    def append(self, role: str, content: str):
+        """Append one message"""
+        self.extend([{"role": role, "content": content}])
+
+    def append_exchange(self, user_content: str, assistant_content: str):
+        """Append a user message and the assistant's reply together"""
+        self.extend([
+            {"role": "user", "content": user_content},
+            {"role": "assistant", "content": assistant_content}
+        ])
+
+    def extend(self, messages: List[Dict[str, str]]):
+        """Append several messages in one change"""
+        with self._lock:
+            self._messages.extend(messages)
+            self._mark_dirty()
+
+    def clear(self):
+        """Remove every message"""
+        with self._lock:
+            self._messages = []
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        """Record a change and wake the writer (caller holds the lock)"""
+        self._generation += 1
+        self._dirty = True
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="chatlog-writer")
+            self._writer.start()
+        self._changed.notify()
+
+    def _writer_loop(self):
+        while True:
+            with self._lock:
+                while not self._dirty:
+                    self._changed.wait()
+                # Debounce: keep waiting while changes keep arriving
+                generation = self._generation
+                while True:
+                    self._changed.wait(self.flush_delay)
+                    if self._generation == generation:
+                        break
+                    generation = self._generation
+                if not self._dirty:
+                    continue  # flush() already wrote it
+                snapshot = list(self._messages)
+                self._dirty = False
+            self._write(snapshot, generation)
+
+    def _write(self, messages: List[Dict[str, str]], generation: int):
+        """Write a snapshot atomically (temp file + rename), never replacing a newer one"""
+        with self._write_lock:
+            if generation < self._written_generation:
+                return
+            self._written_generation = generation
+            self._write_file(messages)
+
+    def _write_file(self, messages: List[Dict[str, str]]):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(messages, f, indent=4, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Error saving ChatLog.json: {e}")
+
+    def flush(self):
+        """Write pending changes now"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = list(self._messages)
+            generation = self._generation
+            self._dirty = False
+        self._write(snapshot, generation)
+
+
+# Process-wide chat log
+chat_log = ChatLogService()
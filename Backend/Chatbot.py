@@ -1,11 +1,18 @@
 import json  # Ensure the import is used
-from json import load, dump
 from dotenv import dotenv_values
 import requests
 import datetime
-from groq import Groq
+import time
+from Backend.LLMGateway import gateway, LLMUnavailableError
 from Backend.Memory import add_user_message, add_assistant_message, get_conversation_context
-from Backend.SalesMemory import get_sales_knowledge, recall_memory
+from Backend.ContextBuilder import pack_history, DEFAULT_HISTORY_MAX_TURNS
+from Backend.ChatLog import chat_log
+from Backend.Streaming import stream_completion
+from Backend.SalesMemory import sales_memory_manager, get_sales_knowledge, recall_memory
+from Backend.ResponseCache import response_cache
+from Backend.PromptTemplates import PromptTemplate, TemplateCache
+from Backend.PhraseMatcher import phrase_matcher
+from Backend.SpeculativeRouting import SpeculationCancelled
 
 env_vars = dotenv_values(".env")
 
@@ -13,20 +20,11 @@ Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-# Initialize Groq client with error handling and timeout protection
-client = None
-try:
-    import socket
-    socket.setdefaulttimeout(5)  # Set default socket timeout to 5 seconds
-    client = Groq(api_key=GroqAPIKey, timeout=10.0)  # 10 second timeout for API calls
-    print("Groq client initialized successfully")
-except socket.timeout:
-    print("Warning: Groq client initialization timed out - will retry on first use")
-    client = None
-except Exception as e:
-    print(f"Error initializing Groq client in Chatbot: {e}")
-    print("Application will continue - API calls will be retried when needed")
-    client = None
+# Models in order of preference - fastest first; the gateway skips busy or failing ones
+CHAT_MODELS = [
+    "llama-3.1-8b-instant",
+    "llama-3.3-70b-versatile"
+]
 
 messages = []
 
@@ -42,8 +40,9 @@ CREATOR_BIO = (
 )
 
 # Mode-specific base system prompts - Only General Assistant and Sales Assistant
-MODE_SYSTEMS = {
-    "General Assistant": f"""You are {Assistantname}, a helpful general-purpose AI assistant.
+def _mode_systems(assistant_name):
+    return {
+        "General Assistant": f"""You are {assistant_name}, a helpful general-purpose AI assistant.
 
 **WHAT I CAN DO FOR YOU (General Assistant Mode):**
 I can help with:
@@ -60,7 +59,7 @@ I can help with:
 - Focus: General assistance and helpful responses
 - Approach: Versatile and adaptable""",
 
-    "Sales Assistant": f"""You are {Assistantname}, a professional sales-focused AI assistant.
+        "Sales Assistant": f"""You are {assistant_name}, a professional sales-focused AI assistant.
 
 **WHAT I CAN DO FOR YOU (Sales Assistant Mode):**
 I specialize in:
@@ -77,12 +76,16 @@ I specialize in:
 - Focus: Sales activities, lead management, and closing deals
 - Approach: Relationship-building and results-oriented
 - Use stored sales knowledge (documents, leads, products) for personalized advice"""
-}
+    }
+
+
+MODE_SYSTEMS = _mode_systems(Assistantname)
 
 # Default general system (fallback)
-System = f"""You are JARVIS (also known as {Assistantname}), a professional AI assistant with access to real-time information and extensive knowledge. 
+def _default_system(assistant_name):
+    return f"""You are JARVIS (also known as {assistant_name}), a professional AI assistant with access to real-time information and extensive knowledge. 
 
-IMPORTANT: Your name is JARVIS. When users refer to you as "JARVIS" or "{Assistantname}", they are correct. Never correct users or say you are "FRIDAY" or any other name. You are JARVIS.
+IMPORTANT: Your name is JARVIS. When users refer to you as "JARVIS" or "{assistant_name}", they are correct. Never correct users or say you are "FRIDAY" or any other name. You are JARVIS.
 
 **MULTI-LANGUAGE SUPPORT:**
 - Detect the language the user is speaking/writing in
@@ -105,20 +108,139 @@ If the user asks to "tell me about the creator" or asks about "Shubh Mishra" spe
 IMPORTANT: Never include HTML code, CSS styles, or markdown formatting in your responses. Always use plain text with URLs as plain links (https://example.com) so they can be automatically converted to clickable links by the system.
 """
 
+
+System = _default_system(Assistantname)
+
 SystemChatBot = [
     {"role": "system", "content": System}
 ]
 
-try:
-    with open(r"Data\ChatLog.json", "r") as f:
-        messages = load(f)
-except FileNotFoundError:
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump([], f)
-except json.JSONDecodeError:
-    print("ChatLog.json is empty or corrupted. Initializing with an empty list.")
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump([], f)
+
+# Framing around retrieved sales knowledge (the knowledge itself goes in between)
+DRIVE_KNOWLEDGE_HEADER = "**INFORMATION FROM DRIVE FILES (User asked about the Drive link/files they provided):**"
+DRIVE_KNOWLEDGE_RULES = """CRITICAL INSTRUCTIONS FOR DRIVE FILES:
+1. The user has provided a Google Drive link with files that have been processed and stored.
+2. You MUST use ONLY the information from the Drive files shown above to answer the user's question.
+3. Do NOT reference any other uploaded files, resumes, or documents - ONLY use the Drive files.
+4. If the Drive files contain the answer, provide a detailed, accurate answer based on that content.
+5. If the Drive files do not contain the answer, state clearly: "The information is not available in the Drive files you provided."
+6. For overview/summary questions, provide a comprehensive overview based on ALL the content shown above.
+7. NEVER say "I'm not able to access any information from a link" - the files ARE available and shown above.
+8. NEVER mention "process:", "processing", or similar phrases.
+9. Answer naturally and confidently based on the Drive file content shown above.
+10. Be 100% accurate - only use information that is actually present in the Drive files above."""
+FILE_KNOWLEDGE_HEADER = "**INFORMATION FROM PROCESSED FILES (Use this if relevant to answer the question):**"
+FILE_KNOWLEDGE_RULES = """IMPORTANT: 
+- If the information above is relevant to the user's question, use it to provide an accurate answer.
+- If the information is not relevant or doesn't contain the answer, you can provide a general answer or say the information isn't available in the processed files.
+- Always prioritize accuracy - if the files contain the answer, use that information.
+- NEVER mention "process:", "processing", or similar phrases in your response.
+- Answer questions naturally based on what information is available."""
+
+
+def _mode_instruction(mode):
+    return f"""**CRITICAL: YOU ARE CURRENTLY IN {mode.upper()} MODE**
+- You MUST identify yourself as being in {mode} mode when asked about your current mode
+- You MUST respond according to {mode} mode capabilities and style
+- If asked "which mode are you in" or "what mode are you in", you MUST respond that you are in {mode} mode
+- If asked "what can you do" or "what can you do for me", you MUST provide {mode} mode-specific capabilities ONLY
+- Never say you are in "conversational mode" or "general mode" - you are specifically in {mode} mode
+- Always acknowledge your mode when relevant to the conversation
+- Focus your responses on {mode} mode tasks and capabilities
+"""
+
+
+def _capabilities(mode):
+    mode_line = f'**YOU ARE IN {mode.upper()} MODE** - respond accordingly and acknowledge this mode when asked. Focus on {mode} mode tasks and capabilities.' if mode else ''
+    return f"""**GENERAL CAPABILITIES:**
+- **MULTI-LANGUAGE SUPPORT: Respond in the same language the user uses - support all major languages**
+- **CRITICAL: Be EXTREMELY CONCISE and DIRECT. Answer in 2-3 sentences maximum unless more detail is specifically requested.**
+- **NO bullet points, NO "Key Points" sections, NO "Important Information" sections - just a simple, direct answer.**
+- **NO formatting like "**Key Points:**" or "**Summary:**" - just provide the answer directly.**
+- **Provide accurate, brief answers that directly address the user's question in plain text.**
+- Respond confidently and naturally to all queries in the user's preferred language
+- Provide helpful, accurate answers based on your knowledge and available information
+- Never mention internal technical issues to the user
+- Be conversational, helpful, and confident in your responses in the user's language
+- Always respond to every question - use appropriate APIs (Groq for real-time, general AI for conversational)
+- **CRITICAL: NEVER mention "process:", "processing", or similar phrases in your responses**
+- **Do NOT repeat information or give multiple similar answers to the same question.**
+- **Answer ONLY what is asked - do not provide extra information unless specifically requested.**
+- **When asked about files, provide a brief summary of what the file contains, not technical details about the file itself.**
+- Use information from processed files when it's relevant to answer the user's question
+- If processed files contain relevant information, use that information to answer
+- {mode_line}
+
+Use the conversation context, learned user information, and knowledge above to provide more relevant and contextual responses. If the user asks about their name or previously mentioned information, use the learned user information. If processed files contain relevant information for the question, use that information. For questions about current events or general topics not in the files, use your general knowledge or real-time information. **CRITICAL: Keep responses extremely concise (2-3 sentences max), accurate, and directly answer the question asked. NO formatting, NO sections, NO bullet points - just plain, direct text. Do not provide multiple answers or repeat information.**"""
+
+
+def _build_chat_template(mode, env):
+    """Compile the ChatBot system prompt for a mode; conversation context and knowledge are slots"""
+    assistant_name = env.get("Assistantname", Assistantname)
+    mode_systems = _mode_systems(assistant_name)
+    in_mode = mode in mode_systems
+    return PromptTemplate([
+        ("base", mode_systems[mode] if in_mode else _default_system(assistant_name)),
+        ("mode_instruction", _mode_instruction(mode) if in_mode else ""),
+        ("conversation_context", None),
+        ("knowledge", None),
+        ("capabilities", _capabilities(mode if in_mode else None)),
+    ])
+
+
+chat_prompts = TemplateCache("chatbot", _build_chat_template)
+
+
+# Heuristic routing phrases (substring matches, checked in one pass by phrase_matcher)
+GREETING_WORDS = ["hello", "hi", "hey", "namaste", "hola", "greetings"]
+GREETING_PHRASES = phrase_matcher.register("chat_greeting", GREETING_WORDS)
+MODE_QUESTION_PHRASES = phrase_matcher.register("chat_mode_question", [
+    "which mode", "what mode", "current mode", "in which mode", "what mode are you",
+    "which mode are you in", "what mode am i in", "what's the current mode",
+    "what mode is active", "which mode is active", "what mode are you currently in",
+    "in which more", "which mode", "what mode", "current mode",  # Handle typos like "more" instead of "mode"
+    "in which mode currently", "in which mode are you", "what mode am i",
+    "which mode i am", "which mode am i", "tell me which mode", "tell me what mode",
+    "what mode you are in", "what mode you're in", "which mode you are in"
+])
+CAPABILITY_QUESTION_PHRASES = phrase_matcher.register("chat_capability_question", [
+    "what can you do", "what can you do for me", "what are your capabilities",
+    "what can you help with", "tell me what you can do", "what do you do",
+    "what are you capable of", "what services", "your capabilities", "your features",
+    "what you can do", "what you can do for me", "tell me what you can do for me"
+])
+DRIVE_QUERY_PHRASES = phrase_matcher.register("chat_drive_query", [
+    "the link", "the files", "the drive link", "the provided link",
+    "files in the link", "files in link", "drive link", "drive files",
+    "the uploaded link", "uploaded link", "provided link", "link you provided",
+    "link i provided", "link i shared", "link you shared", "link we shared",
+    "files you processed", "files processed", "overview of the files",
+    "basic overview", "what's in the link", "what's in the files",
+    "files in that link", "files from that link", "files from the link",
+    "content of the link", "content in the link", "what's in that link",
+    "overview of content", "content overview", "tell me about the link",
+    "tell me about the files", "what's in link", "what is in link",
+    "summary of link", "summary of files", "summary of content"
+])
+OVERVIEW_WORDS = phrase_matcher.register("chat_overview", ["overview", "summary", "what is", "tell me about", "basic"])
+FILES_LINK_WORDS = phrase_matcher.register("chat_files_link", ["files", "link", "documents", "content"])
+DRIVE_HINT_WORDS = phrase_matcher.register("chat_drive_hint", ["link", "files", "overview", "content", "summary", "provided"])
+EXPLICIT_FILE_PHRASES = phrase_matcher.register("chat_explicit_file", [
+    "from the provided file", "from provided file", "using the uploaded file",
+    "answer from", "reply from", "using the file", "from the uploaded file",
+    "from the link", "from link", "from the files", "from files", "from the drive"
+])
+CREATOR_QUESTION_PHRASES = phrase_matcher.register("chat_creator_question", ["who created you", "who made you", "who is your creator", "who built you"])
+CREATOR_BIO_PHRASES = phrase_matcher.register("chat_creator_bio", [
+    "tell me about the creator",
+    "tell me about shubh",
+    "who is shubh mishra",
+    "about shubh",
+    "creator bio",
+    "shubh mishra details",
+    "information about shubh",
+    "who is your creator shubh"
+])
 
 # Cache for RealtimeInformation to avoid repeated calls (performance optimization)
 _realtime_info_cache = None
@@ -161,16 +283,20 @@ def AnswerModifier(Answer):
     modified_answer = '\n'.join(non_empty_lines)
     return modified_answer
 
-def ChatBot(Query, mode=None):
+def ChatBot(Query, mode=None, on_delta=None, on_sentence=None, speculation=None):
     """ This function sends the user's query to the chatbot and returns the AI's response 
     
     Args:
         Query: The user's query
         mode: The current mode (Sales Assistant, General Assistant, etc.)
+        on_delta: Optional callback receiving each piece of the answer as it streams in
+        on_sentence: Optional callback receiving (sentence, ends_line) as sentences complete
+        speculation: SpeculativeChat when started before the routing decision; memory and
+            the chat log are only written once speculation.commit() confirms the answer is used
     """
 
     # If client is not available, return a fallback response
-    if client is None:
+    if not gateway.available:
         return "I'm currently unable to process your request. Please try again later."
 
     try:
@@ -190,13 +316,14 @@ def ChatBot(Query, mode=None):
         
         # Check if user is asking about current mode
         query_lower = original_query.lower().strip()
+        # Greeting/mode/capability phrase lists are all checked in this one pass
+        phrase_hits = phrase_matcher.scan(query_lower)
         
         # Handle simple greetings FIRST with a concise response (before other processing)
-        greeting_words = ["hello", "hi", "hey", "namaste", "hola", "greetings"]
-        if any(word in query_lower for word in greeting_words):
+        if GREETING_PHRASES in phrase_hits:
             # Check if it's just a greeting (no other words)
             words = query_lower.split()
-            if len(words) <= 2 and all(word in greeting_words + ["jarvis", "there"] for word in words):
+            if len(words) <= 2 and all(word in GREETING_WORDS + ["jarvis", "there"] for word in words):
                 # Simple greeting - return concise response using the mode parameter
                 # CRITICAL: Always use the mode parameter if provided
                 # Add to memory immediately to prevent duplicate processing
@@ -207,20 +334,12 @@ def ChatBot(Query, mode=None):
                     greeting_response = "Hello! I'm JARVIS. How can I help you?"
                 
                 # Add to memory to prevent duplicates
+                if speculation:
+                    speculation.commit()
                 add_assistant_message(greeting_response)
                 return greeting_response
         
-        mode_question_phrases = [
-            "which mode", "what mode", "current mode", "in which mode", "what mode are you",
-            "which mode are you in", "what mode am i in", "what's the current mode",
-            "what mode is active", "which mode is active", "what mode are you currently in",
-            "in which more", "which mode", "what mode", "current mode",  # Handle typos like "more" instead of "mode"
-            "in which mode currently", "in which mode are you", "what mode am i",
-            "which mode i am", "which mode am i", "tell me which mode", "tell me what mode",
-            "what mode you are in", "what mode you're in", "which mode you are in"
-        ]
-        
-        if any(phrase in query_lower for phrase in mode_question_phrases):
+        if MODE_QUESTION_PHRASES in phrase_hits:
             # Return current mode information - ALWAYS use the mode parameter passed to function
             # If mode is None or empty, try to extract from query context, otherwise default
             mode_to_use = mode if mode else "General Assistant"
@@ -248,14 +367,7 @@ def ChatBot(Query, mode=None):
             return f"I'm currently in **{mode_to_use} Mode**.\n\n{description}\n\nHow can I help you? I'm JARVIS, your AI assistant."
         
         # Check if user is asking "what can you do" - provide mode-specific response
-        what_can_you_do_phrases = [
-            "what can you do", "what can you do for me", "what are your capabilities",
-            "what can you help with", "tell me what you can do", "what do you do",
-            "what are you capable of", "what services", "your capabilities", "your features",
-            "what you can do", "what you can do for me", "tell me what you can do for me"
-        ]
-        
-        if any(phrase in query_lower for phrase in what_can_you_do_phrases):
+        if CAPABILITY_QUESTION_PHRASES in phrase_hits:
             # CRITICAL: Always use the mode parameter passed to the function - NEVER default to General Assistant
             # If mode is not provided or invalid, only then use General Assistant
             print(f"=== WHAT CAN YOU DO DETECTED === Mode parameter: '{mode}'")
@@ -292,26 +404,46 @@ def ChatBot(Query, mode=None):
                         response = f"I'm {Assistantname} in {mode_display} Mode! {capabilities.replace(chr(10), ' ').replace(chr(13), ' ')} How can I help you today?"
                         print(f"=== Returning WHAT CAN YOU DO response for mode: '{mode_display}' ===")
                         # Add to memory before returning to prevent duplicate processing
+                        if speculation:
+                            speculation.commit()
                         add_assistant_message(response)
                         return response
             
             # Final fallback - should rarely be reached
             print(f"=== WHAT CAN YOU DO fallback triggered ===")
             fallback_response = f"I'm {Assistantname}! I can help you with a wide variety of tasks. How can I assist you today?"
+            if speculation:
+                speculation.commit()
             add_assistant_message(fallback_response)
             return fallback_response
     
+    except SpeculationCancelled:
+        raise
     except Exception as e:
         print(f"Error in mode-specific response: {e}")
         import traceback
         print(traceback.format_exc())
     
     try:
-        # Add user message to memory
-        add_user_message(Query)
+        # Add user message to memory (a speculative call waits until its answer is used)
+        if not speculation:
+            add_user_message(Query)
         
-        # Get conversation context from memory
-        conversation_context = get_conversation_context()
+        # Repeated questions are answered from the response cache without an LLM call
+        knowledge_generation = sales_memory_manager.generation
+        cached_answer = response_cache.get("general", original_query, mode or "", knowledge_generation)
+        if cached_answer is not None:
+            print("ChatBot: answered from response cache")
+            if speculation:
+                speculation.commit()
+                add_user_message(Query)
+            add_assistant_message(cached_answer)
+            chat_log.append_exchange(Query, cached_answer)
+            return cached_answer
+        
+        # Get conversation context from memory (budgeted: relevant facts, rolling summary, recalled turns);
+        # the recent turns go in as chat messages below, so they are left out here
+        conversation_context = get_conversation_context(Query, include_recent=False)
         
         # ALWAYS check stored documents/Drive files first for ANY question
         # This allows the AI to answer questions based on uploaded/processed files
@@ -320,7 +452,6 @@ def ChatBot(Query, mode=None):
         source_filter = None  # Initialize source_filter outside try block
         
         try:
-            from Backend.SalesMemory import sales_memory_manager, get_sales_knowledge
             has_stored_documents = len(sales_memory_manager.memory) > 0
             
             # Check if user is asking about Drive link/files
@@ -330,25 +461,13 @@ def ChatBot(Query, mode=None):
             query_clean = re.sub(r'\b(\w+)(\s+\1\b)+', r'\1', query_lower)  # Remove repeated words
             query_clean = query_clean.replace("eu link", "link").replace("divers", "drive").replace("abyss", "overview")
             
-            drive_related_keywords = [
-                "the link", "the files", "the drive link", "the provided link",
-                "files in the link", "files in link", "drive link", "drive files",
-                "the uploaded link", "uploaded link", "provided link", "link you provided",
-                "link i provided", "link i shared", "link you shared", "link we shared",
-                "files you processed", "files processed", "overview of the files",
-                "basic overview", "what's in the link", "what's in the files",
-                "files in that link", "files from that link", "files from the link",
-                "content of the link", "content in the link", "what's in that link",
-                "overview of content", "content overview", "tell me about the link",
-                "tell me about the files", "what's in link", "what is in link",
-                "summary of link", "summary of files", "summary of content"
-            ]
-            is_drive_query = any(keyword in query_clean for keyword in drive_related_keywords)
+            drive_hits = phrase_matcher.scan(query_clean)
+            is_drive_query = DRIVE_QUERY_PHRASES in drive_hits
             
             # Also check if query mentions "overview" or "summary" along with "files" or "link"
             if not is_drive_query:
-                has_overview = any(word in query_clean for word in ["overview", "summary", "what is", "tell me about", "basic"])
-                has_files_link = any(word in query_clean for word in ["files", "link", "documents", "content"])
+                has_overview = OVERVIEW_WORDS in drive_hits
+                has_files_link = FILES_LINK_WORDS in drive_hits
                 if has_overview and has_files_link:
                     is_drive_query = True
             
@@ -358,7 +477,7 @@ def ChatBot(Query, mode=None):
             
             # If Drive files exist and query is about link/files/overview, force Drive query
             if has_drive_files and not is_drive_query:
-                if any(word in query_clean for word in ["link", "files", "overview", "content", "summary", "provided"]):
+                if DRIVE_HINT_WORDS in drive_hits:
                     is_drive_query = True
                     print(f"Auto-detected Drive query based on keywords and available Drive files")
             
@@ -373,13 +492,12 @@ def ChatBot(Query, mode=None):
             if has_stored_documents:
                 # For Drive queries, use larger top_k to get comprehensive overview
                 # Optimized: Use 20 for overview (was 30), 12 for Drive queries (was 15), 8 for general (was 10)
-                is_overview_query = any(word in query_clean for word in ["overview", "summary", "basic", "tell me about", "what is"])
+                is_overview_query = OVERVIEW_WORDS in drive_hits
                 top_k_value = 20 if (is_drive_query and is_overview_query) else 12 if is_drive_query else 8
                 
                 # Search for relevant knowledge in stored documents
                 # If Drive query, only search Drive files; otherwise search all
                 try:
-                    from Backend.SalesMemory import recall_memory
                     # First try with get_sales_knowledge (uses top_k=10 internally)
                     relevant_knowledge = get_sales_knowledge(original_query, source_filter=source_filter)
                     
@@ -447,11 +565,8 @@ def ChatBot(Query, mode=None):
             import traceback
             traceback.print_exc()
         
-        with open(r"Data\ChatLog.json", "r") as f:
-            full_messages = load(f)
-
-        # Keep only most recent context to avoid token overuse
-        recent_history = full_messages[-8:] if len(full_messages) > 8 else full_messages
+        # Keep only the most recent turns that fit the history token budget
+        recent_history = pack_history(chat_log.window(DEFAULT_HISTORY_MAX_TURNS))
         messages = recent_history + [{"role": "user", "content": f"{Query}"}]
 
         # Get mode-specific system prompt if mode is provided
@@ -488,18 +603,6 @@ def ChatBot(Query, mode=None):
                 mode_system = MODE_SYSTEMS["General Assistant"]
             print("WARNING: No mode provided, using General Assistant")
         
-        # Create enhanced system prompt with memory context and sales knowledge
-        # Get user info from memory
-        user_info_text = ""
-        try:
-            from Backend.Memory import memory_manager
-            user_info_text = memory_manager.get_user_info_summary()
-        except:
-            pass
-        
-        # Use mode-specific system if available, otherwise use default
-        base_system = mode_system if mode_system else System
-        
         # Only include sales_knowledge if it was explicitly requested or is relevant
         knowledge_context = ""
         if sales_knowledge and sales_knowledge.strip():
@@ -508,141 +611,73 @@ def ChatBot(Query, mode=None):
             
             # Check if user explicitly requested to use the file
             query_lower_check = Query.lower()
-            explicitly_using_file = any(phrase in query_lower_check for phrase in [
-                "from the provided file", "from provided file", "using the uploaded file", 
-                "answer from", "reply from", "using the file", "from the uploaded file",
-                "from the link", "from link", "from the files", "from files", "from the drive"
-            ])
+            explicitly_using_file = EXPLICIT_FILE_PHRASES in phrase_matcher.scan(query_lower_check)
             
             if is_drive_context or explicitly_using_file:
                 # Drive files context - be very explicit
-                knowledge_context = f"""
-**INFORMATION FROM DRIVE FILES (User asked about the Drive link/files they provided):**
-{sales_knowledge}
-
-CRITICAL INSTRUCTIONS FOR DRIVE FILES:
-1. The user has provided a Google Drive link with files that have been processed and stored.
-2. You MUST use ONLY the information from the Drive files shown above to answer the user's question.
-3. Do NOT reference any other uploaded files, resumes, or documents - ONLY use the Drive files.
-4. If the Drive files contain the answer, provide a detailed, accurate answer based on that content.
-5. If the Drive files do not contain the answer, state clearly: "The information is not available in the Drive files you provided."
-6. For overview/summary questions, provide a comprehensive overview based on ALL the content shown above.
-7. NEVER say "I'm not able to access any information from a link" - the files ARE available and shown above.
-8. NEVER mention "process:", "processing", or similar phrases.
-9. Answer naturally and confidently based on the Drive file content shown above.
-10. Be 100% accurate - only use information that is actually present in the Drive files above.
-"""
+                knowledge_context = f"{DRIVE_KNOWLEDGE_HEADER}\n{sales_knowledge}\n\n{DRIVE_KNOWLEDGE_RULES}"
             else:
                 # General file context
-                knowledge_context = f"""
-**INFORMATION FROM PROCESSED FILES (Use this if relevant to answer the question):**
-{sales_knowledge}
-
-IMPORTANT: 
-- If the information above is relevant to the user's question, use it to provide an accurate answer.
-- If the information is not relevant or doesn't contain the answer, you can provide a general answer or say the information isn't available in the processed files.
-- Always prioritize accuracy - if the files contain the answer, use that information.
-- NEVER mention "process:", "processing", or similar phrases in your response.
-- Answer questions naturally based on what information is available.
-"""
+                knowledge_context = f"{FILE_KNOWLEDGE_HEADER}\n{sales_knowledge}\n\n{FILE_KNOWLEDGE_RULES}"
         
-        # Add explicit mode instruction to system prompt
-        mode_instruction = ""
-        if actual_mode and actual_mode in MODE_SYSTEMS:
-            mode_instruction = f"""
-**CRITICAL: YOU ARE CURRENTLY IN {actual_mode.upper()} MODE**
-- You MUST identify yourself as being in {actual_mode} mode when asked about your current mode
-- You MUST respond according to {actual_mode} mode capabilities and style
-- If asked "which mode are you in" or "what mode are you in", you MUST respond that you are in {actual_mode} mode
-- If asked "what can you do" or "what can you do for me", you MUST provide {actual_mode} mode-specific capabilities ONLY
-- Never say you are in "conversational mode" or "general mode" - you are specifically in {actual_mode} mode
-- Always acknowledge your mode when relevant to the conversation
-- Focus your responses on {actual_mode} mode tasks and capabilities
-
-"""
-        
-        enhanced_system = f"""{base_system}
-
-{mode_instruction}
-
-{user_info_text}
-
-{conversation_context}
-
-{knowledge_context}
-
-**GENERAL CAPABILITIES:**
-- **MULTI-LANGUAGE SUPPORT: Respond in the same language the user uses - support all major languages**
-- **CRITICAL: Be EXTREMELY CONCISE and DIRECT. Answer in 2-3 sentences maximum unless more detail is specifically requested.**
-- **NO bullet points, NO "Key Points" sections, NO "Important Information" sections - just a simple, direct answer.**
-- **NO formatting like "**Key Points:**" or "**Summary:**" - just provide the answer directly.**
-- **Provide accurate, brief answers that directly address the user's question in plain text.**
-- Respond confidently and naturally to all queries in the user's preferred language
-- Provide helpful, accurate answers based on your knowledge and available information
-- Never mention internal technical issues to the user
-- Be conversational, helpful, and confident in your responses in the user's language
-- Always respond to every question - use appropriate APIs (Groq for real-time, general AI for conversational)
-- **CRITICAL: NEVER mention "process:", "processing", or similar phrases in your responses**
-- **Do NOT repeat information or give multiple similar answers to the same question.**
-- **Answer ONLY what is asked - do not provide extra information unless specifically requested.**
-- **When asked about files, provide a brief summary of what the file contains, not technical details about the file itself.**
-- Use information from processed files when it's relevant to answer the user's question
-- If processed files contain relevant information, use that information to answer
-- {f'**YOU ARE IN {actual_mode.upper()} MODE** - respond accordingly and acknowledge this mode when asked. Focus on {actual_mode} mode tasks and capabilities.' if actual_mode and actual_mode in MODE_SYSTEMS else ''}
-
-Use the conversation context, learned user information, and knowledge above to provide more relevant and contextual responses. If the user asks about their name or previously mentioned information, use the learned user information. If processed files contain relevant information for the question, use that information. For questions about current events or general topics not in the files, use your general knowledge or real-time information. **CRITICAL: Keep responses extremely concise (2-3 sentences max), accurate, and directly answer the question asked. NO formatting, NO sections, NO bullet points - just plain, direct text. Do not provide multiple answers or repeat information.**"""
+        # Static segments (base/mode/capabilities) are compiled once per mode;
+        # only the conversation context and knowledge are filled in here
+        enhanced_system = chat_prompts.render(
+            actual_mode,
+            conversation_context=conversation_context,
+            knowledge=knowledge_context
+        )
 
         SystemChatBot_with_memory = [
             {"role": "system", "content": enhanced_system}
         ]
 
-        # Try different models in case of rate limits - prioritize FASTEST model first
-        models_to_try = [
-            "llama-3.1-8b-instant",  # Fastest - use first for speed
-            "llama-3.3-70b-versatile"
-        ]
-        
-        completion = None
-        for model in models_to_try:
-            try:
-                completion = client.chat.completions.create(
-                    model=model,
-                    messages=SystemChatBot_with_memory + [{"role": "system", "content": RealtimeInformation()}] + messages,
-                    max_tokens=150,  # Reduced from 200 to 150 for faster responses
-                    temperature=0.7,
-                    top_p=1,
-                    stream=True,
-                    stop=None
-                )
-                break  # If successful, break out of the loop
-            except Exception as e:
-                print(f"Model {model} failed: {e}")
-                if "rate_limit" in str(e).lower() or "429" in str(e):
-                    continue  # Try next model
-                else:
-                    raise e  # Re-raise if it's not a rate limit error
-        
-        if completion is None:
-            return "I'm currently experiencing high demand. Please try again in a few minutes or ask a simpler question."
-
-        Answer = ""
-
-        for chunk in completion:
-            if chunk.choices[0].delta.content:
-                Answer += chunk.choices[0].delta.content
+        request_messages = SystemChatBot_with_memory + [{"role": "system", "content": RealtimeInformation()}] + messages
+        if speculation:
+            speculation.before_request()  # Not sent if the decision already went elsewhere
 
+        request_started = time.time()
+        try:
+            completion = gateway.chat(
+                messages=request_messages,
+                models=CHAT_MODELS,
+                route="chat_speculative" if speculation else "chat",
+                hedge=True,  # Also ask the next model if the first token is slow
+                max_tokens=150,  # Reduced from 200 to 150 for faster responses
+                temperature=0.7,
+                top_p=1,
+                stream=True,
+                stop=None
+            )
+        except LLMUnavailableError as e:
+            print(f"ChatBot: {e}")
+            return "I'm currently experiencing high demand. Please try again in a few minutes or ask a simpler question."
+        if speculation:
+            completion = speculation.track(completion, request_messages)
+
+        Answer = stream_completion(
+            completion,
+            on_delta=on_delta,
+            on_sentence=on_sentence,
+            started_at=request_started,
+            label="chatbot"
+        )
         Answer = Answer.replace("</s>", "")
+        if speculation:
+            speculation.commit()
+            add_user_message(Query)
 
         # Add assistant response to memory
         add_assistant_message(Answer)
 
-        messages.append({"role": "assistant", "content": Answer})
-
-        with open(r"Data\ChatLog.json", "w") as f:
-            dump(messages, f, indent=4)
+        # Append this exchange to the chat log (persisted in the background)
+        chat_log.append_exchange(Query, Answer)
+        response_cache.put("general", original_query, Answer, mode or "", knowledge_generation)
 
         return Answer  # Return the answer to the main function
 
+    except SpeculationCancelled:
+        raise
     except requests.exceptions.RequestException as e:
         print(f"Connection error: {e}")
         # Don't clear the chat log on connection errors
@@ -651,19 +686,11 @@ Use the conversation context, learned user information, and knowledge above to p
         print(f"Error in ChatBot: {e}")
         # Helpful fallback without "technical difficulties"
         query_lower = Query.lower()
-        if any(word in query_lower for word in ["who created you", "who made you", "who is your creator", "who built you"]):
+        error_hits = phrase_matcher.scan(query_lower)
+        if CREATOR_QUESTION_PHRASES in error_hits:
             return "I was created by Shubh Mishra sir, a software engineer, and you can get more info about him on https://portfolio-shubh.vercel.app/"
         # Creator bio queries
-        if any(kw in query_lower for kw in [
-            "tell me about the creator",
-            "tell me about shubh",
-            "who is shubh mishra",
-            "about shubh",
-            "creator bio",
-            "shubh mishra details",
-            "information about shubh",
-            "who is your creator shubh"
-        ]):
+        if CREATOR_BIO_PHRASES in error_hits:
             # Return CREATOR_BIO but ensure URLs are plain (not markdown)
             bio_text = CREATOR_BIO
             # The CREATOR_BIO now already has plain URL, so just return it
@@ -0,0 +1,285 @@
+"""
+Token-Budgeted Context Builder for JARVIS
+Packs recent turns, a rolling summary of older turns and the user facts relevant
+to the current query into a fixed token budget. The rolling summary is updated
+on a background thread so building context never waits on summarization.
+"""
+
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Budgets (approximate tokens)
+DEFAULT_CONTEXT_BUDGET = 600  # Conversation memory block in the system prompt
+DEFAULT_HISTORY_BUDGET = 800  # Chat history sent as messages
+DEFAULT_HISTORY_MAX_TURNS = 8
+FACTS_SHARE = 0.25  # Share of the context budget facts may use
+SUMMARY_SHARE = 0.25  # Share of the context budget the rolling summary may use
+RECALL_SHARE = 0.2  # Share of the context budget recalled older turns may use
+RECALL_TOP_K = 3  # Older turns recalled from the long-term archive per query
+RECENT_TURNS = 6  # Messages kept verbatim; older ones are folded into the summary
+MAX_MESSAGE_TOKENS = 120  # A single long message is truncated to this in the context block
+SUMMARY_LINE_CHARS = 160  # Characters kept per summarized message
+
+_WORD = re.compile(r"[a-z0-9']+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "for", "from",
+    "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "so", "that", "the",
+    "this", "to", "was", "we", "what", "when", "where", "who", "why", "with", "you", "your"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens, marking the cut"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - 3, 0)].rstrip() + "..."
+
+
+def _keywords(text: str) -> set:
+    return {word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS and len(word) > 2}
+
+
+def extractive_summary(messages: List[Dict[str, Any]]) -> List[str]:
+    """
+    Default summarizer: one short line per message (its first sentence)
+
+    Cheap and offline; replace with set_summarizer() for an LLM-written summary.
+    """
+    lines = []
+    for entry in messages:
+        text = " ".join(str(entry.get("message", "")).split())
+        if not text:
+            continue
+        first = _SENTENCE_END.split(text, 1)[0]
+        if len(first) > SUMMARY_LINE_CHARS:
+            first = first[:SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+        lines.append(f"{entry.get('role', 'Unknown')}: {first}")
+    return lines
+
+
+def pack_history(
+    messages: List[Dict[str, str]],
+    budget_tokens: int = DEFAULT_HISTORY_BUDGET,
+    max_turns: int = DEFAULT_HISTORY_MAX_TURNS
+) -> List[Dict[str, str]]:
+    """
+    Select the most recent chat messages that fit in a token budget
+
+    Args:
+        messages: Chat messages ({"role", "content"}), oldest first
+        budget_tokens: Token budget for the selected messages
+        max_turns: Upper bound on the number of messages
+
+    Returns:
+        The newest messages that fit, oldest first
+    """
+    packed = []
+    used = 0
+    for message in reversed(messages[-max_turns:] if max_turns else messages):
+        cost = estimate_tokens(message.get("content", "")) + 4  # Per-message overhead
+        if used + cost > budget_tokens:
+            break
+        packed.append(message)
+        used += cost
+    packed.reverse()
+    return packed
+
+
+class ContextBuilder:
+    """
+    Builds the conversation-memory block of the system prompt for a query
+
+    Layout (each section only if non-empty):
+        User information (name + facts relevant to the query)
+        Summary of earlier conversation (rolling, updated in the background)
+        Relevant earlier conversation (top-k turns recalled from the long-term archive)
+        Recent conversation (newest messages that fit the remaining budget; left out
+            when the caller sends the chat history as messages)
+    """
+
+    def __init__(
+        self,
+        memory_manager,
+        budget_tokens: int = DEFAULT_CONTEXT_BUDGET,
+        recent_turns: int = RECENT_TURNS,
+        summarizer: Optional[Callable[[List[Dict[str, Any]]], List[str]]] = None,
+        archive=None,
+        recall_top_k: int = RECALL_TOP_K
+    ):
+        """
+        Initialize Context Builder
+
+        Args:
+            memory_manager: MemoryManager holding messages and user info
+            budget_tokens: Default token budget for build()
+            recent_turns: Messages kept out of the rolling summary
+            summarizer: Turns a list of messages into summary lines (default: extractive_summary)
+            archive: Optional ConversationArchive to recall relevant older turns from
+            recall_top_k: Older turns recalled per query
+        """
+        self.memory_manager = memory_manager
+        self.budget_tokens = budget_tokens
+        self.recent_turns = recent_turns
+        self.summarizer = summarizer or extractive_summary
+        self.archive = archive
+        self.recall_top_k = recall_top_k
+
+        self._summary_lines: List[str] = []
+        self._summarized_upto = ""  # Timestamp of the newest message folded into the summary
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def set_summarizer(self, summarizer: Callable[[List[Dict[str, Any]]], List[str]]):
+        """Replace the function that writes summary lines"""
+        self.summarizer = summarizer
+
+    # ---- Rolling summary (background) ----
+
+    def schedule_summary(self):
+        """Ask the background worker to fold newly aged-out messages into the summary"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._summary_worker, daemon=True, name="context-summary")
+            self._worker.start()
+        self._wakeup.set()
+
+    def _summary_worker(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.update_summary()
+            except Exception as e:
+                print(f"Error updating conversation summary: {e}")
+
+    def update_summary(self):
+        """Summarize messages older than the recent window that aren't summarized yet"""
+        history = self.memory_manager.get_recent_context()
+        older = history[:-self.recent_turns] if len(history) > self.recent_turns else []
+        with self._lock:
+            pending = [entry for entry in older if entry.get("timestamp", "") > self._summarized_upto]
+        if not pending:
+            return
+
+        lines = self.summarizer(pending)
+        with self._lock:
+            self._summary_lines.extend(lines)
+            self._summarized_upto = pending[-1].get("timestamp", "")
+            # Keep the summary bounded: drop the oldest lines beyond twice its budget share
+            limit = int(self.budget_tokens * SUMMARY_SHARE * 2)
+            while len(self._summary_lines) > 1 and estimate_tokens("\n".join(self._summary_lines)) > limit:
+                self._summary_lines.pop(0)
+
+    def reset(self):
+        """Forget the rolling summary (e.g. when conversation memory is cleared)"""
+        with self._lock:
+            self._summary_lines = []
+            self._summarized_upto = ""
+
+    # ---- Packing ----
+
+    def _facts_section(self, query: str, budget: int) -> List[str]:
+        user_info = self.memory_manager.user_info or {}
+        lines = []
+        if user_info.get("name"):
+            lines.append(f"- Name: {user_info['name']}")
+
+        # Most relevant first (keyword overlap), then most recently mentioned; the
+        # fact store's word index keeps this independent of how many facts exist
+        candidates = self.memory_manager.facts.relevant(" ".join(_keywords(query or "")), max(budget // 8, 1))
+        if candidates:
+            fact_lines = []
+            for fact in candidates:
+                line = f"  • {fact}"
+                if estimate_tokens("\n".join(lines + fact_lines + [line])) > budget:
+                    break
+                fact_lines.append(line)
+            if fact_lines:
+                lines.append("- Facts I remember:")
+                lines.extend(fact_lines)
+        return lines
+
+    def _summary_section(self, budget: int) -> List[str]:
+        with self._lock:
+            lines = list(self._summary_lines)
+        kept = []
+        for line in reversed(lines):  # Newest summary lines matter most
+            if estimate_tokens("\n".join(kept + [line])) > budget:
+                break
+            kept.insert(0, line)
+        return kept
+
+    def _recall_section(self, query: str, budget: int, recent: int) -> List[str]:
+        if self.archive is None or not query or self.recall_top_k <= 0:
+            return []
+        try:
+            # Skip turns that are still in the recent window (they're included verbatim)
+            turns = self.archive.search(query, self.recall_top_k, exclude_after=self.archive.recent_boundary(recent))
+        except Exception as e:
+            print(f"Error recalling earlier conversation: {e}")
+            return []
+        kept = []
+        for turn in turns:
+            message = truncate_to_tokens(" ".join(turn["message"].split()), MAX_MESSAGE_TOKENS)
+            line = f"[{turn['timestamp'][:10]}] {turn['role']}: {message}"
+            if estimate_tokens("\n".join(kept + [line])) > budget:
+                break
+            kept.append(line)
+        return kept
+
+    def _recent_section(self, budget: int) -> List[str]:
+        kept = []
+        for entry in reversed(self.memory_manager.get_recent_context(self.recent_turns)):
+            message = truncate_to_tokens(str(entry.get("message", "")), MAX_MESSAGE_TOKENS)
+            line = f"{entry.get('role', 'Unknown')}: {message}"
+            if estimate_tokens("\n".join(kept + [line])) > budget:
+                if not kept and budget > 0:
+                    # Always keep the latest message, cut to what's left
+                    kept.append(truncate_to_tokens(line, budget))
+                break
+            kept.insert(0, line)
+        return kept
+
+    def build(self, query: str = "", budget_tokens: Optional[int] = None, include_recent: bool = True) -> str:
+        """
+        Build the conversation context block for a query
+
+        Args:
+            query: Current user query (used to pick relevant facts)
+            budget_tokens: Token budget (default: the builder's budget)
+            include_recent: Add the recent turns (False when they are sent as chat messages anyway)
+
+        Returns:
+            Context text, or "" when there is nothing to include
+        """
+        budget = budget_tokens or self.budget_tokens
+        sections = []
+
+        facts = self._facts_section(query, int(budget * FACTS_SHARE))
+        if facts:
+            sections.append("User Information I've learned:\n" + "\n".join(facts))
+        summary = self._summary_section(int(budget * SUMMARY_SHARE))
+        if summary:
+            sections.append("Summary of earlier conversation:\n" + "\n".join(summary))
+        # Turns the model sees verbatim: the recent section, or the chat history plus this query
+        recent = self.recent_turns if include_recent else max(self.recent_turns, DEFAULT_HISTORY_MAX_TURNS + 1)
+        recalled = self._recall_section(query, int(budget * RECALL_SHARE), recent)
+        if recalled:
+            sections.append("Relevant earlier conversation:\n" + "\n".join(recalled))
+
+        # Recent turns get whatever the other sections left over
+        if include_recent:
+            remaining = budget - sum(estimate_tokens(section) for section in sections)
+            recent = self._recent_section(remaining)
+            if recent:
+                sections.append("Recent conversation context:\n" + "\n".join(recent))
+
+        return "\n\n".join(sections)
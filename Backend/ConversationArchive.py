@@ -0,0 +1,315 @@
+"""
+Long-Term Conversation Archive for JARVIS
+Keeps every conversation turn (not just the last max_messages) in a SQLite store
+with an incremental keyword index (FTS5) and vector index, so earlier turns
+relevant to the current query can be recalled. Kept separate from sales knowledge.
+"""
+
+import os
+import queue
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# numpy is optional - without it recall is keyword-only
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Archive settings
+CONVERSATION_ARCHIVE_FILE = "Data/conversation_archive.db"
+ARCHIVE_BATCH_SIZE = 32  # Turns embedded and inserted per batch
+KEYWORD_CANDIDATES = 50  # BM25 candidates considered per query
+VECTOR_SCAN_LIMIT = 200000  # Most recent vectors scanned per query (bounds recall latency)
+SCORE_CHUNK_ROWS = 16384  # Vectors widened to float32 and scored at a time (bounds the temporary copy)
+MIN_VECTOR_SIMILARITY = 0.35  # Below this a semantic match isn't worth injecting
+RRF_K = 60  # Reciprocal rank fusion constant
+
+_FTS_TERM = re.compile(r"[A-Za-z0-9]{3,}")
+
+
+class ConversationArchive:
+    """
+    Append-only archive of conversation turns with hybrid (keyword + vector) recall
+
+    Turns are queued by add() and indexed by a background worker in batches, so
+    archiving never blocks a chat turn. Vectors are held in memory as a
+    normalized float16 matrix that grows in place; a query scans at most the
+    VECTOR_SCAN_LIMIT newest rows, and FTS5 keeps keyword lookup logarithmic,
+    so recall time stays bounded as the archive grows. The database is opened
+    on first use, so creating an archive touches no files.
+    """
+
+    def __init__(
+        self,
+        db_file: str = CONVERSATION_ARCHIVE_FILE,
+        embed: Optional[Callable[[List[str]], List[Optional[List[float]]]]] = None
+    ):
+        """
+        Initialize Conversation Archive
+
+        Args:
+            db_file: SQLite database path
+            embed: Batch embedding function (texts -> vectors); None for keyword-only recall
+        """
+        self.db_file = db_file
+        self.embed = embed
+        self._lock = threading.RLock()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._queued = 0  # Turns added but not yet fully archived (briefly overlaps the committed rows)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._fts = False
+
+        # In-memory vector index: row i of _vectors belongs to turn id _vector_ids[i]
+        self._vectors = None
+        self._vector_ids = None
+        self._vector_count = 0
+        self._vectors_loaded = False
+
+    def _db(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_file) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._fts = self._create_schema()
+        return self._conn
+
+    def _create_schema(self) -> bool:
+        """Create tables; returns whether FTS5 keyword indexing is available"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, role TEXT, message TEXT, timestamp TEXT)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (id INTEGER PRIMARY KEY, vec BLOB)")
+            try:
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5("
+                    "message, content='turns', content_rowid='id')"
+                )
+                fts = True
+            except sqlite3.OperationalError:
+                print("SQLite FTS5 not available - conversation recall will use a bounded LIKE scan")
+                fts = False
+            self._conn.commit()
+            return fts
+
+    # ---- Writing ----
+
+    def add(self, role: str, message: str, timestamp: str):
+        """Queue a turn for archiving (returns immediately)"""
+        if not message or not message.strip():
+            return
+        with self._lock:
+            self._queued += 1
+        self._queue.put({"role": role, "message": message, "timestamp": timestamp})
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._index_worker, daemon=True, name="conversation-archive")
+            self._worker.start()
+
+    def _index_worker(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < ARCHIVE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._insert(batch)
+            except Exception as e:
+                print(f"Error archiving conversation turns: {e}")
+            finally:
+                with self._lock:
+                    self._queued -= len(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _insert(self, batch: List[Dict[str, Any]]):
+        """Insert a batch of turns and index them"""
+        vectors = None
+        if self.embed is not None and np is not None:
+            try:
+                vectors = self.embed([turn["message"] for turn in batch])
+            except Exception as e:
+                print(f"Error embedding conversation turns: {e}")
+
+        with self._lock:
+            conn = self._db()
+            ids = []
+            for turn in batch:
+                cursor = conn.execute(
+                    "INSERT INTO turns (role, message, timestamp) VALUES (?, ?, ?)",
+                    (turn["role"], turn["message"], turn["timestamp"])
+                )
+                ids.append(cursor.lastrowid)
+                if self._fts:
+                    conn.execute("INSERT INTO turns_fts (rowid, message) VALUES (?, ?)", (cursor.lastrowid, turn["message"]))
+
+            new_vectors = []
+            for turn_id, vector in zip(ids, vectors or []):
+                if not vector:
+                    continue
+                vec = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(vec)
+                if norm == 0:
+                    continue
+                vec = vec / norm
+                conn.execute("INSERT INTO vectors (id, vec) VALUES (?, ?)", (turn_id, vec.tobytes()))
+                new_vectors.append((turn_id, vec))
+            conn.commit()
+
+            if self._vectors_loaded:
+                for turn_id, vec in new_vectors:
+                    self._append_vector(turn_id, vec)
+
+    def _append_vector(self, turn_id: int, vec):
+        """Append one normalized vector to the in-memory matrix (amortized O(1) growth)"""
+        if self._vectors is None:
+            self._vectors = np.zeros((1024, len(vec)), dtype=np.float16)
+            self._vector_ids = np.zeros(1024, dtype=np.int64)
+        elif self._vector_count == len(self._vectors):
+            self._vectors = np.resize(self._vectors, (len(self._vectors) * 2, self._vectors.shape[1]))
+            self._vector_ids = np.resize(self._vector_ids, len(self._vector_ids) * 2)
+        self._vectors[self._vector_count] = vec
+        self._vector_ids[self._vector_count] = turn_id
+        self._vector_count += 1
+
+    def _load_vectors(self):
+        """Load stored vectors into memory on first semantic query"""
+        with self._lock:
+            if self._vectors_loaded:
+                return
+            for turn_id, blob in self._db().execute("SELECT id, vec FROM vectors ORDER BY id"):
+                self._append_vector(turn_id, np.frombuffer(blob, dtype=np.float32))
+            self._vectors_loaded = True
+
+    def flush(self):
+        """Wait until every queued turn has been archived"""
+        self._queue.join()
+
+    # ---- Recall ----
+
+    def _keyword_ids(self, query: str, limit: int) -> List[int]:
+        terms = _FTS_TERM.findall(query)
+        if not terms:
+            return []
+        with self._lock:
+            conn = self._db()
+            if self._fts:
+                match = " OR ".join(f'"{term}"' for term in terms)
+                rows = conn.execute(
+                    "SELECT rowid FROM turns_fts WHERE turns_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (match, limit)
+                ).fetchall()
+            else:
+                # Bounded fallback: scan only the newest VECTOR_SCAN_LIMIT turns
+                clause = " OR ".join("message LIKE ?" for _ in terms)
+                rows = conn.execute(
+                    f"SELECT id FROM (SELECT id, message FROM turns ORDER BY id DESC LIMIT ?) WHERE {clause} LIMIT ?",
+                    (VECTOR_SCAN_LIMIT, *[f"%{term}%" for term in terms], limit)
+                ).fetchall()
+        return [row[0] for row in rows]
+
+    def _vector_ids_for(self, query: str, limit: int) -> List[int]:
+        if self.embed is None or np is None:
+            return []
+        self._load_vectors()
+        if not self._vector_count:
+            return []
+        try:
+            query_vector = self.embed([query])[0]
+        except Exception as e:
+            print(f"Error embedding recall query: {e}")
+            return []
+        if not query_vector:
+            return []
+
+        query_vec = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query_vec)
+        if norm == 0:
+            return []
+        query_vec = query_vec / norm
+        with self._lock:
+            # Views stay valid outside the lock: appends only write past _vector_count,
+            # and growing the matrix allocates a new one
+            start = max(self._vector_count - VECTOR_SCAN_LIMIT, 0)
+            matrix = self._vectors[start:self._vector_count]
+            ids = self._vector_ids[start:self._vector_count]
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for chunk in range(0, len(matrix), SCORE_CHUNK_ROWS):
+            rows = matrix[chunk:chunk + SCORE_CHUNK_ROWS]
+            scores[chunk:chunk + len(rows)] = rows.astype(np.float32) @ query_vec
+        top = np.argpartition(-scores, min(limit, len(scores) - 1))[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [int(ids[i]) for i in top if scores[i] >= MIN_VECTOR_SIMILARITY]
+
+    def search(self, query: str, top_k: int = 3, exclude_after: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Find the archived turns most relevant to a query
+
+        Keyword (BM25) and vector rankings are merged with reciprocal rank fusion.
+
+        Args:
+            query: Search query
+            top_k: Number of turns to return
+            exclude_after: Ignore turns with an id above this (e.g. ones still in the recent window)
+
+        Returns:
+            List of turn dicts with 'id', 'role', 'message' and 'timestamp', best first
+        """
+        if not query or not query.strip():
+            return []
+
+        fused: Dict[int, float] = {}
+        for ranking in (self._keyword_ids(query, KEYWORD_CANDIDATES), self._vector_ids_for(query, KEYWORD_CANDIDATES)):
+            for rank, turn_id in enumerate(ranking):
+                if exclude_after is not None and turn_id > exclude_after:
+                    continue
+                fused[turn_id] = fused.get(turn_id, 0.0) + 1.0 / (RRF_K + rank)
+
+        best = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        if not best:
+            return []
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT id, role, message, timestamp FROM turns WHERE id IN ({','.join('?' * len(best))})",
+                best
+            ).fetchall()
+        by_id = {row[0]: {"id": row[0], "role": row[1], "message": row[2], "timestamp": row[3]} for row in rows}
+        return [by_id[turn_id] for turn_id in best if turn_id in by_id]
+
+    def recent_boundary(self, recent: int) -> int:
+        """
+        Id of the newest turn older than the `recent` newest turns, for search(exclude_after=...)
+
+        Turns still queued count as the newest ones. Returns 0 when every
+        archived turn is among the recent ones.
+        """
+        with self._lock:
+            offset = max(recent - self._queued, 0)
+            row = self._db().execute("SELECT id FROM turns ORDER BY id DESC LIMIT 1 OFFSET ?", (offset,)).fetchone()
+        return row[0] if row else 0
+
+    def count(self) -> int:
+        """Number of archived turns"""
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+
+    def clear(self):
+        """Delete every archived turn"""
+        self.flush()
+        with self._lock:
+            conn = self._db()
+            conn.execute("DELETE FROM turns")
+            conn.execute("DELETE FROM vectors")
+            if self._fts:
+                conn.execute("INSERT INTO turns_fts (turns_fts) VALUES ('delete-all')")
+            conn.commit()
+            self._vectors = None
+            self._vector_ids = None
+            self._vector_count = 0
@@ -0,0 +1,183 @@
+"""
+Decision Cache for JARVIS
+Remembers what the decision model (FirstLayerDMM) decided for a normalized
+prompt so repeated commands ("open whatsapp", "mute") route without an LLM call.
+Entries expire after a TTL, are evicted LRU, and persist in Data/DecisionCache.json.
+general/realtime decisions are stored as routes and re-applied to the current
+prompt - no answer is ever cached here. Only time-independent tasks (open,
+close, play, system) are cached; reminders, schedules and any prompt with a
+relative date or time ("tomorrow at 9") go to the model every time.
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from Backend.ResponseCache import normalize_query
+
+DECISION_CACHE_FILE = os.path.join("Data", "DecisionCache.json")
+DECISION_CACHE_SIZE = 1000  # Entries kept before least-recently-used eviction
+DECISION_CACHE_TTL = 7 * 24 * 3600  # Seconds a decision stays valid
+DECISION_CACHE_FLUSH_DELAY = 2.0  # Seconds of quiet before changes are written
+ROUTE_LABELS = ("general", "realtime")  # Decisions whose argument is the prompt itself
+TASK_LABELS = ("open", "close", "play", "system")  # Tasks whose meaning doesn't depend on when they're asked
+
+# Dates and times the model resolves against the clock ("tomorrow at 9", "next friday", "in 10 minutes")
+_RELATIVE_TIME = re.compile(
+    r"\b(?:now|today|tonight|tomorrow|yesterday|later|soon|morning|afternoon|evening|noon|midnight|weekend|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|minutes?|hours?|days?|weeks?|months?|years?|"
+    r"at \d+|\d+ ?(?:am|pm|o clock))\b"
+)
+
+
+class DecisionCache:
+    """
+    LRU + TTL map of normalized prompt -> DMM decision, persisted write-behind
+    """
+
+    def __init__(
+        self,
+        path: str = DECISION_CACHE_FILE,
+        max_entries: int = DECISION_CACHE_SIZE,
+        ttl: float = DECISION_CACHE_TTL,
+        flush_delay: float = DECISION_CACHE_FLUSH_DELAY
+    ):
+        """
+        Initialize Decision Cache
+
+        Args:
+            path: JSON file the cache is persisted to
+            max_entries: Size cap (least recently used entries are evicted)
+            ttl: Seconds a decision stays valid
+            flush_delay: Seconds after the last change before it is written
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.flush_delay = flush_delay
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._writer: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.load()
+        atexit.register(self.flush)
+
+    def load(self):
+        """Load persisted decisions, dropping expired ones"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                now = time.time()
+                self._entries = OrderedDict(
+                    (key, entry) for key, entry in entries.items()
+                    if entry.get("expires", 0) > now
+                    and self.is_cacheable(key, entry.get("decision") or [entry.get("route", "")])
+                )
+        except Exception as e:
+            print(f"Error loading decision cache: {e}")
+            self._entries = OrderedDict()
+
+    @staticmethod
+    def is_cacheable(prompt: str, decision: Optional[List[str]]) -> bool:
+        """False for decisions that could change with the clock (reminders, schedules, "tomorrow at 9")"""
+        if not decision or _RELATIVE_TIME.search(normalize_query(prompt)):
+            return False
+        return all(task.split(" ", 1)[0] in ROUTE_LABELS + TASK_LABELS for task in decision)
+
+    def get(self, prompt: str) -> Optional[List[str]]:
+        """Cached decision for a prompt (routes re-applied to this prompt's wording), or None"""
+        key = normalize_query(prompt)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires"] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                    self._mark_dirty()
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        if "route" in entry:
+            return [f"{entry['route']} {prompt}"]
+        return list(entry["decision"])
+
+    def put(self, prompt: str, decision: List[str]):
+        """Remember the decision for a prompt (ignored for decisions that aren't cacheable)"""
+        key = normalize_query(prompt)
+        if not key or not self.is_cacheable(prompt, decision):
+            return
+        entry: Dict[str, Any] = {"expires": time.time() + self.ttl}
+        label = decision[0].split(" ", 1)[0]
+        if len(decision) == 1 and label in ROUTE_LABELS:
+            entry["route"] = label  # Where to send it, not what to answer
+        else:
+            entry["decision"] = list(decision)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._mark_dirty()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._mark_dirty()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _mark_dirty(self):
+        """Schedule a write (caller holds the lock)"""
+        self._dirty = True
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="decision-cache-writer")
+            self._writer.start()
+
+    def _writer_loop(self):
+        while True:
+            time.sleep(self.flush_delay)
+            self.flush()
+            with self._lock:
+                if not self._dirty:
+                    self._writer = None
+                    return
+
+    def flush(self):
+        """Write pending changes now (temp file + atomic rename)"""
+        with self._write_lock:  # Snapshots are written in the order they were taken
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = dict(self._entries)
+                self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                print(f"Error saving decision cache: {e}")
+
+
+# Process-wide cache used by FirstLayerDMM
+decision_cache = DecisionCache()
@@ -5,6 +5,11 @@ Parses documents (PDFs, Word, Excel, text files) and stores them in vector memor
 
 import os
 import json
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import hashlib
@@ -34,6 +39,9 @@ try:
     import cv2
     import numpy as np
     OCR_AVAILABLE = True
+    # Tiles are OCR'd by parallel Tesseract processes; keep each one single-threaded
+    # so they don't oversubscribe the cores (set once, inherited by every subprocess)
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 except ImportError:
     OCR_AVAILABLE = False
 
@@ -43,18 +51,63 @@ try:
 except ImportError:
     PPTX_AVAILABLE = False
 
-from Backend.SalesMemory import sales_memory_manager, learn_from_docs
+from Backend.SalesMemory import sales_memory_manager, learn_from_docs, learn_from_docs_batch
 
-def process_text_file(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+# OCR pipeline settings
+OCR_CACHE_FILE = "Data/ocr_cache.json"
+OCR_CACHE_MAX_ENTRIES = 500
+OCR_CACHE_FLUSH_DELAY = 2.0  # Seconds of quiet before new OCR results are written
+OCR_TILE_HEIGHT = 1200  # Target band height in pixels when tiling large images
+OCR_TILE_MIN_HEIGHT = 2400  # Images shorter than this are OCR'd in one pass
+OCR_TILE_WIDTH = 1600  # Target column width in pixels when splitting wide images
+OCR_TILE_MIN_WIDTH = 3200  # Images narrower than this are never split into columns
+OCR_TILE_SEARCH = 150  # How far (px) to look around a cut for a blank row/column
+OCR_GUTTER_MAX_INK = 0.01  # A column is only cut on if at most this fraction of it is ink
+OCR_BINARIZE_MIN_SEPARABILITY = 0.8  # Otsu separability below this means a photo, not a scan
+OCR_MAX_WORKERS = os.cpu_count() or 4
+
+# OCR text cache keyed by SHA-256 of the image bytes (re-uploads cost no OCR time)
+_ocr_cache = None
+_ocr_cache_lock = threading.Lock()
+_ocr_cache_write_lock = threading.Lock()
+_ocr_cache_dirty = False
+_ocr_cache_writer = None
+
+def _chunk(content: str, source: str, category: str) -> Dict[str, str]:
+    """Build a knowledge chunk ready to be stored with learn_from_docs_batch"""
+    return {"content": content, "source": source, "category": category}
+
+def store_chunks(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Embed and store the chunks from an extract_* result in sales memory (one batch)
+    
+    Args:
+        result: Dictionary returned by an extract_* function
+        
+    Returns:
+        Dictionary with processing results ('entries_created', 'entry_ids')
+    """
+    result = dict(result)
+    chunks = result.pop("chunks", None)
+    if not result.get("success"):
+        result.setdefault("entries_created", 0)
+        return result
+    
+    entry_ids = learn_from_docs_batch(chunks or [])
+    result["entries_created"] = len(entry_ids)
+    result["entry_ids"] = entry_ids
+    return result
+
+def extract_text_file(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
     """
-    Process a text file and extract content
+    Extract knowledge chunks from a text file (without storing them)
     
     Args:
         file_path: Path to the text file
         source_name: Optional custom name for the source
         
     Returns:
-        Dictionary with processing results
+        Dictionary with extraction results and 'chunks' to store
     """
     try:
         # Try UTF-8 first
@@ -79,22 +132,18 @@ def process_text_file(file_path: str, source_name: Optional[str] = None) -> Dict
     chunk_size = 1000  # characters per chunk
     chunks = [content[i:i+chunk_size] for i in range(0, len(content), chunk_size)]
     
-    entry_ids = []
-    for i, chunk in enumerate(chunks):
-        if chunk.strip():
-            entry_id = learn_from_docs(chunk, f"{source_name}_chunk_{i+1}", "document")
-            entry_ids.append(entry_id)
-    
     return {
         "success": True,
         "source": source_name,
-        "entries_created": len(entry_ids),
-        "entry_ids": entry_ids
+        "chunks": [
+            _chunk(chunk, f"{source_name}_chunk_{i+1}", "document")
+            for i, chunk in enumerate(chunks) if chunk.strip()
+        ]
     }
 
-def process_pdf(file_path: str, source_name: Optional[str] = None, max_pages: int = 50) -> Dict[str, Any]:
+def extract_pdf(file_path: str, source_name: Optional[str] = None, max_pages: int = 50) -> Dict[str, Any]:
     """
-    Process a PDF file and extract text content
+    Extract knowledge chunks (one per page) from a PDF file
     
     Args:
         file_path: Path to the PDF file
@@ -102,7 +151,7 @@ def process_pdf(file_path: str, source_name: Optional[str] = None, max_pages: in
         max_pages: Maximum number of pages to process
         
     Returns:
-        Dictionary with processing results
+        Dictionary with extraction results and 'chunks' to store
     """
     if not PDF_AVAILABLE:
         return {
@@ -119,19 +168,14 @@ def process_pdf(file_path: str, source_name: Optional[str] = None, max_pages: in
             pdf_reader = PyPDF2.PdfReader(f)
             total_pages = min(len(pdf_reader.pages), max_pages)
             
-            entry_ids = []
+            chunks = []
             for page_num in range(total_pages):
                 try:
                     page = pdf_reader.pages[page_num]
                     text = page.extract_text()
                     
                     if text.strip():
-                        entry_id = learn_from_docs(
-                            text,
-                            f"{source_name}_page_{page_num+1}",
-                            "document"
-                        )
-                        entry_ids.append(entry_id)
+                        chunks.append(_chunk(text, f"{source_name}_page_{page_num+1}", "document"))
                 except Exception as e:
                     print(f"Error processing page {page_num+1}: {e}")
                     continue
@@ -139,9 +183,8 @@ def process_pdf(file_path: str, source_name: Optional[str] = None, max_pages: in
         return {
             "success": True,
             "source": source_name,
-            "entries_created": len(entry_ids),
             "total_pages": total_pages,
-            "entry_ids": entry_ids
+            "chunks": chunks
         }
     
     except Exception as e:
@@ -151,16 +194,16 @@ def process_pdf(file_path: str, source_name: Optional[str] = None, max_pages: in
             "entries_created": 0
         }
 
-def process_word_document(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+def extract_word_document(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
     """
-    Process a Word document (.docx) and extract text
+    Extract knowledge chunks from a Word document (.docx)
     
     Args:
         file_path: Path to the Word document
         source_name: Optional custom name for the source
         
     Returns:
-        Dictionary with processing results
+        Dictionary with extraction results and 'chunks' to store
     """
     if not DOCX_AVAILABLE:
         return {
@@ -187,21 +230,13 @@ def process_word_document(file_path: str, source_name: Optional[str] = None) ->
         chunk_size = 2000
         chunks = [content[i:i+chunk_size] for i in range(0, len(content), chunk_size)]
         
-        entry_ids = []
-        for i, chunk in enumerate(chunks):
-            if chunk.strip():
-                entry_id = learn_from_docs(
-                    chunk,
-                    f"{source_name}_section_{i+1}",
-                    "document"
-                )
-                entry_ids.append(entry_id)
-        
         return {
             "success": True,
             "source": source_name,
-            "entries_created": len(entry_ids),
-            "entry_ids": entry_ids
+            "chunks": [
+                _chunk(chunk, f"{source_name}_section_{i+1}", "document")
+                for i, chunk in enumerate(chunks) if chunk.strip()
+            ]
         }
     
     except Exception as e:
@@ -211,9 +246,9 @@ def process_word_document(file_path: str, source_name: Optional[str] = None) ->
             "entries_created": 0
         }
 
-def process_excel_file(file_path: str, source_name: Optional[str] = None, max_sheets: int = 5) -> Dict[str, Any]:
+def extract_excel_file(file_path: str, source_name: Optional[str] = None, max_sheets: int = 5) -> Dict[str, Any]:
     """
-    Process an Excel file and extract data
+    Extract knowledge chunks (one per sheet) from an Excel file
     
     Args:
         file_path: Path to the Excel file
@@ -221,7 +256,7 @@ def process_excel_file(file_path: str, source_name: Optional[str] = None, max_sh
         max_sheets: Maximum number of sheets to process
         
     Returns:
-        Dictionary with processing results
+        Dictionary with extraction results and 'chunks' to store
     """
     if not EXCEL_AVAILABLE:
         return {
@@ -237,7 +272,7 @@ def process_excel_file(file_path: str, source_name: Optional[str] = None, max_sh
         excel_file = pd.ExcelFile(file_path)
         sheet_names = excel_file.sheet_names[:max_sheets]
         
-        entry_ids = []
+        chunks = []
         for sheet_name in sheet_names:
             try:
                 df = pd.read_excel(file_path, sheet_name=sheet_name)
@@ -248,12 +283,7 @@ def process_excel_file(file_path: str, source_name: Optional[str] = None, max_sh
                 
                 content = f"Sheet: {sheet_name}\n\n{df_str}"
                 
-                entry_id = learn_from_docs(
-                    content,
-                    f"{source_name}_{sheet_name}",
-                    "spreadsheet"
-                )
-                entry_ids.append(entry_id)
+                chunks.append(_chunk(content, f"{source_name}_{sheet_name}", "spreadsheet"))
             except Exception as e:
                 print(f"Error processing sheet {sheet_name}: {e}")
                 continue
@@ -261,9 +291,8 @@ def process_excel_file(file_path: str, source_name: Optional[str] = None, max_sh
         return {
             "success": True,
             "source": source_name,
-            "entries_created": len(entry_ids),
             "sheets_processed": len(sheet_names),
-            "entry_ids": entry_ids
+            "chunks": chunks
         }
     
     except Exception as e:
@@ -273,16 +302,16 @@ def process_excel_file(file_path: str, source_name: Optional[str] = None, max_sh
             "entries_created": 0
         }
 
-def process_ppt(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+def extract_ppt(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
     """
-    Process a PowerPoint file and extract text content
+    Extract the text content of a PowerPoint file as a single knowledge chunk
     
     Args:
         file_path: Path to the PPT/PPTX file
         source_name: Optional custom name for the source
         
     Returns:
-        Dictionary with processing results
+        Dictionary with extraction results and 'chunks' to store
     """
     if not PPTX_AVAILABLE:
         return {
@@ -329,16 +358,13 @@ def process_ppt(file_path: str, source_name: Optional[str] = None) -> Dict[str,
         # Combine all text
         full_content = "\n\n".join(all_text)
         
-        # Store in memory
         source = source_name or os.path.basename(file_path)
-        entries_created = learn_from_docs(full_content, source)
         
         return {
             "success": True,
             "source": source,
-            "content": full_content,
             "slides_processed": slide_count,
-            "entries_created": entries_created
+            "chunks": [_chunk(full_content, source, "document")]
         }
         
     except Exception as e:
@@ -352,16 +378,181 @@ def process_ppt(file_path: str, source_name: Optional[str] = None) -> Dict[str,
             "entries_created": 0
         }
 
-def process_image(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+def _load_ocr_cache() -> "OrderedDict[str, Dict[str, Any]]":
+    """Load the OCR result cache from disk (once per process)"""
+    global _ocr_cache
+    if _ocr_cache is None:
+        _ocr_cache = OrderedDict()
+        try:
+            if os.path.exists(OCR_CACHE_FILE):
+                with open(OCR_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    _ocr_cache.update(json.load(f))
+        except Exception as e:
+            print(f"Error loading OCR cache: {e}")
+    return _ocr_cache
+
+def _schedule_ocr_cache_save():
+    """Mark the cache dirty and start the write-behind writer if needed (caller holds _ocr_cache_lock)"""
+    global _ocr_cache_dirty, _ocr_cache_writer
+    _ocr_cache_dirty = True
+    if _ocr_cache_writer is None:
+        _ocr_cache_writer = threading.Thread(target=_ocr_cache_writer_loop, daemon=True, name="ocr-cache-writer")
+        _ocr_cache_writer.start()
+
+def _ocr_cache_writer_loop():
+    global _ocr_cache_writer
+    while True:
+        time.sleep(OCR_CACHE_FLUSH_DELAY)
+        _save_ocr_cache()
+        with _ocr_cache_lock:
+            if not _ocr_cache_dirty:
+                _ocr_cache_writer = None
+                return
+
+def _save_ocr_cache():
+    """Write pending OCR results now (temp file + atomic rename, outside the cache lock)"""
+    global _ocr_cache_dirty
+    with _ocr_cache_write_lock:  # Snapshots are written in the order they were taken
+        with _ocr_cache_lock:
+            if not _ocr_cache_dirty:
+                return
+            snapshot = dict(_ocr_cache)
+            _ocr_cache_dirty = False
+        try:
+            os.makedirs(os.path.dirname(OCR_CACHE_FILE), exist_ok=True)
+            temp_path = f"{OCR_CACHE_FILE}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(temp_path, OCR_CACHE_FILE)
+        except Exception as e:
+            print(f"Error saving OCR cache: {e}")
+
+atexit.register(_save_ocr_cache)
+
+def _preprocess_for_ocr(image_bytes: bytes):
+    """
+    Decode image bytes straight to grayscale and binarize with Otsu's threshold
+    when the image is a document scan (clearly two-toned); photos stay grayscale
+    
+    Returns:
+        Grayscale or binary (0/255) numpy array, or None if the image could not be decoded
+    """
+    gray = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+    threshold, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    
+    # Otsu separability: between-class variance / total variance (1.0 = perfectly two-toned)
+    total_variance = float(gray.var())
+    if total_variance == 0:
+        return gray
+    dark = gray <= threshold
+    dark_weight = float(dark.mean())
+    if dark_weight in (0.0, 1.0):
+        return gray
+    between = dark_weight * (1 - dark_weight) * (float(gray[dark].mean()) - float(gray[~dark].mean())) ** 2
+    if between / total_variance < OCR_BINARIZE_MIN_SEPARABILITY:
+        return gray
+    return binary
+
+def _find_cuts(ink, size: int, tile: int, max_ink: Optional[float] = None) -> List[int]:
+    """
+    Cut positions splitting `size` pixels into ~`tile`-sized pieces, each placed on the
+    emptiest row/column near its target; with max_ink, stop where no blank enough one exists
+    """
+    cuts = []
+    start = 0
+    while size - start > tile * 1.5:
+        target = start + tile
+        lo = max(start + 1, target - OCR_TILE_SEARCH)
+        hi = min(size - 1, target + OCR_TILE_SEARCH)
+        cut = lo + int(np.argmin(ink[lo:hi]))
+        if max_ink is not None and ink[cut] > max_ink:
+            break
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+def _split_into_tiles(image) -> List[Any]:
+    """
+    Split a large image into tiles in reading order: wide images into columns at
+    blank vertical gutters (so columns/spread pages are read one after the other),
+    then tall columns into horizontal bands cut on the emptiest row near each
+    boundary, so that lines of text are not sliced in half
+    """
+    height, width = image.shape[:2]
+    ink = image < 128  # Dark pixels; blank rows/gutters between text are ~0
+    
+    column_cuts = []
+    if width >= OCR_TILE_MIN_WIDTH:
+        column_cuts = _find_cuts(ink.sum(axis=0), width, OCR_TILE_WIDTH, max_ink=height * OCR_GUTTER_MAX_INK)
+    
+    tiles = []
+    edges = [0] + column_cuts + [width]
+    for left, right in zip(edges, edges[1:]):
+        column = image[:, left:right]
+        if height < OCR_TILE_MIN_HEIGHT:
+            tiles.append(column)
+            continue
+        row_edges = [0] + _find_cuts(ink[:, left:right].sum(axis=1), height, OCR_TILE_HEIGHT) + [height]
+        tiles.extend(column[top:bottom] for top, bottom in zip(row_edges, row_edges[1:]))
+    return tiles
+
+def _ocr_image(image) -> str:
+    """Run Tesseract over a preprocessed image, tiling large images across a worker pool"""
+    tiles = _split_into_tiles(image)
+    if len(tiles) == 1:
+        return pytesseract.image_to_string(image)
+    
+    # Each Tesseract call is a separate process, so threads are enough to keep all cores busy
+    with ThreadPoolExecutor(max_workers=min(OCR_MAX_WORKERS, len(tiles))) as executor:
+        texts = list(executor.map(pytesseract.image_to_string, tiles))
+    return "\n".join(text.strip("\n") for text in texts)
+
+def extract_image_text(file_path: str) -> Optional[str]:
     """
-    Process an image file using OCR to extract text
+    Extract text from an image using the OCR pipeline
+    (grayscale, binarize scans, tiled parallel OCR, content-hash result cache)
+    
+    Args:
+        file_path: Path to the image file
+        
+    Returns:
+        Extracted text (may be empty), or None if the image could not be read
+    """
+    with open(file_path, 'rb') as f:
+        image_bytes = f.read()
+    
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    with _ocr_cache_lock:
+        cached = _load_ocr_cache().get(content_hash)
+        if cached is not None:
+            _ocr_cache.move_to_end(content_hash)
+            return cached["text"]
+    
+    image = _preprocess_for_ocr(image_bytes)
+    if image is None:
+        return None
+    
+    text = _ocr_image(image)
+    
+    with _ocr_cache_lock:
+        _ocr_cache[content_hash] = {"text": text, "timestamp": datetime.now().isoformat()}
+        while len(_ocr_cache) > OCR_CACHE_MAX_ENTRIES:
+            _ocr_cache.popitem(last=False)
+        _schedule_ocr_cache_save()
+    return text
+
+def extract_image(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract knowledge chunks from an image file using OCR
     
     Args:
         file_path: Path to the image file
         source_name: Optional custom name for the source
         
     Returns:
-        Dictionary with processing results
+        Dictionary with extraction results and 'chunks' to store
     """
     if not OCR_AVAILABLE:
         return {
@@ -374,21 +565,15 @@ def process_image(file_path: str, source_name: Optional[str] = None) -> Dict[str
         if not source_name:
             source_name = os.path.basename(file_path)
         
-        # Load image
-        image = cv2.imread(file_path)
-        if image is None:
+        # Extract text using the OCR pipeline (cached by image content hash)
+        content = extract_image_text(file_path)
+        if content is None:
             return {
                 "success": False,
                 "error": "Could not read image file",
                 "entries_created": 0
             }
         
-        # Convert to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # Extract text using OCR
-        content = pytesseract.image_to_string(image_rgb)
-        
         if not content.strip():
             return {
                 "success": False,
@@ -400,21 +585,13 @@ def process_image(file_path: str, source_name: Optional[str] = None) -> Dict[str
         chunk_size = 2000
         chunks = [content[i:i+chunk_size] for i in range(0, len(content), chunk_size)]
         
-        entry_ids = []
-        for i, chunk in enumerate(chunks):
-            if chunk.strip():
-                entry_id = learn_from_docs(
-                    chunk,
-                    f"{source_name}_ocr_chunk_{i+1}",
-                    "document"
-                )
-                entry_ids.append(entry_id)
-        
         return {
             "success": True,
             "source": source_name,
-            "entries_created": len(entry_ids),
-            "entry_ids": entry_ids
+            "chunks": [
+                _chunk(chunk, f"{source_name}_ocr_chunk_{i+1}", "document")
+                for i, chunk in enumerate(chunks) if chunk.strip()
+            ]
         }
     
     except Exception as e:
@@ -424,16 +601,17 @@ def process_image(file_path: str, source_name: Optional[str] = None) -> Dict[str
             "entries_created": 0
         }
 
-def process_document(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+def extract_document(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
     """
-    Process any document type (auto-detects file type)
+    Extract knowledge chunks from any document type (auto-detects file type)
+    without storing them, so extraction can run apart from embedding
     
     Args:
         file_path: Path to the document
         source_name: Optional custom name for the source
         
     Returns:
-        Dictionary with processing results
+        Dictionary with extraction results and 'chunks' to store
     """
     if not os.path.exists(file_path):
         return {
@@ -475,17 +653,17 @@ def process_document(file_path: str, source_name: Optional[str] = None) -> Dict[
             pass
     
     if file_ext == '.pdf':
-        return process_pdf(file_path, source_name)
+        return extract_pdf(file_path, source_name)
     elif file_ext in ['.docx', '.doc']:
-        return process_word_document(file_path, source_name)
+        return extract_word_document(file_path, source_name)
     elif file_ext in ['.xlsx', '.xls']:
-        return process_excel_file(file_path, source_name)
+        return extract_excel_file(file_path, source_name)
     elif file_ext in ['.txt', '.md', '.csv', '.log']:
-        return process_text_file(file_path, source_name)
+        return extract_text_file(file_path, source_name)
     elif file_ext in ['.ppt', '.pptx']:
-        return process_ppt(file_path, source_name)
+        return extract_ppt(file_path, source_name)
     elif file_ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp']:
-        return process_image(file_path, source_name)
+        return extract_image(file_path, source_name)
     else:
         return {
             "success": False,
@@ -494,3 +672,40 @@ def process_document(file_path: str, source_name: Optional[str] = None) -> Dict[
         }
 
 
+
+def process_text_file(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+    """Process a text file and store its content (see extract_text_file)"""
+    return store_chunks(extract_text_file(file_path, source_name))
+
+def process_pdf(file_path: str, source_name: Optional[str] = None, max_pages: int = 50) -> Dict[str, Any]:
+    """Process a PDF file and store its pages (see extract_pdf)"""
+    return store_chunks(extract_pdf(file_path, source_name, max_pages))
+
+def process_word_document(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+    """Process a Word document and store its sections (see extract_word_document)"""
+    return store_chunks(extract_word_document(file_path, source_name))
+
+def process_excel_file(file_path: str, source_name: Optional[str] = None, max_sheets: int = 5) -> Dict[str, Any]:
+    """Process an Excel file and store its sheets (see extract_excel_file)"""
+    return store_chunks(extract_excel_file(file_path, source_name, max_sheets))
+
+def process_ppt(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+    """Process a PowerPoint file and store its text (see extract_ppt)"""
+    return store_chunks(extract_ppt(file_path, source_name))
+
+def process_image(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+    """Process an image file with OCR and store its text (see extract_image)"""
+    return store_chunks(extract_image(file_path, source_name))
+
+def process_document(file_path: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Process any document type (auto-detects file type) and store it in sales memory
+    
+    Args:
+        file_path: Path to the document
+        source_name: Optional custom name for the source
+        
+    Returns:
+        Dictionary with processing results
+    """
+    return store_chunks(extract_document(file_path, source_name))
@@ -0,0 +1,268 @@
+"""
+Persistent Download Cache for Google Drive Integration
+Content-addressed local store of downloaded Drive files, keyed by file ID and
+revision (ETag / Last-Modified / Content-Length), with an LRU size cap
+"""
+
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Cache settings
+DRIVE_CACHE_DIR = os.path.join("Data", "drive_cache")
+DRIVE_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+DRIVE_CACHE_FLUSH_DELAY = 2.0  # Seconds after a cache hit before access times are written
+
+
+def validator_from_headers(headers) -> Optional[str]:
+    """
+    Build a revision validator for a Drive file from its response headers
+
+    Returns:
+        Validator string, or None if the server sent nothing to identify the revision
+    """
+    parts = []
+    for header in ('ETag', 'Last-Modified', 'Content-Length'):
+        value = headers.get(header)
+        if value:
+            parts.append(f"{header.lower()}={value}")
+    return "|".join(parts) if parts else None
+
+
+class DriveCache:
+    """
+    LRU cache of downloaded Drive files
+
+    Blobs are stored once per content hash (blobs/<sha256><ext>); the index maps
+    each Drive file ID to its current revision validator and blob. Entries whose
+    validator no longer matches the server are treated as misses and replaced.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DRIVE_CACHE_DIR,
+        max_bytes: int = DRIVE_CACHE_MAX_BYTES,
+        flush_delay: float = DRIVE_CACHE_FLUSH_DELAY
+    ):
+        """
+        Initialize Drive Cache
+
+        Args:
+            cache_dir: Directory for blobs and the index
+            max_bytes: Total blob size above which least recently used entries are evicted
+            flush_delay: Seconds after a cache hit before the updated index is written
+        """
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.flush_delay = flush_delay
+        self.index: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # Oldest access first
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._writer: Optional[threading.Thread] = None
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.load_index()
+        atexit.register(self.flush)
+
+    def load_index(self):
+        """Load the cache index, dropping entries whose blob has disappeared"""
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+                self.index = OrderedDict(
+                    (file_id, entry) for file_id, entry in entries.items()
+                    if os.path.exists(self._blob_path(entry["blob"]))
+                )
+        except Exception as e:
+            print(f"Error loading Drive cache index: {e}")
+            self.index = OrderedDict()
+
+    def save_index(self):
+        """Persist the cache index atomically (caller holds the lock)"""
+        self._dirty = False
+        self._write_index(self.index)
+
+    def _write_index(self, index: Dict[str, Any]):
+        try:
+            temp_file = f"{self.index_file}.{threading.get_ident()}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+        except Exception as e:
+            print(f"Error saving Drive cache index: {e}")
+
+    def _mark_dirty(self):
+        """Schedule a batched index write (caller holds the lock)"""
+        self._dirty = True
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="drive-cache-writer")
+            self._writer.start()
+
+    def _writer_loop(self):
+        while True:
+            time.sleep(self.flush_delay)
+            self.flush()
+            with self._lock:
+                if not self._dirty:
+                    self._writer = None
+                    return
+
+    def flush(self):
+        """Write pending access-time updates now"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = {file_id: dict(entry) for file_id, entry in self.index.items()}
+                self._dirty = False
+            self._write_index(snapshot)
+
+    def _blob_path(self, blob: str) -> str:
+        return os.path.join(self.blob_dir, blob)
+
+    def _manifest(self, file_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Download manifest dict (same shape as DriveProcessor.download_file_info)"""
+        return {
+            "id": file_id,
+            "name": entry["name"],
+            "path": self._blob_path(entry["blob"]),
+            "size": entry["size"],
+            "sha256": entry["sha256"],
+            "content_type": entry.get("content_type", ""),
+            "cached": True
+        }
+
+    def lookup(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached index entry for a file ID (without validating or touching it)"""
+        with self._lock:
+            entry = self.index.get(file_id)
+            return dict(entry) if entry else None
+
+    def get(self, file_id: str, validator: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached download for this file revision, marking it recently used
+
+        Args:
+            file_id: Google Drive file ID
+            validator: Revision validator from the server (see validator_from_headers)
+
+        Returns:
+            Download manifest dict, or None on a miss
+        """
+        with self._lock:
+            entry = self.index.get(file_id)
+            if (entry is None or validator is None or entry["validator"] != validator
+                    or not os.path.exists(self._blob_path(entry["blob"]))):
+                self.misses += 1
+                return None
+            entry["last_access"] = time.time()
+            self.index.move_to_end(file_id)
+            self.hits += 1
+            self._mark_dirty()  # Only recency changed; written in batches
+            return self._manifest(file_id, entry)
+
+    def put(
+        self,
+        file_id: str,
+        validator: str,
+        temp_path: str,
+        download: Dict[str, Any],
+        etag: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Move a finished download into the cache
+
+        Args:
+            file_id: Google Drive file ID
+            validator: Revision validator from the server
+            temp_path: Path of the completed download (moved, not copied)
+            download: Manifest dict with 'name', 'size', 'sha256' and 'content_type'
+            etag: Server ETag, sent as If-None-Match when revalidating
+
+        Returns:
+            Download manifest dict pointing at the cached blob
+        """
+        ext = os.path.splitext(download["name"])[1].lower()
+        blob = f"{download['sha256']}{ext}"
+        blob_path = self._blob_path(blob)
+
+        with self._lock:
+            if os.path.exists(blob_path):
+                os.remove(temp_path)  # Same content already cached under another ID/revision
+            else:
+                shutil.move(temp_path, blob_path)
+
+            old_entry = self.index.pop(file_id, None)
+            entry = {
+                "validator": validator,
+                "etag": etag,
+                "blob": blob,
+                "name": download["name"],
+                "size": download["size"],
+                "sha256": download["sha256"],
+                "content_type": download.get("content_type", ""),
+                "last_access": time.time()
+            }
+            self.index[file_id] = entry
+            if old_entry and old_entry["blob"] != blob:
+                self._remove_blob_if_unused(old_entry["blob"])
+            self._evict(keep=file_id)
+            self.save_index()
+            return self._manifest(file_id, entry)
+
+    def _remove_blob_if_unused(self, blob: str):
+        """Delete a blob once no index entry references it"""
+        if any(entry["blob"] == blob for entry in self.index.values()):
+            return
+        try:
+            os.remove(self._blob_path(blob))
+        except OSError:
+            pass
+
+    def total_bytes(self) -> int:
+        """Total size of distinct cached blobs"""
+        return sum({entry["blob"]: entry["size"] for entry in self.index.values()}.values())
+
+    def _evict(self, keep: Optional[str] = None):
+        """Evict least recently used entries until the cache fits in max_bytes"""
+        total = self.total_bytes()
+        while total > self.max_bytes and len(self.index) > 1:
+            file_id = next(iter(self.index))
+            if file_id == keep:
+                self.index.move_to_end(file_id)
+                file_id = next(iter(self.index))
+            entry = self.index.pop(file_id)
+            if not any(other["blob"] == entry["blob"] for other in self.index.values()):
+                total -= entry["size"]
+                self._remove_blob_if_unused(entry["blob"])
+            print(f"Evicted from Drive cache: {entry['name']}")
+
+    def clear(self):
+        """Remove every cached file"""
+        with self._lock:
+            self.index.clear()
+            shutil.rmtree(self.blob_dir, ignore_errors=True)
+            os.makedirs(self.blob_dir, exist_ok=True)
+            self.save_index()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            return {
+                "entries": len(self.index),
+                "total_bytes": self.total_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
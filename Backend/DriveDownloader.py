@@ -0,0 +1,312 @@
+"""
+Download Scheduler for Google Drive Integration
+Shared pooled HTTP session, bounded concurrent downloads, per-host rate limiting,
+retry with exponential backoff, and streamed, size-capped, hashed writes to disk
+"""
+
+import hashlib
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Defaults (overridable per scheduler)
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 5.0  # Per host
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5  # Seconds
+DEFAULT_BACKOFF_MAX = 16.0  # Seconds
+DEFAULT_TIMEOUT = 30
+
+# Streaming defaults
+DEFAULT_CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 8 * 1024  # Enough to spot Drive's virus-scan warning page and file magic bytes
+DEFAULT_MAX_DOWNLOAD_BYTES = 500 * 1024 * 1024
+DEFAULT_MAX_RESUMES = 3
+
+# Status codes worth retrying (throttling and transient server errors)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class DownloadTooLarge(Exception):
+    """Raised when a download exceeds the configured maximum size"""
+
+
+def read_head(response: requests.Response, size: int = SNIFF_BYTES, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[bytes, Iterator[bytes]]:
+    """
+    Read just the first bytes of a streamed response without consuming the rest
+
+    Returns:
+        (head bytes, iterator over the remaining body chunks)
+    """
+    chunks = response.iter_content(chunk_size=chunk_size)
+    parts: List[bytes] = []
+    read = 0
+    for chunk in chunks:
+        if chunk:
+            parts.append(chunk)
+            read += len(chunk)
+            if read >= size:
+                break
+    return b''.join(parts), chunks
+
+
+def _expected_size(response: requests.Response) -> Optional[int]:
+    """Total body size announced by the server, if any"""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit():
+        return int(content_length)
+    return None
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host so parallel workers don't trip throttling"""
+
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        """Block until the next request slot for this host"""
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class DownloadScheduler:
+    """
+    Runs downloads on a bounded worker pool over one shared, pooled requests.Session
+
+    All requests go through request(), which applies per-host rate limiting and
+    retries connection errors, 429s and 5xx responses with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        timeout: float = DEFAULT_TIMEOUT,
+        session: Optional[requests.Session] = None,
+        max_resumes: int = DEFAULT_MAX_RESUMES
+    ):
+        """
+        Initialize Download Scheduler
+
+        Args:
+            max_workers: Number of concurrent downloads
+            requests_per_second: Request rate limit per host
+            max_retries: Retries after the first attempt
+            backoff_base: Initial backoff delay in seconds (doubled each retry)
+            backoff_max: Maximum backoff delay in seconds
+            timeout: Per-request timeout in seconds
+            session: Optional pre-configured session (default: new pooled session)
+            max_resumes: Range-request resumes allowed after a dropped connection
+        """
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.max_resumes = max_resumes
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+
+        if session is None:
+            session = requests.Session()
+            # Keep one connection per worker alive for reuse across files
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({'User-Agent': USER_AGENT})
+        self.session = session
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Worker pool (created lazily so idle processors don't hold threads)"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="drive-download")
+            return self._executor
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Delay before retry number `attempt` (honours Retry-After when the server sends it)"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        # Full jitter so parallel workers don't retry in lockstep
+        return random.uniform(delay / 2, delay)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a rate-limited request with retry and exponential backoff
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Passed through to requests.Session.request
+
+        Returns:
+            The final response (may still be an error status after the last retry)
+
+        Raises:
+            requests.exceptions.RequestException if every attempt failed to connect
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlparse(url).netloc
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(host)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                delay = self._backoff_delay(attempt, response)
+                response.close()
+                time.sleep(delay)
+                continue
+            return response
+
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Rate-limited GET with retry"""
+        return self.request('GET', url, **kwargs)
+
+    def stream_to_file(
+        self,
+        response: requests.Response,
+        dest_path: str,
+        url: Optional[str] = None,
+        head: bytes = b'',
+        body: Optional[Iterator[bytes]] = None,
+        max_bytes: int = DEFAULT_MAX_DOWNLOAD_BYTES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Stream a response body to disk in fixed-size chunks, hashing while writing
+
+        If the connection drops mid-transfer and url is given, the download resumes
+        with an HTTP Range request (guarded by If-Range) instead of starting over.
+        The partial file is removed on any failure.
+
+        Args:
+            response: Streamed (stream=True) response positioned at the body start
+            dest_path: File to write
+            url: URL to re-request from when resuming (None disables resume)
+            head: Bytes already read from the body (see read_head)
+            body: Remaining body iterator when head was read (default: response body)
+            max_bytes: Abort with DownloadTooLarge beyond this size
+            chunk_size: Bytes per read/write
+
+        Returns:
+            Dict with 'path', 'size', 'sha256' and 'resumes'
+        """
+        validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        total = _expected_size(response)
+        if total is not None and total > max_bytes:
+            response.close()
+            raise DownloadTooLarge(f"{total} bytes exceeds limit of {max_bytes}")
+
+        if body is None:
+            body = response.iter_content(chunk_size=chunk_size)
+        chunks = itertools.chain([head], body)
+        hasher = hashlib.sha256()
+        written = 0
+        resumes = 0
+
+        try:
+            with open(dest_path, 'wb') as f:
+                while True:
+                    try:
+                        for chunk in chunks:
+                            if not chunk:
+                                continue
+                            written += len(chunk)
+                            if written > max_bytes:
+                                raise DownloadTooLarge(f"Download exceeds limit of {max_bytes} bytes")
+                            hasher.update(chunk)
+                            f.write(chunk)
+                        break
+                    except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError):
+                        response.close()
+                        if url is None or resumes >= self.max_resumes:
+                            raise
+                        resumes += 1
+
+                        headers = {'Range': f'bytes={written}-'}
+                        if validator:
+                            headers['If-Range'] = validator
+                        response = self.get(url, headers=headers, stream=True)
+                        if response.status_code == 200:
+                            # Server ignored the range (or the file changed) - start over
+                            f.seek(0)
+                            f.truncate()
+                            hasher = hashlib.sha256()
+                            written = 0
+                        elif response.status_code != 206:
+                            raise requests.exceptions.HTTPError(
+                                f"Resume failed with status {response.status_code}", response=response
+                            )
+                        chunks = response.iter_content(chunk_size=chunk_size)
+        except BaseException:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            raise
+        finally:
+            response.close()
+
+        return {"path": dest_path, "size": written, "sha256": hasher.hexdigest(), "resumes": resumes}
+
+    def map_unordered(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        """
+        Run fn over items on the worker pool, yielding (item, result) as each finishes
+
+        Exceptions raised by fn are yielded as the result so one bad file
+        doesn't abort the rest of the batch.
+        """
+        futures = {self.executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result()
+            except Exception as e:
+                yield item, e
+
+    def shutdown(self):
+        """Stop the worker pool and close pooled connections"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        self.session.close()
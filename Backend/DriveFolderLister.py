@@ -0,0 +1,332 @@
+"""
+Folder Listing Engine for Google Drive Integration
+Lists shared Drive folders from their embedded page data without a browser,
+falls back to one long-lived headless browser only when needed, walks subfolders
+concurrently and caches listings with a TTL
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from typing import Any, Callable, Dict, List, Optional
+
+# Listing settings
+FOLDER_LISTING_TTL = 600  # Seconds a cached folder listing stays fresh
+FOLDER_LISTING_WORKERS = 4  # Subfolders listed concurrently
+FOLDER_MAX_DEPTH = 5  # Subfolder recursion limit
+BROWSER_PAGE_WAIT = 3  # Seconds to let Drive's JavaScript render in the fallback browser
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+_ENTRY_SPLIT = re.compile(r'<div class="flip-entry"')
+_ENTRY_ID = re.compile(r'id="entry-([a-zA-Z0-9_-]+)"')
+_ENTRY_TITLE = re.compile(r'<div class="flip-entry-title">(.*?)</div>', re.S)
+_DRIVE_IVD = re.compile(r"window\['_DRIVE_ivd'\]\s*=\s*'((?:[^'\\]|\\.)*)'")
+_FILE_LINK = re.compile(r'/file/d/([a-zA-Z0-9_-]{25,})')
+_FOLDER_LINK = re.compile(r'/drive/folders/([a-zA-Z0-9_-]{25,})')
+
+
+def _js_unescape(literal: str) -> str:
+    """Decode the body of a JavaScript string literal (\\x22, \\u00e9, \\/ ...) leaving other text intact"""
+    # unicode_escape reads its input as Latin-1, so escape non-ASCII characters first;
+    # the UTF-16 round trip joins surrogate pairs written as two \u escapes (emoji)
+    decoded = literal.encode('ascii', 'backslashreplace').decode('unicode_escape')
+    return decoded.encode('utf-16', 'surrogatepass').decode('utf-16', 'replace')
+
+
+def parse_embedded_folder_view(html: str) -> List[Dict[str, str]]:
+    """
+    Parse Drive's lightweight embeddedfolderview page
+
+    Returns:
+        List of item dicts with 'id', 'name' and 'type' ('file' or 'folder')
+    """
+    items = []
+    for block in _ENTRY_SPLIT.split(html)[1:]:
+        id_match = _ENTRY_ID.search(block)
+        if not id_match:
+            continue
+        title_match = _ENTRY_TITLE.search(block)
+        name = unescape(title_match.group(1)).strip() if title_match else ""
+        item_type = 'folder' if '/drive/folders/' in block else 'file'
+        items.append({'id': id_match.group(1), 'name': name, 'type': item_type})
+    return items
+
+
+def parse_drive_ivd(html: str) -> List[Dict[str, str]]:
+    """
+    Parse the folder contents Drive embeds in its folder page as window['_DRIVE_ivd']
+
+    Returns:
+        List of item dicts with 'id', 'name' and 'type' ('file' or 'folder')
+    """
+    match = _DRIVE_IVD.search(html)
+    if not match:
+        return []
+    try:
+        data = json.loads(_js_unescape(match.group(1)))
+    except (ValueError, UnicodeDecodeError):
+        return []
+
+    items = []
+    for entry in (data[0] if data and data[0] else []):
+        if not isinstance(entry, list) or len(entry) < 4:
+            continue
+        item_type = 'folder' if entry[3] == FOLDER_MIME_TYPE else 'file'
+        items.append({'id': entry[0], 'name': entry[2] or "", 'type': item_type})
+    return items
+
+
+class SharedBrowser:
+    """
+    One long-lived headless Chrome reused for every folder that needs JavaScript
+
+    Started lazily on first use and quit at interpreter exit. Page loads are
+    serialized because a WebDriver session is not thread-safe.
+    """
+
+    def __init__(self):
+        self._driver = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        print("Starting shared headless browser for Google Drive folders...")
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')  # Run in background
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+        self._driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        atexit.register(self.quit)
+
+    def get_page_source(self, url: str) -> str:
+        """Load a page and return its HTML after JavaScript has run"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with self._lock:
+            if self._driver is None:
+                self._start()
+            try:
+                self._driver.get(url)
+            except Exception:
+                # Session died (crash, closed window) - restart once and retry
+                self.quit()
+                self._start()
+                self._driver.get(url)
+            try:
+                WebDriverWait(self._driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                time.sleep(BROWSER_PAGE_WAIT)  # Give extra time for JavaScript to load files
+            except Exception:
+                pass
+            return self._driver.page_source
+
+    def quit(self):
+        """Shut the browser down"""
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+
+
+# Process-wide browser, shared by every lister
+shared_browser = SharedBrowser()
+
+
+class DriveFolderLister:
+    """Lists Drive folders (optionally recursively) with a TTL cache"""
+
+    def __init__(
+        self,
+        scheduler,
+        base_url: str,
+        is_valid_file_id: Callable[[str], bool],
+        ttl: float = FOLDER_LISTING_TTL,
+        cache_file: Optional[str] = None,
+        browser: Optional[SharedBrowser] = None
+    ):
+        """
+        Initialize Drive Folder Lister
+
+        Args:
+            scheduler: DownloadScheduler used for HTTP requests
+            base_url: Drive base URL
+            is_valid_file_id: Filter for IDs scraped from raw page HTML
+            ttl: Seconds a cached listing stays fresh
+            cache_file: Optional JSON file to persist listings across restarts
+            browser: Browser used as a last resort (default: the shared browser)
+        """
+        self.scheduler = scheduler
+        self.base_url = base_url
+        self.is_valid_file_id = is_valid_file_id
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self.browser = browser or shared_browser
+        self._listings: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.load_listings()
+
+    def load_listings(self):
+        """Load persisted folder listings"""
+        if not self.cache_file:
+            return
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self._listings = json.load(f)
+        except Exception as e:
+            print(f"Error loading folder listings: {e}")
+            self._listings = {}
+
+    def save_listings(self):
+        """Persist folder listings"""
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self._listings, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error saving folder listings: {e}")
+
+    def invalidate(self, folder_id: Optional[str] = None):
+        """Forget a cached listing (or all listings)"""
+        with self._lock:
+            if folder_id:
+                self._listings.pop(folder_id, None)
+            else:
+                self._listings.clear()
+            self.save_listings()
+
+    def _scrape_links(self, html: str) -> List[Dict[str, str]]:
+        """Last-resort extraction of file/folder links from raw page HTML"""
+        items = []
+        seen = set()
+        for file_id in _FILE_LINK.findall(html):
+            if file_id not in seen and self.is_valid_file_id(file_id):
+                seen.add(file_id)
+                items.append({'id': file_id, 'name': f'file_{file_id}', 'type': 'file'})
+        for folder_id in _FOLDER_LINK.findall(html):
+            if folder_id not in seen and self.is_valid_file_id(folder_id):
+                seen.add(folder_id)
+                items.append({'id': folder_id, 'name': f'folder_{folder_id}', 'type': 'folder'})
+        return items
+
+    def _fetch_listing(self, folder_id: str) -> List[Dict[str, str]]:
+        """List one folder level, cheapest method first"""
+        # Method 1: embedded folder view (small static HTML with every entry)
+        try:
+            response = self.scheduler.get(f"{self.base_url}/embeddedfolderview?id={folder_id}")
+            if response.status_code == 200:
+                items = parse_embedded_folder_view(response.text)
+                if items:
+                    return items
+        except Exception as e:
+            print(f"Embedded folder view failed for {folder_id}: {e}")
+
+        # Method 2: data embedded in the regular folder page
+        folder_url = f"{self.base_url}/drive/folders/{folder_id}?usp=sharing"
+        try:
+            response = self.scheduler.get(folder_url)
+            if response.status_code == 200:
+                items = parse_drive_ivd(response.text) or self._scrape_links(response.text)
+                items = [item for item in items if item['id'] != folder_id]
+                if items:
+                    return items
+        except Exception as e:
+            print(f"Folder page parsing failed for {folder_id}: {e}")
+
+        # Method 3: render with the shared browser (only when the page needs JavaScript)
+        try:
+            page_source = self.browser.get_page_source(folder_url)
+            items = parse_drive_ivd(page_source) or self._scrape_links(page_source)
+            return [item for item in items if item['id'] != folder_id]
+        except Exception as e:
+            print(f"Browser folder listing failed for {folder_id}: {e}")
+            return []
+
+    def list_folder(self, folder_id: str, use_cache: bool = True) -> List[Dict[str, str]]:
+        """
+        List the direct children of a folder, served from the TTL cache when fresh
+
+        Args:
+            folder_id: Google Drive folder ID
+            use_cache: Set False to force a fresh listing
+
+        Returns:
+            List of item dicts with 'id', 'name' and 'type' ('file' or 'folder')
+        """
+        now = time.time()
+        if use_cache:
+            with self._lock:
+                cached = self._listings.get(folder_id)
+                if cached and now - cached["fetched_at"] < self.ttl:
+                    return list(cached["items"])
+
+        items = self._fetch_listing(folder_id)
+        if items:
+            with self._lock:
+                self._listings[folder_id] = {"fetched_at": now, "items": items}
+                self.save_listings()
+        return items
+
+    def list_files(
+        self,
+        folder_id: str,
+        recursive: bool = True,
+        max_depth: int = FOLDER_MAX_DEPTH,
+        use_cache: bool = True
+    ) -> List[Dict[str, str]]:
+        """
+        List every file in a folder, walking subfolders concurrently
+
+        Args:
+            folder_id: Google Drive folder ID
+            recursive: Descend into subfolders
+            max_depth: Maximum subfolder depth
+            use_cache: Set False to force fresh listings
+
+        Returns:
+            List of file info dicts with 'id', 'name' and 'folder' (path within the shared folder)
+        """
+        files: List[Dict[str, str]] = []
+        seen = {folder_id}
+        level = [(folder_id, "")]
+        depth = 0
+
+        with ThreadPoolExecutor(max_workers=FOLDER_LISTING_WORKERS, thread_name_prefix="drive-listing") as executor:
+            while level:
+                listings = executor.map(lambda folder: self.list_folder(folder[0], use_cache), level)
+                next_level = []
+                for (_, path), items in zip(level, listings):
+                    for item in items:
+                        if item['id'] in seen:
+                            continue
+                        seen.add(item['id'])
+                        name = re.sub(r'[<>:"/\\|?*]', '_', item['name'])[:100]
+                        if not name.strip('. '):  # Empty, "." or ".." would escape the download directory
+                            name = f"{item['type']}_{item['id']}"
+                        if item['type'] == 'folder':
+                            if recursive and depth < max_depth:
+                                next_level.append((item['id'], f"{path}{name}/"))
+                        else:
+                            files.append({'id': item['id'], 'name': name, 'folder': path})
+                level = next_level
+                depth += 1
+
+        return files
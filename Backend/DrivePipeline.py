@@ -0,0 +1,274 @@
+"""
+Staged Ingestion Pipeline for Google Drive Folders
+Overlaps downloading, text extraction and embedding/indexing with bounded queues
+between the stages, so the slowest stage sets the pace instead of the sum of all stages
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from Backend.DocumentProcessor import extract_document
+from Backend.SalesMemory import learn_from_docs_batch
+
+# Defaults
+DEFAULT_EXTRACT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 8  # Items buffered between stages before upstream blocks (backpressure)
+DEFAULT_EMBED_BATCH_SIZE = 32  # Chunks per embedding/indexing batch
+DEFAULT_EMBED_FLUSH_SECONDS = 0.5  # Flush a partial batch if nothing new arrives for this long
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+
+class StageStats:
+    """Thread-safe throughput counters for one pipeline stage"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0  # Time spent doing work (summed over workers)
+        self.blocked_seconds = 0.0  # Time spent waiting on a full downstream queue
+        self._lock = threading.Lock()
+
+    def record(self, busy: float, blocked: float = 0.0, ok: bool = True):
+        """Record one finished item"""
+        with self._lock:
+            self.items += 1
+            if not ok:
+                self.errors += 1
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        """Counters plus derived throughput and utilization for reporting"""
+        with self._lock:
+            capacity = elapsed * self.workers
+            return {
+                "workers": self.workers,
+                "items": self.items,
+                "errors": self.errors,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "blocked_seconds": round(self.blocked_seconds, 3),
+                "items_per_second": round(self.items / elapsed, 3) if elapsed > 0 else 0.0,
+                "utilization": round(self.busy_seconds / capacity, 3) if capacity > 0 else 0.0
+            }
+
+
+def _timed_put(q: queue.Queue, item: Any) -> float:
+    """Put into a bounded queue, returning how long we were blocked by backpressure"""
+    start = time.perf_counter()
+    q.put(item)
+    return time.perf_counter() - start
+
+
+class DrivePipeline:
+    """
+    Download -> extract -> embed/index pipeline for a list of Drive files
+
+    Download workers fetch files through the processor's pooled scheduler,
+    extraction workers turn files into knowledge chunks, and a single indexer
+    embeds and stores chunks in batches. Bounded queues between the stages
+    block upstream workers when a downstream stage falls behind.
+    """
+
+    def __init__(
+        self,
+        processor,
+        source_name: str,
+        download_workers: Optional[int] = None,
+        extract_workers: int = DEFAULT_EXTRACT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+        embed_flush_seconds: float = DEFAULT_EMBED_FLUSH_SECONDS
+    ):
+        """
+        Initialize Drive Pipeline
+
+        Args:
+            processor: DriveProcessor used for downloads
+            source_name: Source name prefix for stored knowledge
+            download_workers: Concurrent downloads (default: the scheduler's worker count)
+            extract_workers: Concurrent extraction workers
+            queue_size: Capacity of each inter-stage queue
+            embed_batch_size: Chunks per embedding batch
+            embed_flush_seconds: Idle time after which a partial batch is flushed
+        """
+        self.processor = processor
+        self.source_name = source_name
+        self.download_workers = download_workers or processor.scheduler.max_workers
+        self.extract_workers = extract_workers
+        self.embed_batch_size = embed_batch_size
+        self.embed_flush_seconds = embed_flush_seconds
+
+        self._todo: "queue.Queue[Any]" = queue.Queue()
+        self._downloaded: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._extracted: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+
+        self.stats = {
+            "download": StageStats("download", self.download_workers),
+            "extract": StageStats("extract", self.extract_workers),
+            "index": StageStats("index", 1)
+        }
+
+        self._lock = threading.Lock()
+        self._processed_files: List[str] = []
+        self._manifest: List[Dict[str, Any]] = []
+        self._errors: List[str] = []
+        self._entries_created = 0
+
+    def _error(self, message: str):
+        with self._lock:
+            self._errors.append(message)
+
+    def _download_worker(self):
+        """Stage 1: download files and hand them to extraction"""
+        while True:
+            try:
+                file_info = self._todo.get_nowait()
+            except queue.Empty:
+                return
+
+            start = time.perf_counter()
+            try:
+                download = self.processor.download_file_info(file_info['id'], file_info.get('name'), file_info.get('folder', ''))
+                busy = time.perf_counter() - start
+
+                if download and os.path.exists(download["path"]):
+                    blocked = _timed_put(self._downloaded, download)
+                    self.stats["download"].record(busy, blocked)
+                else:
+                    self._error(f"Failed to download file {file_info['id']}")
+                    self.stats["download"].record(busy, ok=False)
+            except Exception as e:
+                # One bad file must not kill the stage (the queues would never drain)
+                self._error(f"Error downloading file {file_info.get('id')}: {e}")
+                self.stats["download"].record(time.perf_counter() - start, ok=False)
+
+    def _extract_worker(self):
+        """Stage 2: extract knowledge chunks from downloaded files"""
+        while True:
+            download = self._downloaded.get()
+            if download is _DONE:
+                return
+
+            filename = download.get("name")
+            start = time.perf_counter()
+            try:
+                result = extract_document(download["path"], f"{self.source_name}_{filename}")
+                busy = time.perf_counter() - start
+
+                chunks = result.get("chunks") or []
+                if result.get("success") and chunks:
+                    blocked = _timed_put(self._extracted, (download, chunks))
+                    self.stats["extract"].record(busy, blocked)
+                else:
+                    # A file that yields no chunks adds nothing to the knowledge store
+                    self._error(f"Failed to process {filename}: {result.get('error') or 'no text extracted'}")
+                    self.stats["extract"].record(busy, ok=False)
+            except Exception as e:
+                self._error(f"Failed to process {filename}: {e}")
+                self.stats["extract"].record(time.perf_counter() - start, ok=False)
+
+    def _flush(self, pending: List[Dict[str, Any]], files: List[Dict[str, Any]]):
+        """Embed and store one batch of chunks"""
+        start = time.perf_counter()
+        ok = True
+        try:
+            entry_ids = learn_from_docs_batch(pending) if pending else []
+        except Exception as e:
+            entry_ids = []
+            ok = False
+            self._error(f"Error indexing batch of {len(pending)} chunks: {e}")
+
+        with self._lock:
+            self._entries_created += len(entry_ids)
+            if ok:
+                for download in files:
+                    self._processed_files.append(download["name"])
+                    self._manifest.append(download)
+        self.stats["index"].record(time.perf_counter() - start, ok=ok)
+
+    def _index_worker(self):
+        """Stage 3: batch extracted chunks into embedding/indexing calls"""
+        pending: List[Dict[str, Any]] = []
+        files: List[Dict[str, Any]] = []
+        while True:
+            try:
+                item = self._extracted.get(timeout=self.embed_flush_seconds)
+            except queue.Empty:
+                if pending or files:
+                    self._flush(pending, files)
+                    pending, files = [], []
+                continue
+
+            if item is _DONE:
+                if pending or files:
+                    self._flush(pending, files)
+                return
+
+            try:
+                download, chunks = item
+                pending.extend(chunks)
+                files.append(download)
+                if len(pending) >= self.embed_batch_size:
+                    self._flush(pending, files)
+                    pending, files = [], []
+            except Exception as e:
+                self._error(f"Error indexing extracted chunks: {e}")
+                pending, files = [], []
+
+    def run(self, files: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Run all stages over the given files and wait for them to finish
+
+        Args:
+            files: List of file info dicts with 'id' and optional 'name' and 'folder'
+
+        Returns:
+            Dictionary with 'files_processed', 'entries_created', 'processed_files',
+            'manifest', 'errors' and per-stage 'pipeline_stats'
+        """
+        for file_info in files:
+            self._todo.put(file_info)
+
+        start = time.perf_counter()
+        downloaders = [threading.Thread(target=self._download_worker, daemon=True, name=f"drive-pipeline-download-{i}")
+                       for i in range(min(self.download_workers, max(len(files), 1)))]
+        extractors = [threading.Thread(target=self._extract_worker, daemon=True, name=f"drive-pipeline-extract-{i}")
+                      for i in range(self.extract_workers)]
+        indexer = threading.Thread(target=self._index_worker, daemon=True, name="drive-pipeline-index")
+
+        for thread in downloaders + extractors + [indexer]:
+            thread.start()
+
+        # Shut the stages down in order once each upstream stage has drained
+        for thread in downloaders:
+            thread.join()
+        for _ in extractors:
+            self._downloaded.put(_DONE)
+        for thread in extractors:
+            thread.join()
+        self._extracted.put(_DONE)
+        indexer.join()
+
+        elapsed = time.perf_counter() - start
+        pipeline_stats = {name: stage.snapshot(elapsed) for name, stage in self.stats.items()}
+        pipeline_stats["elapsed_seconds"] = round(elapsed, 3)
+        # The stage with the highest utilization is the one setting the pace
+        pipeline_stats["bottleneck"] = max(self.stats, key=lambda name: pipeline_stats[name]["utilization"])
+
+        print(f"Drive pipeline: {len(self._processed_files)}/{len(files)} files in {elapsed:.1f}s "
+              f"(bottleneck: {pipeline_stats['bottleneck']})")
+
+        return {
+            "files_processed": len(self._processed_files),
+            "entries_created": self._entries_created,
+            "processed_files": list(self._processed_files),
+            "manifest": list(self._manifest),
+            "errors": list(self._errors),
+            "pipeline_stats": pipeline_stats
+        }
@@ -7,19 +7,12 @@ import os
 import re
 import requests
 import tempfile
+import threading
 from typing import List, Dict, Any, Optional
 from urllib.parse import urlparse, parse_qs
 import json
 from datetime import datetime
 
-# Try to import BeautifulSoup
-try:
-    from bs4 import BeautifulSoup
-    BS4_AVAILABLE = True
-except ImportError:
-    BS4_AVAILABLE = False
-    print("Warning: BeautifulSoup4 not available. Install with: pip install beautifulsoup4")
-
 # Try to import gdown (better for Google Drive downloads)
 try:
     import gdown
@@ -29,22 +22,58 @@ except ImportError:
 
 from Backend.DocumentProcessor import process_document
 from Backend.SalesMemory import sales_memory_manager
+from Backend.DrivePipeline import DrivePipeline
+from Backend.DriveCache import DriveCache, validator_from_headers
+from Backend.DriveFolderLister import DriveFolderLister
+from Backend.DriveDownloader import (
+    DownloadScheduler, DownloadTooLarge, read_head,
+    DEFAULT_MAX_WORKERS, DEFAULT_MAX_DOWNLOAD_BYTES
+)
+
+# Base URL for Drive requests (overridable so downloads can run against a local stand-in server)
+DRIVE_BASE_URL = "https://drive.google.com"
 
 class DriveProcessor:
     """Process Google Drive links and download files"""
     
-    def __init__(self, download_dir: Optional[str] = None):
+    def __init__(
+        self,
+        download_dir: Optional[str] = None,
+        base_url: str = DRIVE_BASE_URL,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        scheduler: Optional[DownloadScheduler] = None,
+        max_download_bytes: int = DEFAULT_MAX_DOWNLOAD_BYTES,
+        cache: Optional[DriveCache] = None,
+        use_cache: bool = True
+    ):
         """
         Initialize Drive Processor
         
         Args:
             download_dir: Directory to download files to (default: temp directory)
+            base_url: Drive base URL (point at a local HTTP server for testing)
+            max_workers: Number of concurrent downloads for folders
+            scheduler: Optional shared download scheduler (default: a new pooled one)
+            max_download_bytes: Files larger than this are skipped
+            cache: Optional shared download cache (default: DriveCache in Data/drive_cache)
+            use_cache: Set False to always download (no local cache)
         """
         if download_dir:
             self.download_dir = download_dir
         else:
             self.download_dir = os.path.join(tempfile.gettempdir(), "jarvis_drive_downloads")
         
+        self.base_url = base_url.rstrip('/')
+        self.scheduler = scheduler or DownloadScheduler(max_workers=max_workers)
+        self.max_download_bytes = max_download_bytes
+        self.cache = cache if cache is not None else (DriveCache() if use_cache else None)
+        self.folder_lister = DriveFolderLister(
+            self.scheduler,
+            self.base_url,
+            self._is_valid_file_id,
+            cache_file=os.path.join(self.cache.cache_dir, "folder_listings.json") if self.cache else None
+        )
+        
         os.makedirs(self.download_dir, exist_ok=True)
     
     def extract_drive_id(self, drive_link: str) -> Optional[Dict[str, str]]:
@@ -99,27 +128,78 @@ class DriveProcessor:
         Returns:
             Path to downloaded file, or None if failed
         """
+        info = self.download_file_info(file_id, filename)
+        return info["path"] if info else None
+    
+    def download_file_info(self, file_id: str, filename: Optional[str] = None, folder: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Download a file from Google Drive, streaming it to disk in fixed-size chunks
+        
+        Only the first few KB are inspected (virus-scan warning page, magic bytes);
+        the body is never buffered in memory. Dropped connections resume with HTTP
+        Range requests, and the SHA-256 is computed while writing.
+        
+        Args:
+            file_id: Google Drive file ID
+            filename: Optional filename (if not provided, will try to detect)
+            folder: Path of the file's subfolder within a shared folder ("Reports/Q1/"),
+                kept so same-named files from different subfolders don't collide
+            
+        Returns:
+            Manifest dict with 'id', 'name' (relative to the shared folder), 'path', 'size', 'sha256' and
+            'content_type', or None if failed
+        """
         try:
             # Direct download URL format
-            download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-            
-            # First, try to get the file info
-            response = requests.get(download_url, allow_redirects=True, stream=True, timeout=30)
+            download_url = f"{self.base_url}/uc?export=download&id={file_id}"
+            
+            # Revalidate a cached copy with its ETag so unchanged files aren't re-sent
+            cached = self.cache.lookup(file_id) if self.cache else None
+            headers = {}
+            if cached and cached.get("etag"):
+                headers['If-None-Match'] = cached["etag"]
+            
+            # First, try to get the file info (pooled session, rate-limited, retried)
+            response = self.scheduler.get(download_url, allow_redirects=True, stream=True, headers=headers)
+            if response.status_code == 304 and cached:
+                response.close()
+                hit = self.cache.get(file_id, cached["validator"])
+                if hit:
+                    print(f"Served from Drive cache: {hit['name']}")
+                    return hit
+                response = self.scheduler.get(download_url, allow_redirects=True, stream=True)
+            content_type = response.headers.get('Content-Type', '').lower()
             
-            # Check for virus scan warning
-            if 'virus scan warning' in response.text.lower() or 'download_warning' in response.url:
-                # Extract the confirm token
-                confirm_match = re.search(r'confirm=([a-zA-Z0-9_-]+)', response.url)
+            # Sniff only the first few KB to check for the virus scan warning page
+            head, body = read_head(response)
+            if 'download_warning' in response.url or (
+                'text/html' in content_type and b'virus scan warning' in head.lower()
+            ):
+                # Extract the confirm token (from the redirect URL or the warning page)
+                confirm_match = re.search(r'confirm=([a-zA-Z0-9_-]+)', response.url) or \
+                    re.search(rb'confirm=([a-zA-Z0-9_-]+)', head)
                 if confirm_match:
                     confirm_token = confirm_match.group(1)
-                    download_url = f"https://drive.google.com/uc?export=download&id={file_id}&confirm={confirm_token}"
-                    response = requests.get(download_url, stream=True, timeout=30)
+                    if isinstance(confirm_token, bytes):
+                        confirm_token = confirm_token.decode('ascii')
+                    download_url = f"{self.base_url}/uc?export=download&id={file_id}&confirm={confirm_token}"
+                    response.close()
+                    response = self.scheduler.get(download_url, stream=True)
+                    content_type = response.headers.get('Content-Type', '').lower()
+                    head, body = read_head(response)
             
             if response.status_code != 200:
+                response.close()
                 return None  # Don't print error for invalid files
             
-            # Get MIME type from Content-Type header
-            content_type = response.headers.get('Content-Type', '').lower()
+            # Serve unchanged revisions from the local cache instead of re-downloading
+            validator = validator_from_headers(response.headers)
+            if self.cache and validator:
+                hit = self.cache.get(file_id, validator)
+                if hit:
+                    response.close()
+                    print(f"Served from Drive cache: {hit['name']}")
+                    return hit
             
             # Try to get filename from Content-Disposition header
             if not filename:
@@ -133,7 +213,7 @@ class DriveProcessor:
             # Clean filename
             filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
             
-            # If no extension, try to add one based on MIME type
+            # If no extension, try to add one based on MIME type, then on the sniffed bytes
             if not os.path.splitext(filename)[1]:
                 mime_to_ext = {
                     'application/pdf': '.pdf',
@@ -150,166 +230,97 @@ class DriveProcessor:
                     'application/xml': '.xml',
                     'text/xml': '.xml'
                 }
-                if content_type in mime_to_ext:
-                    filename += mime_to_ext[content_type]
+                mime_type = content_type.split(';')[0].strip()
+                if mime_type in mime_to_ext:
+                    filename += mime_to_ext[mime_type]
+                else:
+                    filename += self._detect_extension(head)
             
-            # Download to temp file first (so we can detect type)
+            # Stream to a temp file first, then move into place once complete
             temp_file_path = os.path.join(self.download_dir, f"temp_{file_id}")
+            result = self.scheduler.stream_to_file(
+                response,
+                temp_file_path,
+                url=download_url,
+                head=head,
+                body=body,
+                max_bytes=self.max_download_bytes
+            )
+            
+            download = {
+                "id": file_id,
+                "name": f"{folder}{filename}",
+                "size": result["size"],
+                "sha256": result["sha256"],
+                "content_type": content_type
+            }
             
-            # Download the file
-            with open(temp_file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            # If no extension, detect from file content
-            if not os.path.splitext(filename)[1]:
-                try:
-                    with open(temp_file_path, 'rb') as f:
-                        first_bytes = f.read(4)
-                        if first_bytes.startswith(b'%PDF'):
-                            filename += '.pdf'
-                        elif first_bytes.startswith(b'PK\x03\x04'):
-                            # Check if it's docx or xlsx
-                            f.seek(0)
-                            content = f.read(1024)
-                            if b'word/' in content:
-                                filename += '.docx'
-                            elif b'xl/' in content or b'worksheets/' in content:
-                                filename += '.xlsx'
-                            else:
-                                filename += '.zip'
-                        else:
-                            # Try as text
-                            try:
-                                with open(temp_file_path, 'r', encoding='utf-8') as tf:
-                                    tf.read(100)
-                                filename += '.txt'
-                            except:
-                                pass
-                except:
-                    pass
-            
-            # Final file path
-            file_path = os.path.join(self.download_dir, filename)
-            
-            # Rename temp file to final name
-            if os.path.exists(file_path):
-                os.remove(file_path)  # Remove if exists
-            os.rename(temp_file_path, file_path)
-            
-            print(f"Downloaded: {filename} to {file_path}")
-            return file_path
-            
+            if self.cache and validator:
+                # Move into the content-addressed cache so the next run can reuse it
+                download = self.cache.put(file_id, validator, temp_file_path, download, etag=response.headers.get('ETag'))
+                download["cached"] = False
+            else:
+                # Final file path
+                download["path"] = os.path.join(self.download_dir, folder, filename)
+                os.makedirs(os.path.dirname(download["path"]), exist_ok=True)
+                os.replace(temp_file_path, download["path"])
+            
+            print(f"Downloaded: {download['name']} to {download['path']}")
+            return download
+        
+        except DownloadTooLarge as e:
+            print(f"Skipped Drive file {file_id}: {e}")
+            return None
         except Exception as e:
             return None  # Don't print error for invalid files
     
-    def list_folder_files(self, folder_id: str) -> List[Dict[str, str]]:
+    def _detect_extension(self, head: bytes) -> str:
         """
-        List all files in a Google Drive folder
-        
-        Uses Selenium to load the page with JavaScript execution since Google Drive
-        loads files dynamically. Falls back to HTML parsing if Selenium is unavailable.
+        Guess a file extension from the first bytes of its content
         
         Args:
-            folder_id: Google Drive folder ID
+            head: Leading bytes of the file
             
         Returns:
-            List of file info dicts with 'id' and 'name'
+            Extension including the dot, or '' if unknown
         """
-        files = []
-        folder_url = f"https://drive.google.com/drive/folders/{folder_id}?usp=sharing"
-        
-        # Method 1: Try using Selenium to load page with JavaScript
+        if head.startswith(b'%PDF'):
+            return '.pdf'
+        if head.startswith(b'PK\x03\x04'):
+            # Check if it's docx or xlsx
+            content = head[:1024]
+            if b'word/' in content:
+                return '.docx'
+            if b'xl/' in content or b'worksheets/' in content:
+                return '.xlsx'
+            return '.zip'
+        # Try as text (a multi-byte character may be cut off at the end of the head)
         try:
-            from selenium import webdriver
-            from selenium.webdriver.chrome.service import Service
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            from webdriver_manager.chrome import ChromeDriverManager
-            
-            print("Using Selenium to load Google Drive folder...")
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')  # Run in background
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-            driver.get(folder_url)
-            
-            # Wait for page to load (Google Drive takes time to render)
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                import time
-                time.sleep(3)  # Give extra time for JavaScript to load files
-            except:
-                pass
-            
-            # Get page source after JavaScript execution
-            page_source = driver.page_source
-            driver.quit()
-            
-            # Extract file IDs from the rendered page
-            if BS4_AVAILABLE:
-                soup = BeautifulSoup(page_source, 'html.parser')
-                # Look for file links
-                file_links = soup.find_all('a', href=re.compile(r'/file/d/([a-zA-Z0-9_-]+)'))
-                for link in file_links:
-                    href = link.get('href', '')
-                    file_id_match = re.search(r'/file/d/([a-zA-Z0-9_-]{25,})', href)
-                    if file_id_match:
-                        file_id = file_id_match.group(1)
-                        filename = link.get_text(strip=True) or link.get('title', '') or f'file_{file_id}'
-                        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-                        if file_id not in [f['id'] for f in files]:
-                            files.append({'id': file_id, 'name': filename[:100]})
-            
-            # Also extract from page source directly
-            file_ids = re.findall(r'/file/d/([a-zA-Z0-9_-]{25,})', page_source)
-            for file_id in set(file_ids):
-                # Filter out invalid IDs (API keys, folder IDs, etc.)
-                if self._is_valid_file_id(file_id) and file_id not in [f['id'] for f in files]:
-                    files.append({'id': file_id, 'name': f'file_{file_id}'})
-            
-            print(f"Found {len(files)} files using Selenium")
-            if files:
-                return files
-                
-        except Exception as e:
-            print(f"Selenium method failed: {e}")
-            # Continue to fallback methods
+            head[:100].decode('utf-8')
+            return '.txt'
+        except UnicodeDecodeError as e:
+            if e.start >= min(len(head), 100) - 3:
+                return '.txt'
+        return ''
+    
+    def list_folder_files(self, folder_id: str, recursive: bool = True, use_cache: bool = True) -> List[Dict[str, str]]:
+        """
+        List all files in a Google Drive folder
         
-        # Method 2: Try HTML parsing (may not work for JS-loaded content)
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            }
-            response = requests.get(folder_url, headers=headers, timeout=30)
-            
-            if response.status_code == 200:
-                # Extract all file IDs from the HTML (even if not fully rendered)
-                # Only look for /file/d/ pattern to avoid false positives
-                file_ids = re.findall(r'/file/d/([a-zA-Z0-9_-]{25,})', response.text)
-                
-                for file_id in set(file_ids):
-                    # Filter out invalid IDs
-                    if self._is_valid_file_id(file_id) and file_id not in [f['id'] for f in files]:
-                        files.append({'id': file_id, 'name': f'file_{file_id}'})
-                
-                print(f"Found {len(files)} files using HTML parsing")
-                
-        except Exception as e:
-            print(f"HTML parsing method failed: {e}")
-            import traceback
-            traceback.print_exc()
+        Parses the folder's embedded page data over plain HTTP, falling back to a
+        shared long-lived headless browser only when the page needs JavaScript.
+        Subfolders are listed concurrently and listings are cached with a TTL.
         
+        Args:
+            folder_id: Google Drive folder ID
+            recursive: Include files from subfolders
+            use_cache: Set False to bypass cached listings
+            
+        Returns:
+            List of file info dicts with 'id', 'name' and 'folder'
+        """
+        files = self.folder_lister.list_files(folder_id, recursive=recursive, use_cache=use_cache)
+        print(f"Found {len(files)} files in Drive folder {folder_id}")
         return files
     
     def _is_valid_file_id(self, file_id: str) -> bool:
@@ -398,21 +409,25 @@ class DriveProcessor:
             total_files = 0
             total_entries = 0
             processed_files = []
+            manifest = []  # One entry per downloaded file (name, size, sha256)
             errors = []
+            pipeline_stats = None
             
             if link_type == 'file':
                 # Process single file
                 print(f"Processing single file: {file_id}")
-                file_path = self.download_file(file_id)
+                download = self.download_file_info(file_id)
+                file_path = download["path"] if download else None
                 
                 if file_path and os.path.exists(file_path):
+                    manifest.append(download)
                     result = process_document(file_path, source_name)
                     if result.get('success'):
                         total_files = 1
                         total_entries = result.get('entries_created', 0)
-                        processed_files.append(os.path.basename(file_path))
+                        processed_files.append(download["name"])
                     else:
-                        errors.append(f"Failed to process {os.path.basename(file_path)}: {result.get('error')}")
+                        errors.append(f"Failed to process {download['name']}: {result.get('error')}")
                 else:
                     errors.append(f"Failed to download file {file_id}")
             
@@ -424,7 +439,7 @@ class DriveProcessor:
                 if GDOWN_AVAILABLE:
                     try:
                         print("Trying gdown to download folder...")
-                        folder_url = f"https://drive.google.com/drive/folders/{file_id}?usp=sharing"
+                        folder_url = f"{self.base_url}/drive/folders/{file_id}?usp=sharing"
                         # gdown can download entire folders (but has 50 file limit)
                         try:
                             gdown.download_folder(folder_url, output=self.download_dir, quiet=False, use_cookies=False)
@@ -473,14 +488,11 @@ class DriveProcessor:
                     print("Trying alternative method to access folder...")
                     try:
                         # Try accessing the folder page with different parameters
-                        folder_url = f"https://drive.google.com/drive/folders/{file_id}?usp=sharing"
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                        }
-                        response = requests.get(folder_url, headers=headers, timeout=30)
+                        folder_url = f"{self.base_url}/drive/folders/{file_id}?usp=sharing"
+                        response = self.scheduler.get(folder_url)
                         if response.status_code == 200:
-                            # Try parsing again with the sharing URL
-                            files = self.list_folder_files(file_id)
+                            # Try parsing again, bypassing any cached listing
+                            files = self.list_folder_files(file_id, use_cache=False)
                     except:
                         pass
                     
@@ -506,21 +518,14 @@ class DriveProcessor:
                                 "suggestion": "Please ensure the folder is shared with 'Anyone with the link can view' permission, or install gdown: pip install gdown"
                             }
                 
-                # Download and process each file
-                for file_info in files:
-                    file_id = file_info['id']
-                    file_path = self.download_file(file_id, file_info.get('name'))
-                    
-                    if file_path and os.path.exists(file_path):
-                        result = process_document(file_path, f"{source_name}_{os.path.basename(file_path)}")
-                        if result.get('success'):
-                            total_files += 1
-                            total_entries += result.get('entries_created', 0)
-                            processed_files.append(os.path.basename(file_path))
-                        else:
-                            errors.append(f"Failed to process {os.path.basename(file_path)}: {result.get('error')}")
-                    else:
-                        errors.append(f"Failed to download file {file_id}")
+                # Download, extract and embed in overlapping stages
+                pipeline_result = DrivePipeline(self, source_name).run(files)
+                total_files += pipeline_result["files_processed"]
+                total_entries += pipeline_result["entries_created"]
+                processed_files.extend(pipeline_result["processed_files"])
+                manifest.extend(pipeline_result["manifest"])
+                errors.extend(pipeline_result["errors"])
+                pipeline_stats = pipeline_result["pipeline_stats"]
             
             # Clean up downloaded files (optional - can keep for caching)
             # self.cleanup_downloads()
@@ -531,7 +536,9 @@ class DriveProcessor:
                 "files_processed": total_files,
                 "entries_created": total_entries,
                 "processed_files": processed_files,
-                "errors": errors if errors else None
+                "manifest": manifest,
+                "errors": errors if errors else None,
+                "pipeline_stats": pipeline_stats
             }
         except Exception as e:
             import traceback
@@ -557,8 +564,17 @@ class DriveProcessor:
             print(f"Error cleaning up downloads: {e}")
 
 
-# Global instance
-drive_processor = DriveProcessor()
+# Global instance (created on first use so importing this module touches no files)
+_drive_processor = None
+_drive_processor_lock = threading.Lock()
+
+def get_drive_processor() -> DriveProcessor:
+    """Shared DriveProcessor (its download cache lives in Data/drive_cache)"""
+    global _drive_processor
+    with _drive_processor_lock:
+        if _drive_processor is None:
+            _drive_processor = DriveProcessor()
+        return _drive_processor
 
 def extract_drive_id(drive_link: str) -> Optional[Dict[str, str]]:
     """
@@ -570,7 +586,7 @@ def extract_drive_id(drive_link: str) -> Optional[Dict[str, str]]:
     Returns:
         Dict with 'id' and 'type' ('file' or 'folder'), or None if invalid
     """
-    return drive_processor.extract_drive_id(drive_link)
+    return get_drive_processor().extract_drive_id(drive_link)
 
 def process_drive_link(drive_link: str, source_name: Optional[str] = None) -> Dict[str, Any]:
     """
@@ -583,6 +599,6 @@ def process_drive_link(drive_link: str, source_name: Optional[str] = None) -> Di
     Returns:
         Processing results dictionary
     """
-    return drive_processor.process_drive_link(drive_link, source_name)
+    return get_drive_processor().process_drive_link(drive_link, source_name)
 
 
@@ -0,0 +1,292 @@
+"""
+Intent Classifier for JARVIS
+Offline fast path in front of the FirstLayerDMM LLM call. Unambiguous commands
+("open chrome", "play X on spotify", "mute") are matched by rules, and
+general/realtime questions by a small TF-IDF nearest-centroid model trained on
+the DMM few-shot examples plus the decisions the LLM made before (logged to
+Data/DecisionLog.jsonl). Task-like prompts train an "other" class so they are
+not forced into general/realtime. Both return the DMM output format; anything
+ambiguous returns None so the LLM decides.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DECISION_LOG_FILE = "Data/DecisionLog.jsonl"
+DECISION_LOG_MAX_ENTRIES = 5000  # Most recent logged decisions used for training
+RETRAIN_EVERY = 25  # New logged decisions before the model is refit
+MIN_CLASS_EXAMPLES = 5  # A label needs this many examples before the model may predict it
+MIN_SIMILARITY = 0.35  # Cosine similarity to the winning centroid
+MIN_MARGIN = 0.15  # Lead over the runner-up centroid
+MODEL_LABELS = ("general", "realtime")  # Labels whose DMM output is just "<label> <prompt>"
+OTHER_LABEL = "other"  # Every other decision (tasks, multi-task); when it wins the LLM decides
+STATS_REPORT_EVERY = 20  # Decisions between hit-rate log lines
+
+_WORD = re.compile(r"[a-z0-9']+")
+_FILLER = re.compile(r"^(?:(?:hey|ok|okay|hi)\s+)?(?:jarvis[,\s]+)?(?:please\s+|can you\s+|could you\s+)?")
+_TRAILING = re.compile(r"[\s.!?]+$")
+_LIST_SPLIT = re.compile(r"\s*(?:,\s*(?:and\s+)?|\s+and\s+)\s*")
+# Words that mean an "open X and ..." request carries a second, different task
+_COMPOUND_WORDS = {"tell", "play", "close", "open", "search", "write", "what", "who", "how", "why",
+                   "when", "where", "remind", "generate", "send", "then", "also", "mute", "unmute"}
+
+_SYSTEM_COMMANDS = {
+    "mute": "mute", "unmute": "unmute",
+    "volume up": "volume up", "increase volume": "volume up", "increase the volume": "volume up",
+    "turn up the volume": "volume up", "volume down": "volume down", "decrease volume": "volume down",
+    "decrease the volume": "volume down", "turn down the volume": "volume down",
+}
+_EXIT_PHRASES = {"bye", "goodbye", "good bye", "bye bye", "exit", "quit", "see you", "see you later",
+                 "bye jarvis", "goodbye jarvis"}
+
+
+def _tokens(text: str) -> List[str]:
+    words = _WORD.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _clean(prompt: str) -> str:
+    text = _TRAILING.sub("", prompt.strip().lower())
+    return _FILLER.sub("", text, count=1).strip()
+
+
+def _targets(text: str) -> Optional[List[str]]:
+    """Split 'chrome, firefox and notepad'; None if it looks like more than a list of names"""
+    items = [item.strip() for item in _LIST_SPLIT.split(text) if item.strip()]
+    if not items or any(len(item.split()) > 4 or set(item.split()) & _COMPOUND_WORDS for item in items):
+        return None
+    return items
+
+
+def match_rules(prompt: str) -> Optional[List[str]]:
+    """DMM decision for an unambiguous command, or None"""
+    text = _clean(prompt)
+    if not text:
+        return None
+    if text in _EXIT_PHRASES:
+        return ["exit"]
+    if text in _SYSTEM_COMMANDS:
+        return [f"system {_SYSTEM_COMMANDS[text]}"]
+
+    for verb in ("open", "close"):
+        if text.startswith(f"{verb} "):
+            items = _targets(text[len(verb) + 1:])
+            return [f"{verb} {item}" for item in items] if items else None
+
+    match = re.fullmatch(r"play (.+?) on spotify|play spotify (.+)", text)
+    if match:
+        name = (match.group(1) or match.group(2)).strip()
+        return [f"play spotify {name}"] if name and not set(name.split()) & _COMPOUND_WORDS else None
+    match = re.fullmatch(r"play (.+?)(?: on youtube)?", text)
+    if match:
+        name = match.group(1).strip()
+        return [f"play {name}"] if not set(name.split()) & _COMPOUND_WORDS else None
+
+    match = re.fullmatch(r"(?:search (?:for )?(.+?) on youtube|search youtube for (.+)|youtube search (.+))", text)
+    if match:
+        return [f"youtube search {next(g for g in match.groups() if g)}"]
+    match = re.fullmatch(r"(?:google search (?:for )?(.+)|search google for (.+)|search (?:for )?(.+?) on google)", text)
+    if match:
+        return [f"google search {next(g for g in match.groups() if g)}"]
+
+    match = re.fullmatch(r"(?:generate|create|make|draw) (?:an? )?(?:image|picture|photo) of (.+)", text)
+    if match:
+        return [f"generate image {match.group(1)}"]
+    match = re.fullmatch(r"write (?:me )?(an? .+|(?:application|email|letter|essay|code|poem|story|article) .+)", text)
+    if match and not re.search(r"\b(and|then) (open|send|play|close)\b", text):
+        return [f"content {match.group(1)}"]
+    return None
+
+
+class IntentClassifier:
+    """
+    Rules + TF-IDF nearest-centroid model in front of the DMM LLM
+
+    classify() returns a DMM decision list when confident, else None. learn()
+    logs what the LLM decided so the model improves with use.
+    """
+
+    def __init__(self, log_file: str = DECISION_LOG_FILE, seed_examples: Iterable[Tuple[str, str]] = ()):
+        """
+        Initialize Intent Classifier
+
+        Args:
+            log_file: JSONL file of past LLM decisions (training data)
+            seed_examples: (prompt, decision) pairs always trained on (e.g. the DMM few-shot history)
+        """
+        self.log_file = log_file
+        self.seed_examples = list(seed_examples)
+        self._logged = deque(maxlen=DECISION_LOG_MAX_ENTRIES)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._fitted = False
+        self._pending = 0
+        self._idf: Dict[str, float] = {}
+        self._centroids: Dict[str, Dict[str, float]] = {}
+        self.hits = Counter()  # Decisions by source: cache, keyword, rule, model, llm
+
+    # ---- Training ----
+
+    @staticmethod
+    def _label(decision: str) -> Optional[str]:
+        """Training label of a DMM decision ("general ..." -> "general", "send email ..." -> "other")"""
+        tasks = [task.strip() for task in decision.split(",") if task.strip()]
+        if not tasks:
+            return None
+        label = tasks[0].split(" ", 1)[0]
+        return label if len(tasks) == 1 and label in MODEL_LABELS else OTHER_LABEL
+
+    def _load_log(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.log_file):
+            return
+        lines = 0
+        try:
+            with open(self.log_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                        self._logged.append((entry["prompt"], entry["decision"]))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError as e:
+            print(f"Error reading decision log: {e}")
+            return
+        if lines > 2 * DECISION_LOG_MAX_ENTRIES:
+            self._compact_log()
+
+    def _compact_log(self):
+        """Rewrite the log with only the entries still used for training"""
+        tmp_path = f"{self.log_file}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for prompt, decision in self._logged:
+                    f.write(json.dumps({"prompt": prompt, "decision": decision}, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.log_file)
+        except OSError as e:
+            print(f"Error compacting decision log: {e}")
+
+    def _fit(self):
+        examples = [(prompt, self._label(decision)) for prompt, decision in list(self.seed_examples) + list(self._logged)]
+        examples = [(prompt, label) for prompt, label in examples if label]
+        document_frequency = Counter()
+        documents = []
+        for prompt, label in examples:
+            terms = Counter(_tokens(prompt))
+            if terms:
+                documents.append((terms, label))
+                document_frequency.update(terms.keys())
+        total = len(documents)
+        self._idf = {term: math.log((1 + total) / (1 + count)) + 1 for term, count in document_frequency.items()}
+
+        sums: Dict[str, Counter] = {}
+        counts = Counter()
+        for terms, label in documents:
+            vector = self._vector(terms)
+            sums.setdefault(label, Counter()).update(vector)
+            counts[label] += 1
+        self._centroids = {}
+        for label, summed in sums.items():
+            if counts[label] < MIN_CLASS_EXAMPLES:
+                continue
+            norm = math.sqrt(sum(v * v for v in summed.values())) or 1.0
+            self._centroids[label] = {term: value / norm for term, value in summed.items()}
+        self._pending = 0
+        self._fitted = True
+
+    def _vector(self, terms: Counter) -> Dict[str, float]:
+        weights = {term: (1 + math.log(count)) * self._idf.get(term, 0.0) for term, count in terms.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {term: w / norm for term, w in weights.items() if w}
+
+    def _ensure_model(self):
+        if not self._fitted or self._pending >= RETRAIN_EVERY:
+            self._load_log()
+            self._fit()
+
+    # ---- Classification ----
+
+    def predict(self, prompt: str) -> Tuple[Optional[str], float, float]:
+        """(label, similarity, margin) from the model; label None if it has fewer than two classes"""
+        with self._lock:
+            self._ensure_model()
+            if len(self._centroids) < 2:
+                return None, 0.0, 0.0
+            vector = self._vector(Counter(_tokens(prompt)))
+            scores = sorted(
+                ((sum(weight * centroid.get(term, 0.0) for term, weight in vector.items()), label)
+                 for label, centroid in self._centroids.items()),
+                reverse=True
+            )
+        (best, label), (runner_up, _) = scores[0], scores[1]
+        return label, best, best - runner_up
+
+    def classify(self, prompt: str) -> Optional[List[str]]:
+        """DMM decision when confident (rules first, then the model), else None"""
+        decision = match_rules(prompt)
+        if decision:
+            self.record("rule")
+            return decision
+        label, similarity, margin = self.predict(prompt)
+        if label in MODEL_LABELS and similarity >= MIN_SIMILARITY and margin >= MIN_MARGIN:
+            self.record("model")
+            return [f"{label} {prompt}"]
+        return None
+
+    def learn(self, prompt: str, decision: List[str]):
+        """Log an LLM decision as training data"""
+        decision_text = ", ".join(decision)
+        with self._lock:
+            self._load_log()
+            self._logged.append((prompt, decision_text))
+            self._pending += 1
+            try:
+                directory = os.path.dirname(self.log_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.log_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"prompt": prompt, "decision": decision_text}, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Error writing decision log: {e}")
+
+    def clear(self):
+        """Forget logged decisions (the log file is kept); the model refits on the seed examples"""
+        with self._lock:
+            self._logged.clear()
+            self._loaded = True
+            self._fitted = False
+            self._pending = 0
+
+    # ---- Hit rate ----
+
+    def record(self, source: str):
+        """Count a decision by where it came from ("cache", "keyword", "rule", "model" or "llm")"""
+        with self._lock:
+            self.hits[source] += 1
+            total = sum(self.hits.values())
+        if total % STATS_REPORT_EVERY == 0:
+            stats = self.stats()
+            print(f"DMM fast path: {stats['fast_path_rate']:.0%} of {stats['decisions']} decisions answered without the LLM")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = dict(self.hits)
+        decisions = sum(hits.values())
+        fast = decisions - hits.get("llm", 0)
+        return {
+            "decisions": decisions,
+            "cache": hits.get("cache", 0),
+            "keyword": hits.get("keyword", 0),
+            "rule": hits.get("rule", 0),
+            "model": hits.get("model", 0),
+            "llm": hits.get("llm", 0),
+            "fast_path_rate": fast / decisions if decisions else 0.0,
+        }
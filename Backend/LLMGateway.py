@@ -0,0 +1,661 @@
+"""
+LLM Gateway for JARVIS
+One pooled Groq client shared by every module. Requests are routed up front to
+the first preferred model that has rate-limit headroom (per-model token buckets
+for requests and tokens per minute) and whose circuit breaker is closed, instead
+of trying models serially and failing over only after a slow 429. Streams can
+be hedged: a slow first token sends the request to the next model as well.
+Every request is recorded in the telemetry registry (Backend/Telemetry.py).
+"""
+
+import queue
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from dotenv import dotenv_values
+
+from Backend.ContextBuilder import estimate_tokens
+from Backend.Telemetry import llm_metrics
+
+try:
+    from groq import Groq
+except ImportError:
+    Groq = None
+
+env_vars = dotenv_values(".env")
+GroqAPIKey = env_vars.get("GroqAPIKey")
+GroqBaseURL = env_vars.get("GroqBaseURL")  # e.g. the local mock server (Backend/MockLLMServer.py)
+
+# Per-model limits (requests / tokens per minute), matching the Groq free tier
+MODEL_LIMITS = {
+    "llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000},
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000},
+    "mixtral-8x7b-32768": {"rpm": 30, "tpm": 5000},
+}
+DEFAULT_MODEL_LIMITS = {"rpm": 30, "tpm": 6000}  # For models not listed above
+REQUEST_TIMEOUT = 10.0  # Seconds per API call
+MAX_ROUTE_WAIT = 2.0  # Longest a request waits for rate-limit headroom before giving up
+BREAKER_FAILURE_THRESHOLD = 3  # Consecutive failures that open a model's circuit
+BREAKER_COOLDOWN = 30.0  # Seconds an open circuit rejects requests before a trial call
+RATE_LIMIT_COOLDOWN = 20.0  # Default pause for a model after a 429 without retry-after
+HEDGE_DELAY = float(env_vars.get("HedgeDelay") or 0.8)  # Seconds without a first token before hedging (0 = off)
+
+socket.setdefaulttimeout(5)  # Default socket timeout for the assistant's other network calls
+
+
+class LLMUnavailableError(Exception):
+    """No model could take the request (not configured, rate limited or circuits open)"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity per minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        """Return over-estimated tokens once the real usage is known"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def drain(self):
+        """Empty the bucket (the server told us we're over the limit)"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker
+
+    Closed: requests pass. After `threshold` consecutive failures it opens and
+    rejects requests for `cooldown` seconds; then one trial request is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.open_until == 0.0:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def allows(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+
+    def on_dispatch(self):
+        if self.state == "half_open":
+            self.trial_in_flight = True
+
+    def record_success(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.failures >= self.threshold or self.open_until:
+            self.trip(self.cooldown)
+
+    def trip(self, seconds: float):
+        """Open the circuit for `seconds` (e.g. the server's retry-after)"""
+        self.open_until = time.monotonic() + seconds
+        self.trial_in_flight = False
+
+
+class _ModelState:
+    def __init__(self, name: str):
+        limits = MODEL_LIMITS.get(name, DEFAULT_MODEL_LIMITS)
+        self.name = name
+        self.requests = TokenBucket(limits["rpm"])
+        self.tokens = TokenBucket(limits["tpm"])
+        self.breaker = CircuitBreaker()
+        self.calls = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def wait_time(self, estimated_tokens: int) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    text = str(error).lower()
+    return getattr(error, "status_code", None) == 429 or "rate_limit" in text or "429" in text or "tpm" in text
+
+
+def _is_transient(error: Exception) -> bool:
+    """Timeouts, connection problems and 5xx responses - worth sending to another model"""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    name = type(error).__name__.lower()
+    return "timeout" in name or "connection" in name
+
+
+def _retry_after(error: Exception) -> float:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return RATE_LIMIT_COOLDOWN
+
+
+def _estimate_request_tokens(messages: List[Dict[str, str]], max_tokens: Optional[int]) -> int:
+    prompt = sum(estimate_tokens(str(message.get("content", ""))) + 4 for message in messages)
+    return prompt + (max_tokens or 0)
+
+
+def _chunk_text(chunk) -> str:
+    choices = getattr(chunk, "choices", None)
+    return (choices[0].delta.content or "") if choices else ""
+
+
+def _chunk_usage(chunk):
+    """Usage reported on a stream's final chunk (Groq: x_groq.usage, OpenAI: usage)"""
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+    return usage
+
+
+class _MeteredStream:
+    """
+    A streamed completion that records its telemetry when it ends
+
+    Tracks time to the first content token, the text received and the usage
+    reported on the last chunk. The record is written once: when the stream is
+    exhausted, fails, is closed, or is dropped by a consumer that stopped early.
+    """
+
+    def __init__(self, gateway, stream, state, call: Dict):
+        self._gateway = gateway
+        self._stream = stream
+        self._chunks = iter(stream)
+        self._state = state
+        self._call = call
+        self._first_token_at = None
+        self._text_parts = []
+        self._usage = None
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._finish("ok")
+            raise
+        except Exception:
+            self._finish("error")
+            raise
+        text = _chunk_text(chunk)
+        if text:
+            if self._first_token_at is None:
+                self._first_token_at = time.monotonic()
+            self._text_parts.append(text)
+        usage = _chunk_usage(chunk)
+        if usage is not None:
+            self._usage = usage
+        return chunk
+
+    def close(self):
+        self._close_stream()
+        self._finish("ok" if self._text_parts else "cancelled")
+
+    def cancel(self):
+        """Close as a hedge loser"""
+        self._close_stream()
+        self._finish("cancelled")
+
+    def _close_stream(self):
+        close = getattr(self._stream, "close", None)
+        if close:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def __del__(self):
+        if not self._done:
+            try:
+                self._finish("ok" if self._text_parts else "cancelled")
+            except Exception:
+                pass  # Interpreter shutdown
+
+    def _finish(self, status: str):
+        if self._done:
+            return
+        self._done = True
+        call = self._call
+        ttft = self._first_token_at - call["sent_at"] if self._first_token_at is not None else None
+        self._gateway._record(
+            call, self._state, status, self._usage, "".join(self._text_parts), ttft, time.monotonic(), stream=True
+        )
+
+
+class _StreamAttempt:
+    """One side of a hedged request: the stream and the chunks read while waiting for its first token"""
+
+    def __init__(self, hedged: bool = False):
+        self.hedged = hedged
+        self.model = None
+        self.tried = set()
+        self.prompt_tokens = 0
+        self.stream = None
+        self.chunks = None  # Iterator over the stream, shared by the waiting thread and the consumer
+        self.buffered = []
+        self.error = None
+        self.cancelled = False
+        self.finished = False  # The attempt's thread is done with it
+
+    def resume(self) -> Iterator:
+        """The full stream: buffered chunks first, then the rest"""
+        yield from self.buffered
+        if self.chunks is not None:
+            yield from self.chunks
+
+    def close(self):
+        close = getattr(self.stream, "cancel", None) or getattr(self.stream, "close", None)
+        if close:
+            try:
+                close()
+            except Exception:
+                pass
+
+
+class LLMGateway:
+    """
+    Shared chat-completion entry point
+
+    chat() takes the caller's model preference list and dispatches to the first
+    model that can take the request right now. Rate limits are tracked locally
+    (token buckets) so requests don't have to hit a 429 to learn a model is
+    busy; a 429 or repeated errors open that model's circuit for a while.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = GroqAPIKey,
+        timeout: float = REQUEST_TIMEOUT,
+        hedge_delay: float = HEDGE_DELAY,
+        base_url: Optional[str] = GroqBaseURL
+    ):
+        """
+        Initialize LLM Gateway
+
+        Args:
+            api_key: Groq API key
+            timeout: Per-request timeout in seconds
+            hedge_delay: Seconds to wait for a first token before hedging (0 disables hedging)
+            base_url: Alternative Groq-compatible endpoint (None = api.groq.com)
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self._client = None
+        self._models: Dict[str, _ModelState] = {}
+        self._lock = threading.RLock()  # Re-entrant: a dropped stream may record from inside a locked section
+        self.hedges_fired = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.hedge_extra_tokens = 0  # Estimated tokens spent on losing requests
+
+    @property
+    def client(self):
+        """The pooled Groq client (created on first use; its HTTP connections are reused)"""
+        if self._client is None:
+            with self._lock:
+                # A local endpoint (mock server) doesn't need a real key
+                api_key = self.api_key or ("local" if self.base_url else None)
+                if self._client is None and Groq is not None and api_key:
+                    try:
+                        # Retries are handled here by routing, not by the SDK's own backoff
+                        self._client = Groq(api_key=api_key, base_url=self.base_url, timeout=self.timeout, max_retries=0)
+                    except Exception as e:
+                        print(f"Error initializing Groq client: {e}")
+        return self._client
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    def use_endpoint(self, base_url: Optional[str], api_key: Optional[str] = None):
+        """
+        Send all requests to another Groq-compatible endpoint (e.g. the mock server)
+
+        Resets the client and the per-model rate-limit and circuit state.
+        """
+        with self._lock:
+            self.base_url = base_url
+            if api_key is not None:
+                self.api_key = api_key
+            self._client = None
+            self._models = {}
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            state = self._models[model] = _ModelState(model)
+        return state
+
+    def _reserve(self, models: List[str], estimated_tokens: int, exclude: set) -> Optional[_ModelState]:
+        """Pick the first preferred model with headroom now, or the one free soonest (within MAX_ROUTE_WAIT)"""
+        deadline = time.monotonic() + MAX_ROUTE_WAIT
+        while True:
+            with self._lock:
+                best, best_wait = None, None
+                for model in models:
+                    if model in exclude:
+                        continue
+                    state = self._state(model)
+                    if not state.breaker.allows():
+                        continue
+                    wait = state.wait_time(estimated_tokens)
+                    if wait == 0.0:
+                        best, best_wait = state, 0.0
+                        break
+                    if best_wait is None or wait < best_wait:
+                        best, best_wait = state, wait
+                if best is None:
+                    return None
+                if best_wait == 0.0:
+                    best.requests.take(1)
+                    best.tokens.take(estimated_tokens)
+                    best.breaker.on_dispatch()
+                    best.calls += 1
+                    return best
+            if time.monotonic() + best_wait > deadline:
+                return None
+            time.sleep(best_wait)
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        models: List[str],
+        max_tokens: Optional[int] = None,
+        hedge: bool = False,
+        route: str = "",
+        **kwargs
+    ):
+        """
+        Create a chat completion on the first healthy model
+
+        Args:
+            messages: Chat messages
+            models: Models in order of preference
+            max_tokens: Completion token limit (also used for rate-limit accounting)
+            hedge: For streams, send the request to the next model too if the
+                first token hasn't arrived within hedge_delay (see _chat_hedged)
+            route: Calling feature the request is recorded under ("chat", "dmm", ...)
+            **kwargs: Passed to chat.completions.create (temperature, stream, ...)
+
+        Returns:
+            The completion (a chunk iterator when stream=True)
+
+        Raises:
+            LLMUnavailableError: No model could take the request
+            Exception: Non-transient API errors (bad request, auth) are re-raised
+        """
+        if self.client is None:
+            llm_metrics.record(route, None, "unavailable")
+            raise LLMUnavailableError("Groq client is not configured")
+        if hedge and kwargs.get("stream") and self.hedge_delay > 0 and len(models) > 1:
+            return self._chat_hedged(messages, models, max_tokens, kwargs, route)
+        return self._dispatch(messages, models, max_tokens, kwargs, set(), route)
+
+    def _dispatch(
+        self,
+        messages: List[Dict[str, str]],
+        models: List[str],
+        max_tokens: Optional[int],
+        kwargs: Dict,
+        tried: set,
+        route: str = "",
+        on_route: Optional[Callable[[str], None]] = None
+    ):
+        """Send the request to the best untried model, failing over on rate limits and transient errors"""
+        estimated = _estimate_request_tokens(messages, max_tokens)
+        call = {
+            "route": route,
+            "started_at": time.monotonic(),
+            "sent_at": None,
+            "queue_time": 0.0,
+            "retries": 0,
+            "estimated": estimated,
+            "prompt_estimate": _estimate_request_tokens(messages, 0),
+        }
+        last_error, state = None, None
+        while True:
+            waited_from = time.monotonic()
+            next_state = self._reserve(models, estimated, tried)
+            call["queue_time"] += time.monotonic() - waited_from
+            if next_state is None:
+                self._record(call, state, "unavailable", None, "", None, time.monotonic(), kwargs.get("stream", False))
+                raise LLMUnavailableError(f"No model available for this request (last error: {last_error})")
+            state = next_state
+            tried.add(state.name)
+            if on_route:
+                on_route(state.name)
+            call["sent_at"] = time.monotonic()
+            try:
+                completion = self.client.chat.completions.create(
+                    model=state.name, messages=messages, max_tokens=max_tokens, **kwargs
+                )
+            except Exception as e:
+                last_error = e
+                call["retries"] += 1
+                print(f"Model {state.name} failed: {e}")
+                with self._lock:
+                    state.errors += 1
+                    if _is_rate_limit(e):
+                        state.rate_limited += 1
+                        state.requests.drain()
+                        state.tokens.drain()
+                        state.breaker.trip(_retry_after(e))
+                        continue
+                    if _is_transient(e):
+                        state.breaker.record_failure()
+                        continue
+                    # The request itself is bad (400, auth) - not the model's fault
+                    state.breaker.trial_in_flight = False
+                call["retries"] -= 1  # Not retried: this is the request's outcome
+                self._record(call, state, "error", None, "", None, time.monotonic(), kwargs.get("stream", False))
+                raise
+
+            with self._lock:
+                state.breaker.record_success()
+            if kwargs.get("stream"):
+                return _MeteredStream(self, completion, state, call)
+            text = ""
+            try:
+                text = completion.choices[0].message.content or ""
+            except (AttributeError, IndexError):
+                pass
+            now = time.monotonic()
+            self._record(call, state, "ok", getattr(completion, "usage", None), text, now - call["sent_at"], now)
+            return completion
+
+    def _record(self, call: Dict, state: Optional[_ModelState], status: str, usage, text: str,
+                ttft: Optional[float], ended_at: float, stream: bool = False):
+        """Book a finished request in the telemetry registry and return over-estimated tokens to the bucket"""
+        prompt_tokens = getattr(usage, "prompt_tokens", None) if usage is not None else None
+        completion_tokens = getattr(usage, "completion_tokens", None) if usage is not None else None
+        estimated_usage = prompt_tokens is None or completion_tokens is None
+        if prompt_tokens is None:
+            prompt_tokens = call["prompt_estimate"] if call["sent_at"] is not None else 0
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(text) if text else 0
+        if state is not None and not estimated_usage:
+            with self._lock:
+                state.tokens.give_back(call["estimated"] - (prompt_tokens + completion_tokens))
+        llm_metrics.record(
+            route=call["route"],
+            model=state.name if state is not None else None,
+            status=status,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            estimated_usage=estimated_usage,
+            queue_time=call["queue_time"],
+            ttft=ttft,
+            total=ended_at - call["started_at"],
+            retries=call["retries"],
+            stream=stream
+        )
+
+    # ---- Hedged streaming ----
+
+    def _chat_hedged(self, messages: List[Dict[str, str]], models: List[str], max_tokens: Optional[int], kwargs: Dict, route: str = ""):
+        """
+        Stream from the primary model; if no token arrives within hedge_delay,
+        send the same request to the next model and keep whichever streams first
+
+        The loser's stream is closed. Its prompt plus whatever it streamed before
+        being closed is counted as the hedge's extra token cost.
+        """
+        arrivals = queue.Queue()
+        primary = _StreamAttempt()
+        self._start_attempt(primary, messages, models, max_tokens, kwargs, set(), arrivals, route)
+        attempts = [primary]
+
+        try:
+            first = arrivals.get(timeout=self.hedge_delay)
+        except queue.Empty:
+            first = None
+        if first is not None:
+            if first.error is not None:
+                raise first.error
+            return first.resume()
+
+        # Primary is slow: hedge on the next model (if one can take the request)
+        hedge = _StreamAttempt(hedged=True)
+        exclude = set(primary.tried)
+        if primary.model:
+            exclude.add(primary.model)
+        if any(model not in exclude for model in models):
+            self._start_attempt(hedge, messages, models, max_tokens, kwargs, exclude, arrivals, route)
+            attempts.append(hedge)
+            with self._lock:
+                self.hedges_fired += 1
+
+        winner, errors = None, []
+        while winner is None and len(errors) < len(attempts):
+            attempt = arrivals.get()
+            if attempt.error is not None:
+                errors.append(attempt.error)
+            else:
+                winner = attempt
+        if winner is None:
+            raise errors[0]
+
+        for attempt in attempts:
+            if attempt is not winner:
+                with self._lock:
+                    attempt.cancelled = True
+                    finished = attempt.finished
+                if finished:
+                    self._discard(attempt)
+                else:
+                    attempt.close()  # Its thread books the cost once it notices
+        if len(attempts) > 1:
+            with self._lock:
+                if winner.hedged:
+                    self.hedge_wins += 1
+                else:
+                    self.primary_wins += 1
+        return winner.resume()
+
+    def _start_attempt(self, attempt, messages, models, max_tokens, kwargs, tried, arrivals, route=""):
+        attempt.tried = tried
+        attempt.prompt_tokens = _estimate_request_tokens(messages, 0)
+
+        def on_route(model):
+            attempt.model = model
+
+        def run():
+            try:
+                attempt.stream = self._dispatch(messages, models, max_tokens, kwargs, tried, route, on_route)
+                attempt.chunks = iter(attempt.stream)
+                for chunk in attempt.chunks:
+                    attempt.buffered.append(chunk)
+                    if attempt.cancelled or _chunk_text(chunk):
+                        break  # First token (or nobody is waiting any more)
+            except Exception as e:
+                attempt.error = e
+            with self._lock:
+                attempt.finished = True
+                cancelled = attempt.cancelled
+            if cancelled:
+                self._discard(attempt)
+            else:
+                arrivals.put(attempt)
+
+        threading.Thread(target=run, daemon=True, name="llm-hedge").start()
+
+    def _discard(self, attempt):
+        """Close a losing stream and book what it cost"""
+        attempt.close()
+        completion_tokens = estimate_tokens("".join(_chunk_text(chunk) for chunk in attempt.buffered))
+        with self._lock:
+            self.hedge_extra_tokens += attempt.prompt_tokens + completion_tokens
+
+    def hedge_stats(self) -> Dict[str, int]:
+        """How often hedging fired, which side won, and the estimated tokens it cost"""
+        with self._lock:
+            return {
+                "hedges_fired": self.hedges_fired,
+                "hedge_wins": self.hedge_wins,
+                "primary_wins": self.primary_wins,
+                "extra_tokens": self.hedge_extra_tokens,
+            }
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-model call counts, breaker state and current headroom"""
+        with self._lock:
+            return {
+                name: {
+                    "calls": state.calls,
+                    "rate_limited": state.rate_limited,
+                    "errors": state.errors,
+                    "circuit": state.breaker.state,
+                    "requests_left": int(state.requests.tokens),
+                    "tokens_left": int(state.tokens.tokens),
+                }
+                for name, state in self._models.items()
+            }
+
+
+# Process-wide gateway
+gateway = LLMGateway()
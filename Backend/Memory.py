@@ -4,41 +4,269 @@ Handles conversation memory and context awareness
 Integrated with Sales Memory for enhanced knowledge retrieval
 """
 
+import atexit
+import hashlib
 import json
 import os
+import re
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
+from itertools import islice
 from typing import List, Dict, Any
 
+from Backend.ContextBuilder import ContextBuilder
+from Backend.ConversationArchive import ConversationArchive
+
+# Journal lines appended before the snapshot is rewritten and the journal truncated
+JOURNAL_COMPACT_EVERY = 100
+
+# Learned facts kept before the least recently mentioned ones are evicted
+MAX_USER_FACTS = 200
+
+_NAME = r"[a-z]+(?:\s+[a-z]+)?"
+# Name patterns in precedence order: explicit statements beat "i am ..." / "i'm ..."
+_NAME_PATTERNS = [re.compile(pattern) for pattern in (
+    rf"my name is ({_NAME})",
+    rf"call me ({_NAME})",
+    rf"remember (?:that )?my name (?:is )?({_NAME})",
+    rf"i am ({_NAME})",
+    rf"i'm ({_NAME})",
+)]
+# Fact patterns, first match wins ("remember it: ..." before the general form)
+_FACT_PATTERNS = [re.compile(pattern) for pattern in (
+    r"remember it[:\s]+(.+?)(?:\.|$)",
+    r"remember (?:that )?(.+?)(?:\.|$)",
+)]
+_USER_INFO_TRIGGER = re.compile(r"remember|my name|i am|i'm|call me")
+_FACT_WORD = re.compile(r"[a-z0-9']{3,}")
+
+
+def _fact_key(fact: str) -> str:
+    """Stable dedupe key for a fact (case/whitespace-insensitive)"""
+    normalized = " ".join(fact.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class UserFactStore:
+    """
+    Learned user facts with hash-based dedupe, timestamps and LRU eviction
+
+    Facts are keyed by a hash of their normalized text, so checking for a
+    duplicate is O(1). A keyword index maps words to fact keys so the facts
+    relevant to a query are found without scanning every fact. `version`
+    changes whenever the set of facts changes (for cache invalidation).
+    """
+    
+    def __init__(self, max_facts: int = MAX_USER_FACTS):
+        self.max_facts = max_facts
+        self._facts: "OrderedDict[str, Dict[str, str]]" = OrderedDict()  # Least recently mentioned first
+        self._word_index: Dict[str, set] = {}
+        self.version = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._facts)
+    
+    def _index(self, key: str, fact: str):
+        for word in set(_FACT_WORD.findall(fact.lower())):
+            self._word_index.setdefault(word, set()).add(key)
+    
+    def _unindex(self, key: str, fact: str):
+        for word in set(_FACT_WORD.findall(fact.lower())):
+            keys = self._word_index.get(word)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._word_index[word]
+    
+    def add(self, fact: str) -> bool:
+        """
+        Remember a fact (or refresh it if already known)
+        
+        Returns:
+            True if the fact was new
+        """
+        key = _fact_key(fact)
+        now = datetime.now().isoformat()
+        with self._lock:
+            entry = self._facts.get(key)
+            if entry is not None:
+                entry["last_seen"] = now
+                self._facts.move_to_end(key)
+                return False
+            
+            self._facts[key] = {"fact": fact, "learned_at": now, "last_seen": now}
+            self._index(key, fact)
+            while len(self._facts) > self.max_facts:
+                old_key, old_entry = self._facts.popitem(last=False)
+                self._unindex(old_key, old_entry["fact"])
+            self.version += 1
+            return True
+    
+    def facts(self) -> List[str]:
+        """All facts, oldest mention first"""
+        with self._lock:
+            return [entry["fact"] for entry in self._facts.values()]
+    
+    def relevant(self, query: str, limit: int) -> List[str]:
+        """
+        Facts sharing the most words with the query, topped up with the most recently mentioned
+        
+        Cost depends on the query's words, not on how many facts are stored.
+        """
+        with self._lock:
+            scores: Dict[str, int] = {}
+            for word in set(_FACT_WORD.findall((query or "").lower())):
+                for key in self._word_index.get(word, ()):
+                    scores[key] = scores.get(key, 0) + 1
+            ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+            for key in reversed(self._facts):
+                if len(ranked) >= limit:
+                    break
+                if key not in scores:
+                    ranked.append(key)
+            return [self._facts[key]["fact"] for key in ranked]
+    
+    def load(self, items: List[Any]):
+        """Load facts from user_info.json (dicts with timestamps, or plain strings from older files)"""
+        with self._lock:
+            self._facts.clear()
+            self._word_index.clear()
+            for item in items or []:
+                entry = dict(item) if isinstance(item, dict) else {"fact": str(item), "learned_at": "", "last_seen": ""}
+                key = _fact_key(entry["fact"])
+                if key not in self._facts:
+                    self._facts[key] = entry
+                    self._index(key, entry["fact"])
+            self.version += 1
+    
+    def to_list(self) -> List[Dict[str, str]]:
+        """Facts with timestamps, for saving"""
+        with self._lock:
+            return [dict(entry) for entry in self._facts.values()]
+    
+    def clear(self):
+        """Forget every fact"""
+        with self._lock:
+            self._facts.clear()
+            self._word_index.clear()
+            self.version += 1
+
 class MemoryManager:
-    def __init__(self, memory_file: str = "Data/conversation_memory.json", user_info_file: str = "Data/user_info.json", max_messages: int = 50):
+    def __init__(self, memory_file: str = "Data/conversation_memory.json", user_info_file: str = "Data/user_info.json", max_messages: int = 50,
+                 journal_file: str = None, compact_every: int = JOURNAL_COMPACT_EVERY, archive: ConversationArchive = None):
         self.memory_file = memory_file
         self.user_info_file = user_info_file
         self.max_messages = max_messages
-        self.memory = []
+        # Messages are appended to a journal (one JSON line each) instead of rewriting
+        # memory_file every turn; memory_file is the compacted snapshot
+        self.journal_file = journal_file or os.path.splitext(memory_file)[0] + ".journal.jsonl"
+        self.compact_every = compact_every
+        # Long-term archive of every turn (the ring buffer only holds max_messages)
+        self.archive = archive
+        self.memory = deque(maxlen=max_messages)  # Ring buffer of recent messages
         self.user_info = {}  # Store learned user information
+        self.facts = UserFactStore()  # Learned facts (indexed, deduplicated, bounded)
+        self._summary_cache = None  # (facts version, rendered user info summary)
+        self._journal = None  # Open append handle
+        self._journal_lines = 0
+        self._lock = threading.RLock()
         self.load_memory()
         self.load_user_info()
+        atexit.register(self.close)
+        
+        # Seed an empty archive with the messages we already have
+        if self.archive is not None and self.memory and self.archive.count() == 0:
+            for entry in self.memory:
+                self.archive.add(entry.get("role", ""), entry.get("message", ""), entry.get("timestamp", ""))
     
     def load_memory(self):
-        """Load existing memory from file"""
-        try:
-            if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    self.memory = json.load(f)
-            else:
-                self.memory = []
-        except Exception as e:
-            print(f"Error loading memory: {e}")
-            self.memory = []
+        """Load the snapshot, then replay the journal on top of it"""
+        with self._lock:
+            self.memory = deque(maxlen=self.max_messages)
+            try:
+                if os.path.exists(self.memory_file):
+                    with open(self.memory_file, 'r', encoding='utf-8') as f:
+                        self.memory.extend(json.load(f))
+            except Exception as e:
+                print(f"Error loading memory: {e}")
+                self.memory.clear()
+            
+            replayed = 0
+            try:
+                if os.path.exists(self.journal_file):
+                    with open(self.journal_file, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            try:
+                                record = json.loads(line)
+                            except ValueError:
+                                continue  # Torn final line from an interrupted write
+                            self.memory.append(record)
+                            replayed += 1
+            except Exception as e:
+                print(f"Error replaying memory journal: {e}")
+            
+            # Fold the replayed journal into the snapshot so the next start is a single read
+            if replayed:
+                self.compact()
     
     def save_memory(self):
         """Save memory to file"""
+        self.compact()
+    
+    def _close_journal(self):
+        if self._journal is not None:
+            try:
+                self._journal.close()
+            except Exception:
+                pass
+            self._journal = None
+    
+    def _append_journal(self, record: Dict[str, Any]):
+        """Append one record to the journal, compacting when it grows past compact_every"""
         try:
-            os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(self.memory, f, indent=2, ensure_ascii=False)
+            if self._journal is None:
+                os.makedirs(os.path.dirname(self.journal_file) or ".", exist_ok=True)
+                self._journal = open(self.journal_file, 'a', encoding='utf-8')
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            self._journal_lines += 1
         except Exception as e:
-            print(f"Error saving memory: {e}")
+            print(f"Error writing memory journal: {e}")
+            self._close_journal()
+            return
+        
+        if self._journal_lines >= self.compact_every:
+            self.compact()
+    
+    def compact(self):
+        """Write the current messages as the snapshot (atomically) and truncate the journal"""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.memory_file) or ".", exist_ok=True)
+                temp_file = self.memory_file + ".tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(list(self.memory), f, ensure_ascii=False)
+                os.replace(temp_file, self.memory_file)
+            except Exception as e:
+                print(f"Error saving memory: {e}")
+                return  # Keep the journal - it still holds the messages
+            
+            self._close_journal()
+            try:
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+            except OSError as e:
+                print(f"Error truncating memory journal: {e}")
+            self._journal_lines = 0
+    
+    def close(self):
+        """Compact pending journal entries and release the journal file"""
+        with self._lock:
+            if self._journal_lines:
+                self.compact()
+            self._close_journal()
     
     def add_message(self, role: str, message: str, timestamp: str = None):
         """Add a message to memory"""
@@ -51,31 +279,31 @@ class MemoryManager:
             "timestamp": timestamp
         }
         
-        self.memory.append(memory_entry)
-        
-        # Keep only the last max_messages
-        if len(self.memory) > self.max_messages:
-            self.memory = self.memory[-self.max_messages:]
+        with self._lock:
+            # The ring buffer keeps only the last max_messages
+            self.memory.append(memory_entry)
+            self._append_journal(memory_entry)
         
-        self.save_memory()
+        if self.archive is not None:
+            self.archive.add(role, message, timestamp)
     
     def get_recent_context(self, num_messages: int = None) -> List[Dict[str, Any]]:
         """Get recent conversation context"""
         if num_messages is None:
             num_messages = self.max_messages
         
-        return self.memory[-num_messages:] if self.memory else []
+        with self._lock:
+            start = max(len(self.memory) - num_messages, 0)
+            return list(islice(self.memory, start, None))
     
     def get_context_string(self, num_messages: int = None) -> str:
         """Get recent context as a formatted string"""
-        context = self.get_recent_context(num_messages)
+        # Only include the last 3 messages to avoid overwhelming the AI
+        recent_context = self.get_recent_context(min(num_messages or 3, 3))
         
-        if not context:
+        if not recent_context:
             return "No previous conversation context available."
         
-        # Only include the last 3 messages to avoid overwhelming the AI
-        recent_context = context[-3:] if len(context) > 3 else context
-        
         context_string = "Recent conversation context (last 3 messages):\n"
         for entry in recent_context:
             role = entry.get("role", "Unknown")
@@ -86,8 +314,9 @@ class MemoryManager:
     
     def clear_memory(self):
         """Clear all memory"""
-        self.memory = []
-        self.save_memory()
+        with self._lock:
+            self.memory.clear()
+            self.compact()
     
     def load_user_info(self):
         """Load learned user information"""
@@ -100,73 +329,78 @@ class MemoryManager:
         except Exception as e:
             print(f"Error loading user info: {e}")
             self.user_info = {}
+        # Facts live in the indexed store; user_info keeps the other fields (name)
+        self.facts.load(self.user_info.pop("facts", []))
+        self._summary_cache = None
     
     def save_user_info(self):
         """Save learned user information"""
         try:
             os.makedirs(os.path.dirname(self.user_info_file), exist_ok=True)
             with open(self.user_info_file, 'w', encoding='utf-8') as f:
-                json.dump(self.user_info, f, indent=2, ensure_ascii=False)
+                json.dump({**self.user_info, "facts": self.facts.to_list()}, f, indent=2, ensure_ascii=False)
         except Exception as e:
             print(f"Error saving user info: {e}")
     
+    def clear_user_info(self):
+        """Forget the user's name and every learned fact"""
+        self.user_info = {}
+        self.facts.clear()
+        self._summary_cache = None
+        self.save_user_info()
+    
     def extract_user_info(self, user_message: str):
-        """Extract and store user information from messages"""
-        import re
+        """Extract and store user information from messages (saved at most once per message)"""
         message_lower = user_message.lower()
+        # Cheap gate: most messages contain no trigger phrase at all
+        if not _USER_INFO_TRIGGER.search(message_lower):
+            return
         
-        # Extract name patterns
-        name_patterns = [
-            r"my name is ([a-z]+(?:\s+[a-z]+)?)",
-            r"i am ([a-z]+(?:\s+[a-z]+)?)",
-            r"i'm ([a-z]+(?:\s+[a-z]+)?)",
-            r"call me ([a-z]+(?:\s+[a-z]+)?)",
-            r"remember (?:that )?my name (?:is )?([a-z]+(?:\s+[a-z]+)?)",
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, message_lower)
+        changed = False
+        name = None
+        for pattern in _NAME_PATTERNS:
+            match = pattern.search(message_lower)
             if match:
                 name = match.group(1).strip().title()
-                self.user_info["name"] = name
-                print(f"Learned user name: {name}")
-                self.save_user_info()
                 break
         
-        # Extract preferences, facts, etc.
-        remember_patterns = [
-            r"remember (?:that )?(.+?)(?:\.|$)",
-            r"remember it[:\s]+(.+?)(?:\.|$)",
-            r"remember (.+?)(?:\.|$)",
-        ]
-        
-        for pattern in remember_patterns:
-            if "remember" in message_lower:
-                match = re.search(pattern, message_lower)
+        if "remember" in message_lower:
+            for pattern in _FACT_PATTERNS:
+                match = pattern.search(message_lower)
                 if match:
                     fact = match.group(1).strip()
-                    if fact and len(fact) > 3:
-                        if "facts" not in self.user_info:
-                            self.user_info["facts"] = []
-                        if fact not in self.user_info["facts"]:
-                            self.user_info["facts"].append(fact)
-                            print(f"Learned fact: {fact}")
-                            self.save_user_info()
+                    if len(fact) > 3 and self.facts.add(fact):
+                        print(f"Learned fact: {fact}")
+                        changed = True
+                    break
+        
+        if name and self.user_info.get("name") != name:
+            self.user_info["name"] = name
+            print(f"Learned user name: {name}")
+            changed = True
+        
+        if changed:
+            self._summary_cache = None
+            self.save_user_info()
     
     def get_user_info_summary(self) -> str:
-        """Get formatted user information for AI context"""
-        if not self.user_info:
-            return ""
+        """Get formatted user information for AI context (cached until a fact changes)"""
+        if self._summary_cache is not None and self._summary_cache[0] == self.facts.version:
+            return self._summary_cache[1]
         
-        summary = "User Information I've learned:\n"
-        if "name" in self.user_info:
-            summary += f"- Name: {self.user_info['name']}\n"
-        if "facts" in self.user_info and self.user_info["facts"]:
-            summary += "- Facts I remember:\n"
-            for fact in self.user_info["facts"]:
-                summary += f"  • {fact}\n"
+        facts = self.facts.facts()
+        summary = ""
+        if "name" in self.user_info or facts:
+            summary = "User Information I've learned:\n"
+            if "name" in self.user_info:
+                summary += f"- Name: {self.user_info['name']}\n"
+            if facts:
+                summary += "- Facts I remember:\n"
+                for fact in facts:
+                    summary += f"  • {fact}\n"
         
-        return summary.strip()
+        self._summary_cache = (self.facts.version, summary.strip())
+        return self._summary_cache[1]
     
     def get_memory_stats(self) -> Dict[str, Any]:
         """Get memory statistics"""
@@ -174,12 +408,22 @@ class MemoryManager:
             "total_messages": len(self.memory),
             "max_messages": self.max_messages,
             "memory_file": self.memory_file,
-            "user_info_count": len(self.user_info),
+            "journal_entries": self._journal_lines,
+            "archived_messages": self.archive.count() if self.archive is not None else 0,
+            "user_info_count": len(self.user_info) + len(self.facts),
             "last_updated": datetime.now().isoformat()
         }
 
-# Global memory manager instance
-memory_manager = MemoryManager()
+def _embed_turns(texts: List[str]) -> List[Any]:
+    """Embed archived turns with the sales memory's embedding model (if it loaded)"""
+    from Backend.SalesMemory import sales_memory_manager
+    return sales_memory_manager.create_embeddings(texts)
+
+# Global memory manager instance (every turn is also kept in the long-term archive)
+memory_manager = MemoryManager(archive=ConversationArchive(embed=_embed_turns))
+
+# Packs facts, rolling summary, recalled older turns and recent turns into a token budget
+context_builder = ContextBuilder(memory_manager, archive=memory_manager.archive)
 
 def add_user_message(message: str):
     """Add user message to memory and extract user information"""
@@ -187,31 +431,27 @@ def add_user_message(message: str):
     # Extract and learn from user message
     memory_manager.extract_user_info(message)
 
+def may_learn_from(message: str) -> bool:
+    """Whether add_user_message could teach the user's name or a fact (changing the conversation context)"""
+    return bool(_USER_INFO_TRIGGER.search(message.lower()))
+
 def add_assistant_message(message: str):
     """Add assistant message to memory"""
     memory_manager.add_message("JARVIS", message)
+    # End of a turn - fold aged-out messages into the rolling summary off the hot path
+    context_builder.schedule_summary()
 
-def get_conversation_context() -> str:
-    """Get conversation context for AI responses including learned user info"""
-    context = memory_manager.get_context_string()
-    
-    # Add learned user information
-    user_info = memory_manager.get_user_info_summary()
-    
-    full_context = ""
-    if user_info:
-        full_context += user_info + "\n\n"
-    if context:
-        full_context += context
-    
-    # Optionally integrate with sales memory for enhanced context
-    try:
-        from Backend.SalesMemory import recall_memory
-        # This is called separately in Chatbot.py when needed, so we keep it minimal here
-    except ImportError:
-        pass  # Sales memory is optional
+def get_conversation_context(query: str = "", budget_tokens: int = None, include_recent: bool = True) -> str:
+    """
+    Get conversation context for AI responses including learned user info
     
-    return full_context.strip() if full_context else "No previous conversation context available."
+    Args:
+        query: Current user query, used to pick the relevant remembered facts
+        budget_tokens: Token budget for the context (default: DEFAULT_CONTEXT_BUDGET)
+        include_recent: Include the recent turns (pass False when the chat history is sent as messages)
+    """
+    full_context = context_builder.build(query, budget_tokens, include_recent)
+    return full_context if full_context else "No previous conversation context available."
 
 def get_recent_messages(num_messages: int = 5) -> List[Dict[str, Any]]:
     """Get recent messages for context"""
@@ -220,8 +460,9 @@ def get_recent_messages(num_messages: int = 5) -> List[Dict[str, Any]]:
 def clear_conversation_memory():
     """Clear conversation memory and user info"""
     memory_manager.clear_memory()
-    memory_manager.user_info = {}
-    memory_manager.save_user_info()
+    memory_manager.archive.clear()
+    context_builder.reset()
+    memory_manager.clear_user_info()
 
 def get_memory_info() -> Dict[str, Any]:
     """Get memory information"""
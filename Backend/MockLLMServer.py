@@ -0,0 +1,332 @@
+"""
+Mock LLM Server for JARVIS
+A local, offline stand-in for the Groq (OpenAI-compatible) chat-completions API
+so the LLM paths can be exercised and benchmarked without network or API keys.
+Time-to-first-token, streaming rate, error and 429 injection are configurable
+and seeded, and responses can be scripted per request pattern.
+
+Point the app at it with GroqBaseURL=http://127.0.0.1:8765 in .env (the API key
+can be anything), or run: python -m Backend.MockLLMServer --help
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TTFT = 0.25  # Seconds before the first token
+DEFAULT_TOKENS_PER_SECOND = 250.0  # Streaming rate after the first token
+DEFAULT_RESPONSE = (
+    "This is a scripted answer from the local mock server. It streams at a fixed rate "
+    "so latency and throughput can be measured without network access."
+)
+CHAT_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")  # Groq and OpenAI clients
+
+# Built-in script: the decision model gets a routing answer, everything else the default text.
+# DMM requests carry no system prompt (only the tail of its few-shot history), so the
+# rule matches the last few-shot answer instead.
+DEFAULT_SCRIPT = [
+    {"history": r"^general chat with me\.$", "response": "general {query}"},
+]
+
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def _tokens(text: str) -> List[str]:
+    """Split a response into stream pieces (roughly one word each)"""
+    return _TOKEN.findall(text) or [""]
+
+
+class MockLLMConfig:
+    """Behaviour of the mock server; changeable at runtime (e.g. between benchmark phases)"""
+
+    def __init__(
+        self,
+        ttft: float = DEFAULT_TTFT,
+        tokens_per_second: float = DEFAULT_TOKENS_PER_SECOND,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 2.0,
+        rpm_limit: Optional[int] = None,
+        script: Optional[List[Dict[str, str]]] = None,
+        default_response: str = DEFAULT_RESPONSE,
+        model_ttft: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = 0
+    ):
+        """
+        Initialize Mock LLM Config
+
+        Args:
+            ttft: Seconds before the first token (or the whole non-streamed response)
+            tokens_per_second: Streaming rate after the first token (0 = all at once)
+            error_rate: Fraction of requests answered with a 503
+            rate_limit_rate: Fraction of requests answered with a 429
+            retry_after: retry-after header sent with 429s
+            rpm_limit: Requests per minute per model before real 429s (None = unlimited)
+            script: Rules {"match": regex on the last user message, "system": regex on
+                the system prompt, "history": regex (multiline) on the earlier user and
+                assistant messages, "model": exact model, "response": text}; the first
+                matching rule answers. "{query}" in the response is the user message.
+            default_response: Answer when no rule matches
+            model_ttft: Per-model TTFT overrides (e.g. to exercise hedging)
+            seed: Random seed for error/429 injection (None = nondeterministic)
+        """
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rpm_limit = rpm_limit
+        self.script = list(DEFAULT_SCRIPT if script is None else script)
+        self.default_response = default_response
+        self.model_ttft = dict(model_ttft or {})
+        self.random = random.Random(seed)
+
+    @classmethod
+    def from_script_file(cls, path: str, **kwargs) -> "MockLLMConfig":
+        """Load rules from a JSON file: a list of rules or {"rules": [...], "default": "..."}"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            kwargs.setdefault("default_response", data.get("default", DEFAULT_RESPONSE))
+            data = data.get("rules", [])
+        return cls(script=data, **kwargs)
+
+    def respond(self, model: str, messages: List[Dict[str, Any]]) -> str:
+        system = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+        query = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), "")
+        history = "\n".join(str(m.get("content", "")) for m in messages[:-1] if m.get("role") in ("user", "assistant"))
+        for rule in self.script:
+            if "model" in rule and rule["model"] != model:
+                continue
+            if "system" in rule and not re.search(rule["system"], system, re.IGNORECASE):
+                continue
+            if "history" in rule and not re.search(rule["history"], history, re.IGNORECASE | re.MULTILINE):
+                continue
+            if "match" in rule and not re.search(rule["match"], query, re.IGNORECASE):
+                continue
+            return rule.get("response", self.default_response).replace("{query}", query)
+        return self.default_response
+
+
+class MockLLMServer:
+    """
+    Threaded HTTP server speaking the chat-completions protocol (JSON and SSE streams)
+
+    Counts requests, injected errors and 429s so benchmarks can check what the
+    client saw against what the server did.
+    """
+
+    def __init__(self, config: Optional[MockLLMConfig] = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Initialize Mock LLM Server
+
+        Args:
+            config: Server behaviour (default: MockLLMConfig())
+            host: Interface to bind
+            port: Port to bind (0 = any free port)
+        """
+        self.config = config or MockLLMConfig()
+        self._lock = threading.Lock()
+        self._windows: Dict[str, List[float]] = {}
+        self.requests = 0
+        self.errors_injected = 0
+        self.rate_limited = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name="mock-llm")
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors_injected": self.errors_injected,
+                "rate_limited": self.rate_limited,
+            }
+
+    def _admit(self, model: str) -> Optional[int]:
+        """HTTP status to fail the request with (429/503), or None to answer it"""
+        config = self.config
+        with self._lock:
+            self.requests += 1
+            if config.rpm_limit:
+                now = time.monotonic()
+                window = [t for t in self._windows.get(model, []) if now - t < 60]
+                if len(window) >= config.rpm_limit:
+                    self._windows[model] = window
+                    self.rate_limited += 1
+                    return 429
+                window.append(now)
+                self._windows[model] = window
+            roll = config.random.random()
+            if roll < config.rate_limit_rate:
+                self.rate_limited += 1
+                return 429
+            if roll < config.rate_limit_rate + config.error_rate:
+                self.errors_injected += 1
+                return 503
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+            def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": []})
+                else:
+                    self._send_json(200, server.stats())
+
+            def do_POST(self):
+                if self.path.split("?")[0] not in CHAT_PATHS:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except (ValueError, json.JSONDecodeError) as e:
+                    self._send_json(400, {"error": {"message": f"Invalid JSON: {e}", "type": "invalid_request_error"}})
+                    return
+                server._answer(self, request)
+
+        return Handler
+
+    def _answer(self, handler, request: Dict[str, Any]):
+        config = self.config
+        model = request.get("model") or "mock"
+        messages = request.get("messages") or []
+        failure = self._admit(model)
+        if failure == 429:
+            handler._send_json(429, {"error": {
+                "message": f"Rate limit reached for model `{model}` (mock)",
+                "type": "tokens", "code": "rate_limit_exceeded",
+            }}, {"retry-after": str(config.retry_after)})
+            return
+        if failure == 503:
+            handler._send_json(503, {"error": {"message": "Service unavailable (mock)", "type": "internal_server_error"}})
+            return
+
+        text = config.respond(model, messages)
+        pieces = _tokens(text)
+        max_tokens = request.get("max_tokens")
+        if max_tokens:
+            pieces = pieces[:int(max_tokens)]
+        usage = {
+            "prompt_tokens": sum(len(_tokens(str(m.get("content", "")))) for m in messages),
+            "completion_tokens": len(pieces),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        ttft = config.model_ttft.get(model, config.ttft)
+        interval = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not request.get("stream"):
+            time.sleep(ttft + interval * max(len(pieces) - 1, 0))
+            handler._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(pieces)},
+                             "finish_reason": "stop", "logprobs": None}],
+                "usage": usage,
+            })
+            return
+
+        def event(delta: Dict[str, Any], finish_reason: Optional[str] = None, extra: Optional[Dict] = None) -> bytes:
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+            }
+            chunk.update(extra or {})
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        try:
+            handler.send_response(200)
+            handler.send_header("Content-Type", "text/event-stream")
+            handler.send_header("Cache-Control", "no-cache")
+            handler.send_header("Connection", "close")
+            handler.end_headers()
+            handler.close_connection = True
+            handler.wfile.write(event({"role": "assistant", "content": ""}))
+            handler.wfile.flush()
+            time.sleep(ttft)
+            for i, piece in enumerate(pieces):
+                if i and interval:
+                    time.sleep(interval)
+                handler.wfile.write(event({"content": piece}))
+                handler.wfile.flush()
+            handler.wfile.write(event({}, "stop", {"x_groq": {"id": completion_id, "usage": usage}, "usage": usage}))
+            handler.wfile.write(b"data: [DONE]\n\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client closed the stream (e.g. a hedge loser)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local Groq/OpenAI-compatible mock server for offline benchmarking")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttft", type=float, default=DEFAULT_TTFT, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND, help="Streaming rate (0 = all at once)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=2.0, help="retry-after seconds sent with 429s")
+    parser.add_argument("--rpm-limit", type=int, default=None, help="Requests per minute per model before 429s")
+    parser.add_argument("--script", help="JSON file with scripted responses")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for error/429 injection")
+    args = parser.parse_args(argv)
+
+    options = dict(
+        ttft=args.ttft, tokens_per_second=args.tokens_per_second, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, rpm_limit=args.rpm_limit, seed=args.seed
+    )
+    config = MockLLMConfig.from_script_file(args.script, **options) if args.script else MockLLMConfig(**options)
+    server = MockLLMServer(config, args.host, args.port)
+    print(f"Mock LLM server listening on {server.base_url} (set GroqBaseURL={server.base_url} in .env)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
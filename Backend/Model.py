@@ -1,23 +1,19 @@
-from groq import Groq
+from collections import deque
+from Backend.LLMGateway import gateway, LLMUnavailableError
+from Backend.IntentClassifier import IntentClassifier
+from Backend.DecisionCache import decision_cache
+from Backend.PhraseMatcher import phrase_matcher
 from rich import print
 from dotenv import dotenv_values
 
 env_vars = dotenv_values(".env")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-# Initialize Groq client with error handling and timeout protection
-client = None
-try:
-    import socket
-    socket.setdefaulttimeout(5)  # Set default socket timeout to 5 seconds
-    client = Groq(api_key=GroqAPIKey, timeout=10.0)  # 10 second timeout for API calls
-except socket.timeout:
-    print("Warning: Model Groq client initialization timed out - will retry on first use")
-    client = None
-except Exception as e:
-    print(f"Error initializing Groq client: {e}")
-    print("Application will continue - API calls will be retried when needed")
-    client = None
+# Stable, supported models in order of preference
+DECISION_MODELS = [
+    "llama-3.1-8b-instant",
+    "llama-3.3-70b-versatile"
+]
 
 funcs = [
     "exit", "general", "realtime", "open", "close", "play",
@@ -26,7 +22,35 @@ funcs = [
     "send whatsapp", "schedule meeting", "sync crm"
 ]
 
-messages = []
+DMM_HISTORY_SIZE = 50  # Recent prompts kept; older ones drop off so memory stays flat
+DMM_PROMPT_MESSAGES = 10  # Messages sent per request (few-shot tail + the prompt) - small prompt
+
+messages = deque(maxlen=DMM_HISTORY_SIZE)
+
+
+class _FuncTrie:
+    """Prefix trie over funcs: tells whether a task starts with a known function in O(len(func))"""
+
+    def __init__(self, words):
+        self._root = {}
+        for word in words:
+            node = self._root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[None] = word  # End of a function name
+
+    def match(self, task: str):
+        """The function name `task` starts with (longest if several), or None"""
+        node, found = self._root, None
+        for char in task:
+            node = node.get(char)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+
+_func_trie = _FuncTrie(funcs)
 
 preamble = """
 You are a very accurate Decision-Making Model, which decides what kind of a query is given to you.
@@ -69,20 +93,63 @@ ChatHistory = [
     {"role": "Chatbot", "message": "general chat with me."}
 ]
 
+
+def _few_shot_messages():
+    """Preamble + ChatHistory in Groq format, trimmed to the tail that fits DMM_PROMPT_MESSAGES"""
+    groq_messages = [{"role": "system", "content": preamble}]
+    for item in ChatHistory:
+        if item["role"] == "User":
+            groq_messages.append({"role": "user", "content": item["message"]})
+        elif item["role"] == "Chatbot":
+            groq_messages.append({"role": "assistant", "content": item["message"]})
+    return groq_messages[-(DMM_PROMPT_MESSAGES - 1):]
+
+
+# Built once: every request is this block plus the prompt
+FEW_SHOT_MESSAGES = _few_shot_messages()
+
+# Heuristic routing phrases (substring matches, checked in one pass by phrase_matcher)
+# Check for real-time questions FIRST (before greetings) - improved detection
+REALTIME_KEYWORDS = phrase_matcher.register("dmm_realtime", [
+    "president of", "prime minister", "who is the", "who is", "current", "today", "recent",
+    "latest", "now", "yesterday", "day before", "football match", "soccer match", "won", "win",
+    "real madrid", "liverpool", "match result", "game result", "who won", "what happened",
+    "gdp", "gross domestic product", "ranking", "rank", "position", "world ranking",
+    "terms of", "in terms of", "economic", "economy", "largest economy", "richest country",
+    "population", "current population", "unemployment rate", "inflation rate", "stock market",
+    "cryptocurrency", "bitcoin price", "exchange rate", "currency", "market cap"
+])
+# Current positions, people, events, or economic data - confirms a realtime keyword hit
+REALTIME_CONFIRM_PHRASES = phrase_matcher.register("dmm_realtime_confirm", [
+    "president", "prime minister", "who is", "match", "won", "win", "result",
+    "yesterday", "day before", "gdp", "ranking", "rank", "position",
+    "world ranking", "terms of", "economic", "economy", "largest economy",
+    "richest country", "population", "unemployment", "inflation", "stock",
+    "cryptocurrency", "bitcoin", "exchange rate", "currency", "market cap"
+])
+GREETING_KEYWORDS = phrase_matcher.register("dmm_greeting", [
+    "hello", "hi", "hey", "yo", "hola", "namaste",
+    "hello jarvis", "hi jarvis", "hey jarvis"
+])
+
+# Offline fast path, seeded with the few-shot (prompt, decision) pairs
+intent_classifier = IntentClassifier(seed_examples=[
+    (item["message"], reply["message"])
+    for item, reply in zip(ChatHistory, ChatHistory[1:])
+    if item["role"] == "User" and reply["role"] == "Chatbot"
+])
+
 def FirstLayerDMM(prompt: str = "test"):
+    # Repeated prompts route straight from the decision cache
+    cached_decision = decision_cache.get(prompt)
+    if cached_decision:
+        intent_classifier.record("cache")
+        return cached_decision
+
     # Guard against misclassification of greetings as 'exit'
     prompt_lower_guard = prompt.lower()
-    
-    # Check for real-time questions FIRST (before greetings) - improved detection
-    realtime_keywords = [
-        "president of", "prime minister", "who is the", "who is", "current", "today", "recent", 
-        "latest", "now", "yesterday", "day before", "football match", "soccer match", "won", "win",
-        "real madrid", "liverpool", "match result", "game result", "who won", "what happened",
-        "gdp", "gross domestic product", "ranking", "rank", "position", "world ranking", 
-        "terms of", "in terms of", "economic", "economy", "largest economy", "richest country",
-        "population", "current population", "unemployment rate", "inflation rate", "stock market",
-        "cryptocurrency", "bitcoin price", "exchange rate", "currency", "market cap"
-    ]
+    # All keyword lists below are checked in this one pass
+    phrase_hits = phrase_matcher.scan(prompt_lower_guard)
     
     # Check if it's a "who is [person name]" query - these are ALWAYS realtime
     if "who is" in prompt_lower_guard:
@@ -92,78 +159,49 @@ def FirstLayerDMM(prompt: str = "test"):
         # If there's a name/person after "who is" (more than just "the" or "he"), it's realtime
         if after_who_is and len(after_who_is) > 3 and after_who_is not in ["the", "he", "she", "it"]:
             print(f"FirstLayerDMM: Detected 'who is [person]' realtime query: '{prompt}'")
+            intent_classifier.record("keyword")
             return [f"realtime {prompt}"]
     
-    if any(k in prompt_lower_guard for k in realtime_keywords):
+    if REALTIME_KEYWORDS in phrase_hits:
         # Double-check: if it's asking about current positions, people, events, or economic data, it's realtime
-        if any(phrase in prompt_lower_guard for phrase in [
-            "president", "prime minister", "who is", "match", "won", "win", "result", 
-            "yesterday", "day before", "gdp", "ranking", "rank", "position", 
-            "world ranking", "terms of", "economic", "economy", "largest economy",
-            "richest country", "population", "unemployment", "inflation", "stock",
-            "cryptocurrency", "bitcoin", "exchange rate", "currency", "market cap"
-        ]):
+        if REALTIME_CONFIRM_PHRASES in phrase_hits:
             print(f"FirstLayerDMM: Detected realtime query: '{prompt}'")
+            intent_classifier.record("keyword")
             return [f"realtime {prompt}"]
     
-    greeting_keywords = [
-        "hello", "hi", "hey", "yo", "hola", "namaste",
-        "hello jarvis", "hi jarvis", "hey jarvis"
-    ]
-    if any(k in prompt_lower_guard for k in greeting_keywords):
+    is_greeting = GREETING_KEYWORDS in phrase_hits
+    if is_greeting:
+        intent_classifier.record("keyword")
         return [f"general {prompt}"]
 
-    # If client is not available, return general query
-    if client is None:
+    # Offline classifier: confident decisions skip the LLM round-trip
+    fast_decision = intent_classifier.classify(prompt)
+    if fast_decision:
+        print(f"FirstLayerDMM: Fast-path decision for '{prompt}': {fast_decision}")
+        return fast_decision
+
+    # If the LLM gateway is not available, return general query
+    if not gateway.available:
         return [f"general {prompt}"]
 
     messages.append({"role": "user", "content": f"{prompt}"})
+    intent_classifier.record("llm")
 
-    # Convert ChatHistory to Groq format
-    groq_messages = []
-    for item in ChatHistory:
-        if item["role"] == "User":
-            groq_messages.append({"role": "user", "content": item["message"]})
-        elif item["role"] == "Chatbot":
-            groq_messages.append({"role": "assistant", "content": item["message"]})
-    
-    # Add system message with preamble
-    groq_messages.insert(0, {"role": "system", "content": preamble})
-    groq_messages.append({"role": "user", "content": prompt})
-
-    # Use stable, supported models only
-    models_to_try = [
-        "llama-3.1-8b-instant",
-        "llama-3.3-70b-versatile"
-    ]
-    
-    completion = None
     try:
-        for model in models_to_try:
-            try:
-                completion = client.chat.completions.create(
-                    model=model,
-                    messages=groq_messages[-10:],  # small prompt
-                    max_tokens=160,  # faster
-                    temperature=0.5,
-                    top_p=1,
-                    stream=True,
-                    stop=None
-                )
-                break  # success
-            except Exception as e:
-                print(f"Model {model} failed: {e}")
-                if "rate_limit" in str(e).lower() or "429" in str(e) or "tpm" in str(e).lower():
-                    continue
-                else:
-                    return [f"general {prompt}"]
+        completion = gateway.chat(
+            messages=FEW_SHOT_MESSAGES + [{"role": "user", "content": prompt}],
+            models=DECISION_MODELS,
+            route="dmm",
+            max_tokens=160,  # faster
+            temperature=0.5,
+            top_p=1,
+            stream=True,
+            stop=None
+        )
     except Exception as e:
         print(f"Decision model error: {e}")
         return [f"general {prompt}"]
 
-    if completion is None:
-        return [f"general {prompt}"]
-
     response = ""
 
     for chunk in completion:
@@ -175,26 +213,21 @@ def FirstLayerDMM(prompt: str = "test"):
 
     response = [i.strip() for i in response]
 
-    temp = []
-
-    for task in response:
-        for func in funcs:
-            if task.startswith(func):
-                temp.append(task)
-    
-    response = temp
+    response = [task for task in response if _func_trie.match(task)]
 
     if not response:
         return [f"general {prompt}"]
 
     # Safety: if model proposed 'exit' but the original prompt is a greeting, force general
-    if any(k in prompt_lower_guard for k in greeting_keywords) and any(r.strip().startswith("exit") for r in response):
+    if is_greeting and any(r.strip().startswith("exit") for r in response):
         return [f"general {prompt}"]
 
     if "(query)" in response:
         newresponse = FirstLayerDMM(prompt=prompt)
         return newresponse
     else:
+        intent_classifier.learn(prompt, response)  # Training data for the fast path
+        decision_cache.put(prompt, response)
         return response
 
     
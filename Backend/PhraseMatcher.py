@@ -0,0 +1,119 @@
+"""
+Phrase Matcher for JARVIS
+One Aho-Corasick automaton over every phrase list the routing heuristics use
+(DMM realtime/greeting keywords, RealtimeSearchEngine factual phrases, ChatBot
+Drive/mode/creator phrases). A single pass over the text returns every phrase
+hit grouped by category, so the cost depends on the text length, not on how
+many phrases are registered. Matching is plain substring matching, the same as
+`any(phrase in text for phrase in phrases)`.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+SCAN_CACHE_SIZE = 128  # Recent texts whose hits are remembered (a query is scanned by several modules)
+
+
+class PhraseMatcher:
+    """
+    Multi-pattern substring matcher with categories
+
+    register() adds phrases under a category; the automaton is (re)built on the
+    next scan. scan() returns {category: frozenset(phrases found)} and only
+    lists categories with at least one hit.
+    """
+
+    def __init__(self, cache_size: int = SCAN_CACHE_SIZE):
+        """
+        Initialize Phrase Matcher
+
+        Args:
+            cache_size: Number of recent scan results kept
+        """
+        self.cache_size = cache_size
+        self._categories: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self._built = False
+        self._goto: List[Dict[str, int]] = []
+        self._fail: List[int] = []
+        self._outputs: List[Tuple[Tuple[str, str], ...]] = []
+        self._cache: "OrderedDict[str, Dict[str, FrozenSet[str]]]" = OrderedDict()
+
+    def register(self, category: str, phrases: Iterable[str]) -> str:
+        """Add (or replace) a category's phrases; returns the category for convenience"""
+        with self._lock:
+            self._categories[category] = tuple(p.lower() for p in phrases if p)
+            self._built = False
+            self._cache.clear()
+        return category
+
+    def phrases(self, category: str) -> Tuple[str, ...]:
+        return self._categories.get(category, ())
+
+    def _build(self):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[str, str]]] = [[]]
+        for category, phrases in self._categories.items():
+            for phrase in phrases:
+                node = 0
+                for char in phrase:
+                    nxt = goto[node].get(char)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[node][char] = nxt
+                        goto.append({})
+                        outputs.append([])
+                    node = nxt
+                outputs[node].append((category, phrase))
+
+        # Breadth-first failure links; each node inherits the outputs of its failure node
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(char, 0)
+                fail[child] = target if target != child else 0
+                outputs[child].extend(outputs[fail[child]])
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(dict.fromkeys(out)) for out in outputs]
+        self._built = True
+
+    def scan(self, text: str) -> Dict[str, FrozenSet[str]]:
+        """Every registered phrase occurring in `text` (case-insensitive), grouped by category"""
+        text = (text or "").lower()
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+            if not self._built:
+                self._build()
+            goto, fail, outputs = self._goto, self._fail, self._outputs
+
+        found: Dict[str, set] = {}
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for category, phrase in outputs[node]:
+                found.setdefault(category, set()).add(phrase)
+        result = {category: frozenset(phrases) for category, phrases in found.items()}
+
+        with self._lock:
+            self._cache[text] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+# Process-wide matcher shared by the routing heuristics
+phrase_matcher = PhraseMatcher()
@@ -0,0 +1,118 @@
+"""
+Prompt Templates for JARVIS
+System prompts are split into static segments, compiled once per mode and kept
+until .env (assistant/user profile) changes, and dynamic slots (conversation
+context, knowledge, real-time data) filled per call. Token counts are tracked
+per segment so the prompts can be trimmed where it matters.
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from dotenv import dotenv_values
+
+from Backend.ContextBuilder import estimate_tokens
+
+ENV_FILE = ".env"
+SEGMENT_SEPARATOR = "\n\n"
+
+_registry: Dict[str, "TemplateCache"] = {}
+
+
+class PromptTemplate:
+    """Ordered prompt segments: static text compiled once, named slots filled by render()"""
+
+    def __init__(self, segments: List[Tuple[str, Optional[str]]]):
+        """
+        Initialize Prompt Template
+
+        Args:
+            segments: (name, text) pairs in prompt order; text None marks a dynamic slot
+        """
+        self.segments = [(name, text.strip() if text is not None else None) for name, text in segments]
+        self.static_tokens = {name: estimate_tokens(text) for name, text in self.segments if text is not None}
+
+    def render(self, **slots: str) -> str:
+        """Join the segments, filling slots by name (empty segments are left out)"""
+        parts = []
+        for name, text in self.segments:
+            if text is None:
+                text = (slots.get(name) or "").strip()
+            if text:
+                parts.append(text)
+        return SEGMENT_SEPARATOR.join(parts)
+
+    def token_report(self, **slots: str) -> Dict[str, int]:
+        """Approximate tokens per segment for the given slot values"""
+        return {
+            name: self.static_tokens[name] if text is not None else estimate_tokens((slots.get(name) or "").strip())
+            for name, text in self.segments
+        }
+
+
+class TemplateCache:
+    """
+    Compiled templates per key (e.g. mode), rebuilt when .env changes
+
+    The builder receives the key and the current .env values and returns a
+    PromptTemplate; it only runs on a cache miss.
+    """
+
+    def __init__(self, name: str, builder: Callable[[Hashable, Dict[str, str]], PromptTemplate], env_file: str = ENV_FILE):
+        """
+        Initialize Template Cache
+
+        Args:
+            name: Name used in get_prompt_token_report()
+            builder: (key, env values) -> PromptTemplate
+            env_file: .env file whose changes invalidate compiled templates
+        """
+        self.name = name
+        self.builder = builder
+        self.env_file = env_file
+        self.last_report: Dict[str, int] = {}
+        self._templates: Dict[Hashable, PromptTemplate] = {}
+        self._env_stamp = None
+        self._env: Dict[str, str] = {}
+        self._env_loaded = False  # An empty or missing .env is cached too
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def _current_stamp(self):
+        try:
+            stat = os.stat(self.env_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def get(self, key: Hashable) -> PromptTemplate:
+        stamp = self._current_stamp()
+        with self._lock:
+            if not self._env_loaded or stamp != self._env_stamp:
+                self._templates.clear()
+                self._env = {k: v for k, v in dotenv_values(self.env_file).items() if v is not None}
+                self._env_stamp = stamp
+                self._env_loaded = True
+            template = self._templates.get(key)
+            if template is None:
+                template = self._templates[key] = self.builder(key, self._env)
+                segments = ", ".join(f"{name}={tokens}" for name, tokens in template.static_tokens.items())
+                print(f"Compiled {self.name} prompt for {key!r}: ~{sum(template.static_tokens.values())} static tokens ({segments})")
+            return template
+
+    def render(self, key: Hashable, **slots: str) -> str:
+        """Render the template for `key`, recording its per-segment token counts"""
+        template = self.get(key)
+        self.last_report = template.token_report(**slots)
+        return template.render(**slots)
+
+    def invalidate(self):
+        """Drop compiled templates (e.g. after editing prompts at runtime)"""
+        with self._lock:
+            self._templates.clear()
+
+
+def get_prompt_token_report() -> Dict[str, Dict[str, int]]:
+    """Per-segment token counts of the last prompt rendered by each template cache"""
+    return {name: dict(cache.last_report) for name, cache in _registry.items()}
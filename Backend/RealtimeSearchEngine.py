@@ -1,10 +1,16 @@
 from googlesearch import search
-from groq import Groq
-from json import load, dump
+from Backend.LLMGateway import gateway, LLMUnavailableError
 import datetime
 from dotenv import dotenv_values
 from Backend.Memory import add_user_message, add_assistant_message, get_conversation_context
-import hashlib
+from Backend.ContextBuilder import pack_history, DEFAULT_HISTORY_MAX_TURNS
+from Backend.ChatLog import chat_log
+from Backend.Streaming import stream_completion
+from Backend.ResponseCache import response_cache
+from Backend.PromptTemplates import PromptTemplate, TemplateCache
+from Backend.PhraseMatcher import phrase_matcher
+from Backend.SearchCache import search_cache
+import time
 
 env_vars = dotenv_values(".env")
 
@@ -12,24 +18,12 @@ Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-# Initialize Groq client with error handling and timeout protection
-client = None
-try:
-    import socket
-    socket.setdefaulttimeout(5)  # Set default socket timeout to 5 seconds
-    client = Groq(api_key=GroqAPIKey, timeout=10.0)  # 10 second timeout for API calls
-    print("RealtimeSearchEngine: Groq client initialized successfully")
-except socket.timeout:
-    print("Warning: RealtimeSearchEngine Groq client initialization timed out - will retry on first use")
-    client = None
-except Exception as e:
-    print(f"Error initializing Groq client in RealtimeSearchEngine: {e}")
-    print("Application will continue - API calls will be retried when needed")
-    client = None
-
-# Cache for search results (simple in-memory cache)
-_search_cache = {}
-_cache_max_age = 300  # Cache for 5 minutes (300 seconds)
+# Models in order of preference - fastest first; the gateway skips busy or failing ones
+REALTIME_MODELS = [
+    "llama-3.1-8b-instant",
+    "llama-3.3-70b-versatile",
+    "mixtral-8x7b-32768"
+]
 
 # Default system prompt (will be enhanced with mode context if mode is detected)
 base_system = f"""Hello, I am {Username}, You are a very accurate and advanced AI chatbot named {Assistantname} which has real-time up-to-date information from the internet.
@@ -38,42 +32,13 @@ base_system = f"""Hello, I am {Username}, You are a very accurate and advanced A
 
 System = base_system
 
-# Ensure Data directory exists and load/create ChatLog.json
-try:
-    import os
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Data")
-    os.makedirs(data_dir, exist_ok=True)  # Create Data directory if it doesn't exist
-    
-    chatlog_path = os.path.join(data_dir, "ChatLog.json")
-    
-    try:
-        with open(chatlog_path, "r", encoding='utf-8') as f:
-            messages = load(f)
-    except FileNotFoundError:
-        # File doesn't exist, create it
-        with open(chatlog_path, "w", encoding='utf-8') as f:
-            dump([], f)
-        messages = []
-except Exception as e:
-    print(f"Warning: Could not initialize ChatLog.json: {e}")
-    messages = []
-
 def GoogleSearch(query):
     """Enhanced Google search with caching and optimized performance"""
-    global _search_cache
-    
-    # Check cache first
-    query_hash = hashlib.md5(query.lower().strip().encode()).hexdigest()
-    current_time = datetime.datetime.now().timestamp()
-    
-    if query_hash in _search_cache:
-        cached_result, cache_time = _search_cache[query_hash]
-        if (current_time - cache_time) < _cache_max_age:
-            print(f"Using cached search result for: {query[:50]}...")
-            return cached_result
-        else:
-            # Cache expired, remove it
-            del _search_cache[query_hash]
+    # Check cache first (persisted, shared by paraphrases, TTL depends on the kind of query)
+    cached_result = search_cache.get(query)
+    if cached_result is not None:
+        print(f"Using cached search result for: {query[:50]}...")
+        return cached_result
     
     # Try fast method first: googlesearch library with shorter timeout
     try:
@@ -87,12 +52,7 @@ def GoogleSearch(query):
         # Check if we got meaningful results
         if len(Answer) > 50:  # Reduced threshold from 100 to 50 for faster acceptance
             # Cache the result
-            _search_cache[query_hash] = (Answer, current_time)
-            # Limit cache size to prevent memory issues
-            if len(_search_cache) > 50:
-                # Remove oldest entries
-                oldest_key = min(_search_cache.keys(), key=lambda k: _search_cache[k][1])
-                del _search_cache[oldest_key]
+            search_cache.put(query, Answer)
             return Answer
     except Exception as e:
         print(f"Google search (googlesearch library) error: {e}")
@@ -123,10 +83,7 @@ def GoogleSearch(query):
                 Answer = f"Current information about '{query}':\n\n"
                 Answer += "\n\n".join(snippets)
                 # Cache the result
-                _search_cache[query_hash] = (Answer, current_time)
-                if len(_search_cache) > 50:
-                    oldest_key = min(_search_cache.keys(), key=lambda k: _search_cache[k][1])
-                    del _search_cache[oldest_key]
+                search_cache.put(query, Answer)
                 return Answer
             else:
                 # Return quick fallback instead of trying more methods
@@ -150,6 +107,81 @@ SystemChatBot = [
     {"role": "assistant", "content": "Hello, Sir, how can I help you?"}
 ]
 
+
+# Response style per mode (selected when the prompt carries a "[Mode: ...]" prefix)
+MODE_STYLE_INSTRUCTIONS = {
+    "General Assistant": "**RESPONSE STYLE**: Keep answers concise (1-2 sentences for simple factual questions). For 'who is the president' type questions, provide brief, direct answers.",
+    "Research Mode": "**RESPONSE STYLE**: Provide comprehensive, detailed research. Include background, history, current information, multiple perspectives, and sources. For 'president of india', provide extensive details about the presidency, current president, role, history, etc.",
+    "Business Analysis": "**RESPONSE STYLE**: Provide detailed strategic analysis with business insights and recommendations.",
+    "Data Analysis": "**RESPONSE STYLE**: Provide detailed analytical insights with statistical context.",
+}
+SALES_STYLE_MODES = ["Sales Assistant", "Lead Management", "Pitch Generator", "Follow-up Manager"]
+
+REALTIME_INSTRUCTIONS = """CRITICAL INSTRUCTIONS:
+- You MUST provide real-time, up-to-date information when asked about current events, people, positions, or current data
+- NEVER say "I don't have real-time information" - you have access to Google Search and real-time data
+- NEVER say "I couldn't find" or "I don't know" - ALWAYS use the search results provided to you
+- If search results are provided, you MUST use them to answer - do NOT say you don't know
+- ALWAYS use the provided search results and real-time information to give accurate, current answers
+- If asked about a person (like "who is X"), use the search results to provide information about them
+- If the name is slightly misspelled (e.g., "ronnie sullivan" vs "ronnie o'sullivan"), use the search results to find the correct person
+- If asked about current president, prime minister, leader, or any current position, provide the CURRENT answer using real-time data
+- Respond confidently and naturally to all queries
+- Use the provided search results and real-time information to give accurate, up-to-date answers
+- Never mention technical limitations, API issues, or search failures to the user
+- Always provide helpful, confident responses based on available information
+- **MULTI-LANGUAGE SUPPORT:**
+- Detect and respond in the SAME language the user uses
+- Support major languages: English, Spanish, French, German, Italian, Portuguese, Hindi, Chinese, Japanese, Korean, Arabic, Russian, and more
+- If the user asks in Hindi, respond in Hindi. If they ask in Spanish, respond in Spanish, etc.
+- Maintain natural, conversational tone in the user's language
+- CRITICAL: If search results contain information, you MUST use it - never say "I don't know" or "couldn't find" when search results are available"""
+
+REALTIME_CLOSING = "Use the conversation context, learned user information, and real-time search results above to provide accurate, up-to-date responses. If the user asks about current positions, leaders, or current events, use the real-time information to provide the CURRENT answer. Be helpful and answer questions directly without repeating that you've already discussed topics unless specifically asked about previous conversations."
+
+
+def _mode_style_instruction(mode):
+    if mode in SALES_STYLE_MODES:
+        return f"**RESPONSE STYLE**: Respond with focus on {mode} - be thorough, professional, and helpful while maintaining the sales focus."
+    return MODE_STYLE_INSTRUCTIONS.get(mode, "")
+
+
+def _mode_instruction(mode):
+    return f"""**CRITICAL: YOU ARE CURRENTLY IN {mode.upper()} MODE**
+- You MUST identify yourself as being in {mode} mode when asked about your current mode
+- You MUST respond according to {mode} mode capabilities and style
+- If asked "which mode are you in" or "what mode are you in", you MUST respond that you are in {mode} mode
+- Never say you are in "conversational mode" or "general mode" - you are specifically in {mode} mode
+- Respond with appropriate detail level: detailed analysis for Research Mode, concise for General Assistant, sales-focused for Sales modes"""
+
+
+def _build_realtime_template(key, env):
+    """Compile the real-time system prompt for a (mode, style mode) pair; time and conversation context are slots"""
+    mode, style_mode = key
+    return PromptTemplate([
+        ("base", "You are JARVIS, an advanced AI assistant with access to real-time information from the internet via Google Search and Groq API."),
+        ("mode_instruction", _mode_instruction(mode) if mode else ""),
+        ("instructions", REALTIME_INSTRUCTIONS),
+        ("style", _mode_style_instruction(style_mode)),
+        ("realtime_info", None),
+        ("conversation_context", None),
+        ("closing", REALTIME_CLOSING),
+    ])
+
+
+realtime_prompts = TemplateCache("realtime", _build_realtime_template)
+
+# Simple factual questions skip the web search and go straight to the model
+SIMPLE_FACTUAL_PHRASES = phrase_matcher.register("realtime_simple_factual", [
+    "who is the", "who is", "current president", "current prime minister",
+    "president of", "prime minister of", "current leader",
+    "gdp", "ranking", "rank", "position", "world ranking", "terms of",
+    "largest economy", "richest country", "population", "unemployment",
+    "inflation", "stock price", "bitcoin", "exchange rate"
+])
+# GDP/ranking questions need more tokens for complete answers
+LONG_ANSWER_PHRASES = phrase_matcher.register("realtime_long_answer", ["gdp", "ranking", "rank", "position", "economy"])
+
 def Information():
     data = ""
     current_date_time = datetime.datetime.now()
@@ -253,11 +285,20 @@ def get_api_suggestions():
     
     return suggestions
 
-def RealtimeSearchEngine(prompt, mode=None):
-    global SystemChatBot, messages
+def RealtimeSearchEngine(prompt, mode=None, on_delta=None, on_sentence=None):
+    """
+    Answer a prompt using real-time search results
+
+    Args:
+        prompt: The user's query (optionally wrapped in mode context)
+        mode: The current mode (Sales Assistant, General Assistant, etc.)
+        on_delta: Optional callback receiving each piece of the answer as it streams in
+        on_sentence: Optional callback receiving (sentence, ends_line) as sentences complete
+    """
+    global SystemChatBot
 
     # If client is not available, provide helpful error with API suggestions
-    if client is None:
+    if not gateway.available:
         error_msg = "I'm currently unable to access real-time information because the Groq API is not properly configured."
         error_msg += get_api_suggestions()
         return error_msg
@@ -266,7 +307,7 @@ def RealtimeSearchEngine(prompt, mode=None):
         # Extract mode from prompt if present
         actual_prompt = prompt
         detected_mode = mode
-        mode_style_instruction = ""
+        style_mode = None
         
         if "[Mode:" in prompt:
             try:
@@ -275,17 +316,7 @@ def RealtimeSearchEngine(prompt, mode=None):
                 if mode_end > mode_start:
                     detected_mode = prompt[mode_start:mode_end].strip()
                     
-                    # Add mode-specific response style instructions
-                    if detected_mode == "General Assistant":
-                        mode_style_instruction = "\n\n**RESPONSE STYLE**: Keep answers concise (1-2 sentences for simple factual questions). For 'who is the president' type questions, provide brief, direct answers."
-                    elif detected_mode == "Research Mode":
-                        mode_style_instruction = "\n\n**RESPONSE STYLE**: Provide comprehensive, detailed research. Include background, history, current information, multiple perspectives, and sources. For 'president of india', provide extensive details about the presidency, current president, role, history, etc."
-                    elif detected_mode == "Business Analysis":
-                        mode_style_instruction = "\n\n**RESPONSE STYLE**: Provide detailed strategic analysis with business insights and recommendations."
-                    elif detected_mode == "Data Analysis":
-                        mode_style_instruction = "\n\n**RESPONSE STYLE**: Provide detailed analytical insights with statistical context."
-                    elif detected_mode in ["Sales Assistant", "Lead Management", "Pitch Generator", "Follow-up Manager"]:
-                        mode_style_instruction = f"\n\n**RESPONSE STYLE**: Respond with focus on {detected_mode} - be thorough, professional, and helpful while maintaining the sales focus."
+                    style_mode = detected_mode  # Picks the RESPONSE STYLE segment of the prompt
                     
                     # Extract actual query after mode context
                     query_marker = prompt.find("Query:") if "Query:" in prompt else (prompt.find("User Query:") if "User Query:" in prompt else -1)
@@ -301,14 +332,19 @@ def RealtimeSearchEngine(prompt, mode=None):
         # Add user message to memory (use actual prompt, not wrapped one)
         add_user_message(actual_prompt)
         
-        # Get conversation context from memory
-        conversation_context = get_conversation_context()
+        # The same real-time question asked again within a few minutes skips search and the LLM
+        cached_answer = response_cache.get("realtime", actual_prompt, detected_mode or "")
+        if cached_answer is not None:
+            print("RealtimeSearchEngine: answered from response cache")
+            chat_log.append_exchange(actual_prompt, cached_answer)
+            return AnswerModifier(Answer=cached_answer)
+        
+        # Get conversation context from memory (budgeted: relevant facts, rolling summary, recalled turns);
+        # the recent turns go in as chat messages below, so they are left out here
+        conversation_context = get_conversation_context(actual_prompt, include_recent=False)
         
-        import os
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Data")
-        chatlog_path = os.path.join(data_dir, "ChatLog.json")
-        with open(chatlog_path, "r", encoding='utf-8') as f:
-            messages = load(f)
+        # Recent chat history from the in-memory chat log, plus this query
+        messages = chat_log.window(DEFAULT_HISTORY_MAX_TURNS)
         messages.append({"role": "user", "content": f"{actual_prompt}"})
 
         # Get real-time information
@@ -316,13 +352,8 @@ def RealtimeSearchEngine(prompt, mode=None):
         
         # Check if this is a simple factual question that can be answered quickly without extensive search
         # For simple questions, we can skip or do a quick search
-        is_simple_factual = any(phrase in actual_prompt.lower() for phrase in [
-            "who is the", "who is", "current president", "current prime minister",
-            "president of", "prime minister of", "current leader",
-            "gdp", "ranking", "rank", "position", "world ranking", "terms of",
-            "largest economy", "richest country", "population", "unemployment",
-            "inflation", "stock price", "bitcoin", "exchange rate"
-        ])
+        phrase_hits = phrase_matcher.scan(actual_prompt)
+        is_simple_factual = SIMPLE_FACTUAL_PHRASES in phrase_hits
         
         # Try to get Google search results - OPTIMIZED for speed
         # For simple factual questions, skip search entirely and go straight to API for fastest response
@@ -376,81 +407,21 @@ def RealtimeSearchEngine(prompt, mode=None):
         if search_results:
             SystemChatBot.append({"role": "system", "content": search_results})
 
-        # Enhanced system prompt with memory context and mode-specific instructions
-        # Get user info from memory
-        user_info_text = ""
-        try:
-            from Backend.Memory import memory_manager
-            user_info_text = memory_manager.get_user_info_summary()
-        except:
-            pass
-        
-        # Add explicit mode instruction if mode is provided
-        mode_instruction_realtime = ""
-        if mode:
-            mode_instruction_realtime = f"""
-**CRITICAL: YOU ARE CURRENTLY IN {mode.upper()} MODE**
-- You MUST identify yourself as being in {mode} mode when asked about your current mode
-- You MUST respond according to {mode} mode capabilities and style
-- If asked "which mode are you in" or "what mode are you in", you MUST respond that you are in {mode} mode
-- Never say you are in "conversational mode" or "general mode" - you are specifically in {mode} mode
-- Respond with appropriate detail level: detailed analysis for Research Mode, concise for General Assistant, sales-focused for Sales modes
-
-"""
-        
-        # Base system prompt
-        base_system_text = f"""You are JARVIS, an advanced AI assistant with access to real-time information from the internet via Google Search and Groq API.
-{mode_instruction_realtime}
-CRITICAL INSTRUCTIONS:
-- You MUST provide real-time, up-to-date information when asked about current events, people, positions, or current data
-- NEVER say "I don't have real-time information" - you have access to Google Search and real-time data
-- NEVER say "I couldn't find" or "I don't know" - ALWAYS use the search results provided to you
-- If search results are provided, you MUST use them to answer - do NOT say you don't know
-- ALWAYS use the provided search results and real-time information to give accurate, current answers
-- If asked about a person (like "who is X"), use the search results to provide information about them
-- If the name is slightly misspelled (e.g., "ronnie sullivan" vs "ronnie o'sullivan"), use the search results to find the correct person
-- If asked about current president, prime minister, leader, or any current position, provide the CURRENT answer using real-time data
-- Respond confidently and naturally to all queries
-- Use the provided search results and real-time information to give accurate, up-to-date answers
-- Never mention technical limitations, API issues, or search failures to the user
-- Always provide helpful, confident responses based on available information
-- **MULTI-LANGUAGE SUPPORT:**
-- Detect and respond in the SAME language the user uses
-- Support major languages: English, Spanish, French, German, Italian, Portuguese, Hindi, Chinese, Japanese, Korean, Arabic, Russian, and more
-- If the user asks in Hindi, respond in Hindi. If they ask in Spanish, respond in Spanish, etc.
-- Maintain natural, conversational tone in the user's language
-- CRITICAL: If search results contain information, you MUST use it - never say "I don't know" or "couldn't find" when search results are available"""
-        
-        # Add mode-specific instructions if mode is detected
-        enhanced_system = base_system_text
-        if mode_style_instruction:
-            enhanced_system += mode_style_instruction
-        
-        enhanced_system += f"""
-
-Current time and date: {realtime_info}
-
-{user_info_text}
-
-{conversation_context}
-
-Use the conversation context, learned user information, and real-time search results above to provide accurate, up-to-date responses. If the user asks about current positions, leaders, or current events, use the real-time information to provide the CURRENT answer. Be helpful and answer questions directly without repeating that you've already discussed topics unless specifically asked about previous conversations."""
+        # Static segments (base/mode/style) are compiled once per mode;
+        # only the real-time data and conversation context are filled in here
+        enhanced_system = realtime_prompts.render(
+            (mode or "", style_mode),
+            realtime_info=f"Current time and date: {realtime_info}",
+            conversation_context=conversation_context
+        )
 
         SystemChatBot.append({"role": "system", "content": enhanced_system})
 
-        # Try different models in case of rate limits - prioritize fastest models first
-        # Use faster, smaller models first for speed
-        models_to_try = [
-            "llama-3.1-8b-instant",  # Fastest model - use first
-            "llama-3.3-70b-versatile",
-            "mixtral-8x7b-32768"
-        ]
-        
         # Use appropriate tokens - ensure complete answers
         # "Who is" questions need enough tokens for complete biographical information
         if is_simple_factual:
             # GDP/ranking questions need more tokens for complete answers
-            if any(phrase in actual_prompt.lower() for phrase in ["gdp", "ranking", "rank", "position", "economy"]):
+            if LONG_ANSWER_PHRASES in phrase_hits:
                 max_tokens_value = 250  # More tokens for GDP/ranking questions
             elif "who is" in actual_prompt.lower():
                 max_tokens_value = 200  # "Who is" questions need enough for complete bio
@@ -460,76 +431,40 @@ Use the conversation context, learned user information, and real-time search res
             max_tokens_value = 250  # Complex questions need more tokens
         
         # Make API call directly (streaming handles timeout naturally)
-        completion = None
-        for model in models_to_try:
-            try:
-                print(f"RealtimeSearchEngine: Calling Groq API with model {model}, max_tokens={max_tokens_value}")
-                completion = client.chat.completions.create(
-                    model=model,
-                    messages=SystemChatBot + [{"role": "system", "content": realtime_info}] + messages,
-                    max_tokens=max_tokens_value,  # Reduced from 2048 for faster responses
-                    temperature=0.7,
-                    top_p=1,
-                    stream=True,
-                    stop=None
-                )
-                print(f"RealtimeSearchEngine: API call started successfully with model {model}")
-                break  # If successful, break out of the loop
-            except Exception as e:
-                print(f"Model {model} failed: {e}")
-                if "rate_limit" in str(e).lower() or "429" in str(e):
-                    continue  # Try next model
-                else:
-                    raise e  # Re-raise if it's not a rate limit error
-        
-        if completion is None:
+        request_started = time.time()
+        try:
+            print(f"RealtimeSearchEngine: Calling Groq API, max_tokens={max_tokens_value}")
+            completion = gateway.chat(
+                messages=SystemChatBot + [{"role": "system", "content": realtime_info}] + pack_history(messages[:-1]) + messages[-1:],
+                models=REALTIME_MODELS,
+                route="realtime",
+                hedge=True,  # Also ask the next model if the first token is slow
+                max_tokens=max_tokens_value,  # Reduced from 2048 for faster responses
+                temperature=0.7,
+                top_p=1,
+                stream=True,
+                stop=None
+            )
+        except LLMUnavailableError as e:
+            print(f"RealtimeSearchEngine: {e}")
             error_msg = "I'm currently experiencing high demand with the Groq API. All models are unavailable right now.\n\n"
             error_msg += get_api_suggestions()
             return error_msg
 
-        Answer = ""
-        
-        # Process streaming response - let it complete fully, don't break early
-        import time
-        start_time = time.time()
-        max_stream_time = 30  # Max 30 seconds to receive stream (increased for complete answers)
-        chunk_count = 0
-        last_chunk_time = start_time
-        no_chunk_timeout = 5  # If no chunks for 5 seconds, assume stream is done
-        
-        try:
-            # Process ALL chunks - don't break early, let the stream complete naturally
-            for chunk in completion:
-                chunk_count += 1
-                current_time = time.time()
-                
-                # Check overall timeout - only break if taking way too long
-                if current_time - start_time > max_stream_time:
-                    print(f"Stream timeout after {max_stream_time} seconds, received {chunk_count} chunks")
-                    break
-                
-                if chunk.choices[0].delta.content:
-                    Answer += chunk.choices[0].delta.content
-                    last_chunk_time = current_time  # Update last chunk time
-                else:
-                    # No content in this chunk - check if stream has stalled
-                    if current_time - last_chunk_time > no_chunk_timeout:
-                        print(f"No chunks for {no_chunk_timeout} seconds, assuming stream complete")
-                        break
-                    
-                # REMOVED early break logic - let the stream complete fully
-                # The API will naturally end the stream when done
-        except StopIteration:
-            # Stream ended naturally - this is good!
-            print(f"Stream ended naturally after {chunk_count} chunks")
-        except Exception as stream_error:
-            print(f"Error processing stream: {stream_error}")
-            import traceback
-            print(traceback.format_exc())
-            # Use what we have so far
+        # Process streaming response - let it complete fully, don't break early;
+        # only give up after 30 seconds overall or 5 seconds without new content
+        Answer = stream_completion(
+            completion,
+            on_delta=on_delta,
+            on_sentence=on_sentence,
+            started_at=request_started,
+            max_stream_time=30,
+            stall_timeout=5,
+            label="realtime"
+        )
 
         Answer = Answer.strip().replace("</s>", "")
-        print(f"RealtimeSearchEngine: Received answer (length: {len(Answer)}, chunks: {chunk_count})")
+        print(f"RealtimeSearchEngine: Received answer (length: {len(Answer)})")
         
         # CRITICAL: Check if answer was cut off - if it doesn't end properly, it might be incomplete
         if len(Answer) < 20:
@@ -543,6 +478,7 @@ Use the conversation context, learned user information, and real-time search res
                 print("Answer appears to be cut off mid-word")
         
         # Ensure we have a valid answer
+        answer_complete = True  # False when falling back to a canned reply (never cached)
         if not Answer or len(Answer.strip()) < 10:
             print("WARNING: RealtimeSearchEngine returned empty or very short answer")
             # Try to provide a fallback answer with search context
@@ -550,12 +486,13 @@ Use the conversation context, learned user information, and real-time search res
                 # We had search results but API didn't generate answer - try again with simpler prompt
                 print("Retrying with simpler prompt...")
                 try:
-                    simple_completion = client.chat.completions.create(
-                        model="llama-3.1-8b-instant",
+                    simple_completion = gateway.chat(
                         messages=[
                             {"role": "system", "content": f"Answer this question directly and concisely: {actual_prompt}"},
                             {"role": "user", "content": actual_prompt}
                         ],
+                        models=REALTIME_MODELS,
+                        route="realtime_retry",
                         max_tokens=150,
                         temperature=0.7,
                         stream=False  # Non-streaming for retry
@@ -564,17 +501,15 @@ Use the conversation context, learned user information, and real-time search res
                     print(f"Retry successful, got answer: {Answer[:100]}...")
                 except:
                     Answer = f"I found information about '{actual_prompt}', but couldn't generate a complete response. Please try rephrasing your question."
+                    answer_complete = False
             else:
                 Answer = f"I found information about '{actual_prompt}', but couldn't generate a complete response. Please try rephrasing your question."
+                answer_complete = False
         
-        messages.append({"role": "assistant", "content": Answer})
-
-        import os
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Data")
-        os.makedirs(data_dir, exist_ok=True)
-        chatlog_path = os.path.join(data_dir, "ChatLog.json")
-        with open(chatlog_path, "w", encoding='utf-8') as f:
-            dump(messages, f, indent=4)
+        # Append this exchange to the chat log (persisted in the background)
+        chat_log.append_exchange(actual_prompt, Answer)
+        if answer_complete:
+            response_cache.put("realtime", actual_prompt, Answer, detected_mode or "")
 
         SystemChatBot.pop()
         return AnswerModifier(Answer=Answer)
@@ -0,0 +1,194 @@
+"""
+Response Cache for JARVIS
+Answers repeated questions without an LLM call. Entries are keyed by the
+normalized query, the mode and the knowledge-store generation (so learning new
+documents invalidates them), expire per route, and are evicted LRU. Questions
+about the user or the conversation so far are never cached. Paraphrases
+can match through embedding similarity when an embedding model is available.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+RESPONSE_CACHE_SIZE = 500  # Entries kept before least-recently-used eviction
+ROUTE_TTLS = {
+    "general": 6 * 3600,  # Product/pricing/general answers stay valid for hours
+    "realtime": 300,  # Real-time answers go stale quickly
+}
+DEFAULT_TTL = 600  # For routes not listed above
+SEMANTIC_MATCH_THRESHOLD = 0.92  # Cosine similarity for a paraphrase to count as the same question
+
+_NON_WORD = re.compile(r"[^\w\s]")
+# Answers to these depend on the conversation, the user or the clock, not just the question
+_UNCACHEABLE = re.compile(
+    # Follow-ups opening with a reference to the previous turn ("it", "tell me more", "what about her")
+    r"^(?:(?:and|so|but|also|then|ok|okay)\s+)?(?:it|its|this|that|these|those|he|him|his|she|her|they|them|their|"
+    r"what about|how about|tell me more|more|again|continue|go on)\b"
+    # Questions about the user or what they said ("what's my name", "where do I work", "what did I tell you")
+    r"|\b(?:my|mine|who am i|about me|remind me)\b"
+    r"|\b(?:what|where|who|when|which|why) (?:do|did|am|was|have|had) i\b"
+    r"|\bi (?:told|said|mentioned|asked|shared)\b|\byou (?:said|told|mentioned|suggested)\b"
+    # The conversation itself ("what did we discuss earlier", "summarize our conversation")
+    r"|\b(?:we (?:discussed|talked|spoke|said|decided|agreed)|(?:did|have) we|"
+    r"our (?:conversation|chat|discussion|talk)|this conversation|earlier|previously|last time)\b"
+    # Date and time ("what time is it", "today's news")
+    r"|\b(?:what time|time is it|current time|what day|what date|todays? date|date today|today|tonight|tomorrow|"
+    r"yesterday|right now|(?:this|next|last) (?:week|month|year))\b"
+)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_NON_WORD.sub(" ", query.lower()).split())
+
+
+def _unit(vector: Any) -> Optional[List[float]]:
+    if vector is None:
+        return None
+    values = [float(v) for v in vector]
+    norm = math.sqrt(sum(v * v for v in values))
+    return [v / norm for v in values] if norm else None
+
+
+class ResponseCache:
+    """
+    LRU cache of final answers with per-route TTLs and optional paraphrase matching
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_SIZE,
+        ttls: Optional[Dict[str, float]] = None,
+        embed: Optional[Callable[[str], Any]] = None,
+        similarity_threshold: float = SEMANTIC_MATCH_THRESHOLD
+    ):
+        """
+        Initialize Response Cache
+
+        Args:
+            max_entries: Size cap (least recently used entries are evicted)
+            ttls: Seconds an answer stays valid, per route ("general", "realtime", ...)
+            embed: Optional text -> embedding function for paraphrase matches
+            similarity_threshold: Minimum cosine similarity for a paraphrase hit
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(ROUTE_TTLS, **(ttls or {}))
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_cacheable(query: str) -> bool:
+        """False for questions whose answer depends on the user, the conversation or the time ("what's my name", "tell me more")"""
+        normalized = normalize_query(query)
+        return bool(normalized) and not _UNCACHEABLE.search(normalized)
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        if self.embed is None:
+            return None
+        try:
+            return _unit(self.embed(text))
+        except Exception as e:
+            print(f"Error embedding query for response cache: {e}")
+            return None
+
+    def get(self, route: str, query: str, mode: str = "", generation: int = 0) -> Optional[str]:
+        """
+        Cached answer for a query, or None
+
+        Args:
+            route: Which engine answers it ("general" or "realtime")
+            query: The user's query
+            mode: Current assistant mode
+            generation: Knowledge-store generation the answer must have been built on
+        """
+        if not self.is_cacheable(query):
+            return None
+        normalized = normalize_query(query)
+        key = (route, mode, generation, normalized)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires"] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["answer"]
+            if entry is not None:
+                del self._entries[key]
+            has_candidates = self.embed is not None and any(
+                k[:3] == key[:3] and e["vector"] is not None for k, e in self._entries.items()
+            )
+        if not has_candidates:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Paraphrase match: same route/mode/generation, most similar stored question
+        vector = self._embed(normalized)
+        best_key, best_score = None, self.similarity_threshold
+        with self._lock:
+            if vector is not None:
+                for candidate_key, entry in self._entries.items():
+                    if candidate_key[:3] != key[:3] or entry["vector"] is None or entry["expires"] <= now:
+                        continue
+                    score = sum(a * b for a, b in zip(vector, entry["vector"]))
+                    if score >= best_score:
+                        best_key, best_score = candidate_key, score
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            self.semantic_hits += 1
+            return self._entries[best_key]["answer"]
+
+    def put(self, route: str, query: str, answer: str, mode: str = "", generation: int = 0):
+        """Store an answer (ignored for uncacheable queries or empty answers)"""
+        if not answer or not answer.strip() or not self.is_cacheable(query):
+            return
+        normalized = normalize_query(query)
+        vector = self._embed(normalized)
+        entry = {
+            "answer": answer,
+            "expires": time.time() + self.ttls.get(route, DEFAULT_TTL),
+            "vector": vector,
+        }
+        with self._lock:
+            key = (route, mode, generation, normalized)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _embed_query(text: str) -> Any:
+    """Embed a query with the sales memory's embedding model (None if it isn't loaded)"""
+    from Backend.SalesMemory import sales_memory_manager
+    return sales_memory_manager.create_embedding(text)
+
+
+# Process-wide cache shared by ChatBot and RealtimeSearchEngine
+response_cache = ResponseCache(embed=_embed_query)
@@ -9,23 +9,18 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from dotenv import dotenv_values
-from groq import Groq
 
 # Import sales memory functions
 from Backend.SalesMemory import sales_memory_manager, recall_memory, get_sales_knowledge
+from Backend.LLMGateway import gateway
 
 env_vars = dotenv_values(".env")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 Username = env_vars.get("Username", "Sales Team")
 Assistantname = env_vars.get("Assistantname", "Sales Assistant")
 
-# Initialize Groq client
-client = None
-if GroqAPIKey:
-    try:
-        client = Groq(api_key=GroqAPIKey)
-    except Exception as e:
-        print(f"Error initializing Groq client in SalesAutomation: {e}")
+# Models in order of preference (quality first for written sales content)
+SALES_MODELS = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"]
 
 # Sales system prompt
 SALES_SYSTEM_PROMPT = f"""You are a professional sales AI assistant named {Assistantname}.
@@ -61,7 +56,7 @@ def generate_sales_pitch(
     Returns:
         Generated sales pitch text
     """
-    if not client:
+    if not gateway.available:
         return f"Hello {lead_name}, I'd like to introduce you to {product_or_service} which could benefit {company_name}."
     
     # Recall relevant knowledge about the lead/product
@@ -92,26 +87,16 @@ Create a compelling, personalized sales pitch that:
 Keep the pitch concise (2-3 paragraphs maximum)."""
     
     try:
-        # Try multiple models for reliability
-        models_to_try = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"]
-        completion = None
-        
-        for model in models_to_try:
-            try:
-                completion = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": SALES_SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=500,
-                    temperature=0.8
-                )
-                break
-            except Exception as model_error:
-                if model == models_to_try[-1]:  # Last model failed
-                    raise model_error
-                continue
+        completion = gateway.chat(
+            messages=[
+                {"role": "system", "content": SALES_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=500,
+            temperature=0.8,
+            models=SALES_MODELS,
+            route="pitch"
+        )
         
         if completion:
             pitch = completion.choices[0].message.content
@@ -152,7 +137,7 @@ def send_followup_email(
     Returns:
         Dictionary with email content and metadata
     """
-    if not client:
+    if not gateway.available:
         return {
             "success": False,
             "error": "AI client not available"
@@ -188,26 +173,16 @@ Create a follow-up email that:
 Format: Subject line and email body."""
     
     try:
-        # Try multiple models for reliability
-        models_to_try = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"]
-        completion = None
-        
-        for model in models_to_try:
-            try:
-                completion = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": SALES_SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=600,
-                    temperature=0.7
-                )
-                break
-            except Exception as model_error:
-                if model == models_to_try[-1]:  # Last model failed
-                    raise model_error
-                continue
+        completion = gateway.chat(
+            messages=[
+                {"role": "system", "content": SALES_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=600,
+            temperature=0.7,
+            models=SALES_MODELS,
+            route="followup"
+        )
         
         if not completion:
             raise Exception("All models failed")
@@ -271,7 +246,7 @@ def whatsapp_outreach(
     Returns:
         Dictionary with message content and metadata
     """
-    if not client:
+    if not gateway.available:
         return {
             "success": False,
             "error": "AI client not available"
@@ -305,26 +280,16 @@ Create a WhatsApp message that:
 WhatsApp messages should be shorter and more casual than emails."""
     
     try:
-        # Try multiple models for reliability
-        models_to_try = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"]
-        completion = None
-        
-        for model in models_to_try:
-            try:
-                completion = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": SALES_SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=300,
-                    temperature=0.8
-                )
-                break
-            except Exception as model_error:
-                if model == models_to_try[-1]:  # Last model failed
-                    raise model_error
-                continue
+        completion = gateway.chat(
+            messages=[
+                {"role": "system", "content": SALES_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=300,
+            temperature=0.8,
+            models=SALES_MODELS,
+            route="whatsapp"
+        )
         
         if not completion:
             raise Exception("All models failed")
@@ -367,7 +332,7 @@ def analyze_lead_data(lead_info: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dictionary with analysis and recommendations
     """
-    if not client:
+    if not gateway.available:
         return {
             "success": False,
             "error": "AI client not available"
@@ -400,26 +365,16 @@ Provide:
 Format as a structured analysis with actionable recommendations."""
     
     try:
-        # Try multiple models for reliability
-        models_to_try = ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"]
-        completion = None
-        
-        for model in models_to_try:
-            try:
-                completion = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": SALES_SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=800,
-                    temperature=0.7
-                )
-                break
-            except Exception as model_error:
-                if model == models_to_try[-1]:  # Last model failed
-                    raise model_error
-                continue
+        completion = gateway.chat(
+            messages=[
+                {"role": "system", "content": SALES_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=800,
+            temperature=0.7,
+            models=SALES_MODELS,
+            route="lead_analysis"
+        )
         
         if not completion:
             raise Exception("All models failed")
@@ -5,8 +5,9 @@ Handles storage and retrieval of sales-related knowledge from documents, convers
 
 import json
 import os
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 import hashlib
 
 # Try to import vector embedding libraries (optional - graceful fallback if not available)
@@ -35,6 +36,8 @@ class SalesMemoryManager:
         self.memory = []
         self.embeddings = []
         self.embedding_model = None
+        self._lock = threading.RLock()  # Guards memory/embeddings during concurrent ingestion
+        self.generation = 0  # Bumped whenever the stored knowledge changes (cache invalidation)
         
         # Initialize embedding model if available
         if VECTOR_EMBEDDINGS_AVAILABLE:
@@ -53,6 +56,9 @@ class SalesMemoryManager:
         # Create embedding lookup dictionary for O(1) access (performance optimization)
         self._embedding_lookup = {}
         self._build_embedding_lookup()
+        # Source name -> positions in self.memory, so per-source reads skip unrelated entries
+        self._source_index = {}
+        self._build_source_index()
     
     def load_memory(self):
         """Load existing memory from file"""
@@ -93,6 +99,93 @@ class SalesMemoryManager:
                 else:
                     self._embedding_lookup[entry_id] = list(emb_data) if emb_data else None
     
+    def _build_source_index(self):
+        """Build the source name -> memory positions index"""
+        self._source_index = {}
+        for position, entry in enumerate(self.memory):
+            self._source_index.setdefault(entry.get("source", ""), []).append(position)
+    
+    def iter_entries_by_source(self, source_prefix: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over entries whose source starts with source_prefix (via the source index)
+        
+        Args:
+            source_prefix: Source name or prefix (e.g. "Drive_20251106_202747")
+            
+        Yields:
+            Memory entries, grouped by source (a snapshot taken under the lock, so
+            concurrent deletes or reindexing can't shift positions mid-iteration)
+        """
+        with self._lock:
+            entries = [
+                self.memory[position]
+                for source, source_positions in self._source_index.items()
+                if source.startswith(source_prefix)
+                for position in source_positions
+            ]
+        yield from entries
+    
+    def get_embedding(self, entry_id: str) -> Optional[List[float]]:
+        """Get the stored embedding for an entry, if any"""
+        return self._embedding_lookup.get(entry_id)
+    
+    def import_entries(self, entries: Iterable[Dict[str, Any]], batch_size: int = 500) -> Dict[str, int]:
+        """
+        Bulk-load exported entries, keeping their IDs and timestamps
+        
+        Entries carrying an 'embedding' are stored as-is (no re-embedding); the
+        rest are embedded in batches. Entries whose ID already exists are skipped.
+        Memory and embeddings are saved once at the end.
+        
+        Args:
+            entries: Iterable of exported memory entries (optionally with 'embedding')
+            batch_size: Entries per embedding batch
+            
+        Returns:
+            Dict with 'imported', 'skipped' and 'embedded' counts
+        """
+        with self._lock:
+            existing_ids = {m.get("id") for m in self.memory}
+        counts = {"imported": 0, "skipped": 0, "embedded": 0}
+        
+        def _store(batch):
+            missing = [entry for entry in batch if not entry.get("embedding")]
+            if missing:
+                for entry, embedding in zip(missing, self.create_embeddings([e["content"] for e in missing])):
+                    entry["embedding"] = embedding
+                    counts["embedded"] += 1 if embedding else 0
+            
+            with self._lock:
+                for entry in batch:
+                    embedding = entry.pop("embedding", None)
+                    self._source_index.setdefault(entry.get("source", ""), []).append(len(self.memory))
+                    self.memory.append(entry)
+                    self.generation += 1
+                    if embedding:
+                        self.embeddings.append({"id": entry["id"], "embedding": embedding, "content": entry["content"][:100]})
+                        self._embedding_lookup[entry["id"]] = embedding
+                    counts["imported"] += 1
+        
+        batch = []
+        for entry in entries:
+            entry_id = entry.get("id")
+            if not entry_id or not entry.get("content") or entry_id in existing_ids:
+                counts["skipped"] += 1
+                continue
+            existing_ids.add(entry_id)
+            batch.append(dict(entry))
+            if len(batch) >= batch_size:
+                _store(batch)
+                batch = []
+        if batch:
+            _store(batch)
+        
+        if counts["imported"]:
+            with self._lock:
+                self.save_embeddings()
+                self.save_memory()
+        return counts
+    
     def save_memory(self):
         """Save memory to file"""
         try:
@@ -135,6 +228,19 @@ class SalesMemoryManager:
             print(f"Error creating embedding: {e}")
             return None
     
+    def create_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Create vector embeddings for many texts in one batched model call"""
+        global VECTOR_EMBEDDINGS_AVAILABLE
+        if not texts or not VECTOR_EMBEDDINGS_AVAILABLE or self.embedding_model is None:
+            return [None] * len(texts)
+        
+        try:
+            embeddings = self.embedding_model.encode(texts, convert_to_numpy=True, batch_size=32)
+            return [embedding.tolist() for embedding in embeddings]
+        except Exception as e:
+            print(f"Error creating embeddings: {e}")
+            return [None] * len(texts)
+    
     def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """Calculate cosine similarity between two embeddings"""
         if not embedding1 or not embedding2 or np is None:
@@ -176,13 +282,60 @@ class SalesMemoryManager:
         Returns:
             ID of the stored knowledge entry
         """
+        # Create embedding if available
+        embedding = self.create_embedding(content)
+        
+        with self._lock:
+            entry_id = self._append_entry(content, source, category, metadata, embedding)
+            if embedding:
+                self.save_embeddings()
+            self.save_memory()
+        return entry_id
+    
+    def add_knowledge_batch(self, items: List[Dict[str, Any]]) -> List[str]:
+        """
+        Add many knowledge entries with one batched embedding call and one save
+        
+        Args:
+            items: Dicts with 'content', 'source' and optional 'category'/'metadata'
+            
+        Returns:
+            IDs of the stored knowledge entries
+        """
+        if not items:
+            return []
+        
+        embeddings = self.create_embeddings([item["content"] for item in items])
+        
+        with self._lock:
+            entry_ids = [
+                self._append_entry(
+                    item["content"],
+                    item["source"],
+                    item.get("category", "general"),
+                    item.get("metadata"),
+                    embedding
+                )
+                for item, embedding in zip(items, embeddings)
+            ]
+            if any(embeddings):
+                self.save_embeddings()
+            self.save_memory()
+        return entry_ids
+    
+    def _append_entry(
+        self,
+        content: str,
+        source: str,
+        category: str,
+        metadata: Optional[Dict[str, Any]],
+        embedding: Optional[List[float]]
+    ) -> str:
+        """Append a memory entry (and its embedding) in memory without saving"""
         timestamp = datetime.now().isoformat()
         content_hash = hashlib.md5(content.encode()).hexdigest()
         entry_id = f"{source}_{content_hash[:8]}"
         
-        # Create embedding if available
-        embedding = self.create_embedding(content)
-        
         memory_entry = {
             "id": entry_id,
             "content": content,
@@ -192,7 +345,9 @@ class SalesMemoryManager:
             "metadata": metadata or {}
         }
         
+        self._source_index.setdefault(source, []).append(len(self.memory))
         self.memory.append(memory_entry)
+        self.generation += 1
         
         # Store embedding if available
         if embedding:
@@ -204,9 +359,7 @@ class SalesMemoryManager:
             self.embeddings.append(embedding_entry)
             # Update lookup dictionary for O(1) access (performance optimization)
             self._embedding_lookup[entry_id] = embedding if isinstance(embedding, list) else embedding.tolist()
-            self.save_embeddings()
         
-        self.save_memory()
         return entry_id
     
     def recall_memory(self, query: str, top_k: int = 5, category: Optional[str] = None, source_filter: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -313,6 +466,8 @@ class SalesMemoryManager:
             self.memory = []
             self.embeddings = []
         
+        self.generation += 1
+        self._build_source_index()
         self.save_memory()
         self.save_embeddings()
 
@@ -334,6 +489,20 @@ def learn_from_docs(content: str, source_name: str, category: str = "document")
     """
     return sales_memory_manager.add_knowledge(content, source_name, category)
 
+def learn_from_docs_batch(chunks: List[Dict[str, Any]]) -> List[str]:
+    """
+    Store many document chunks at once (batched embeddings, single save)
+    
+    Args:
+        chunks: Dicts with 'content', 'source' and optional 'category' (default: "document")
+        
+    Returns:
+        Entry IDs of stored knowledge
+    """
+    return sales_memory_manager.add_knowledge_batch(
+        [{**chunk, "category": chunk.get("category", "document")} for chunk in chunks]
+    )
+
 def learn_from_voice(transcription: str, source_name: str = "voice_recording", category: str = "conversation") -> str:
     """
     Store transcribed voice recordings in memory
@@ -0,0 +1,258 @@
+"""
+Search Cache for JARVIS
+Keeps web search results for RealtimeSearchEngine across restarts. Queries are
+normalized (case-folded, punctuation, filler and stop words dropped) so
+paraphrases share an entry, and each query class gets its own TTL: news and
+prices go stale in minutes, facts about people or places last for hours. A
+small ordered-dict front tier answers repeats in O(1); the SQLite tier keeps
+the larger LRU set on disk and is opened on first use, not at import. Reads
+never commit: access times of disk hits are batched into the next write.
+"""
+
+import atexit
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from Backend.ResponseCache import normalize_query
+
+SEARCH_CACHE_FILE = "Data/search_cache.db"
+SEARCH_CACHE_SIZE = 2000  # Results kept on disk after each sweep (least recently used go first)
+SEARCH_MEMORY_SIZE = 50  # Results kept in the in-memory front tier
+PURGE_EVERY = 100  # Writes between sweeps of expired and over-cap rows
+ACCESS_FLUSH_EVERY = 50  # Disk hits whose access times are batched into one write
+QUERY_CLASS_TTLS = {
+    "live": 120,  # News, scores, weather - changes by the minute
+    "market": 300,  # Prices, rates, stock and crypto quotes
+    "people": 6 * 3600,  # Who holds a role, who someone is
+    "reference": 24 * 3600,  # Definitions, history, geography
+    "default": 900,
+}
+
+_STOP_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "please", "jarvis", "hey", "ok", "okay",
+    "tell", "me", "can", "could", "would", "you", "give", "show", "find", "search", "for", "about",
+    "i", "want", "to", "know", "s", "right", "currently", "current", "now",
+}  # Interrogatives stay: "who is apple" and "what is apple" ask different things
+# Checked in order; the first class whose pattern matches wins
+_QUERY_CLASSES = (
+    ("live", re.compile(r"\b(news|headlines?|latest|breaking|live|score|scores|weather|forecast|today|tonight|happening|trending)\b")),
+    ("market", re.compile(r"\b(price|prices|stock|stocks|share|shares|market|bitcoin|crypto|cryptocurrency|exchange rate|rate|rates|inflation)\b")),
+    ("people", re.compile(r"\b(who|ceo|president|prime minister|founder|leader|king|queen|chairman|minister|owner)\b")),
+    ("reference", re.compile(r"\b(history|define|definition|meaning|capital|population|located|invented|founded|born)\b")),
+)
+
+
+def search_cache_key(query: str) -> str:
+    """Normalized form shared by paraphrases ("What's the CEO of Tesla?" -> "what ceo of tesla")"""
+    words = normalize_query(query).split()
+    kept = [word for word in words if word not in _STOP_WORDS]
+    return " ".join(kept or words)
+
+
+def classify_search_query(query: str) -> str:
+    """Query class deciding the TTL ("live", "market", "people", "reference" or "default")"""
+    text = normalize_query(query)
+    for name, pattern in _QUERY_CLASSES:
+        if pattern.search(text):
+            return name
+    return "default"
+
+
+class SearchCache:
+    """
+    Two-tier TTL + LRU cache of search results keyed by normalized query
+    """
+
+    def __init__(
+        self,
+        db_file: str = SEARCH_CACHE_FILE,
+        max_entries: int = SEARCH_CACHE_SIZE,
+        memory_entries: int = SEARCH_MEMORY_SIZE,
+        ttls: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize Search Cache
+
+        Args:
+            db_file: SQLite database path (None for a memory-only cache)
+            max_entries: Size cap of the disk tier
+            memory_entries: Size cap of the in-memory front tier
+            ttls: Seconds a result stays valid, per query class
+        """
+        self.db_file = db_file
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.ttls = dict(QUERY_CLASS_TTLS, **(ttls or {}))
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._opened = False
+        self._accessed: Dict[str, float] = {}  # Disk hits not yet written (key -> access time)
+        atexit.register(self.flush)
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Disk tier, opened and swept on first use; None for a memory-only cache (caller holds the lock)"""
+        if not self._opened:
+            self._opened = True
+            self._conn = self._connect() if self.db_file else None
+            if self._conn is not None:
+                try:
+                    self._sweep(time.time())
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Error sweeping search cache: {e}")
+        return self._conn
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        try:
+            os.makedirs(os.path.dirname(self.db_file) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS searches ("
+                "key TEXT PRIMARY KEY, result TEXT, query_class TEXT, expires REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS searches_accessed ON searches (accessed)")
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            print(f"Search cache database unavailable, using memory only: {e}")
+            return None
+
+    def get(self, query: str) -> Optional[str]:
+        """Cached result for the query (or a paraphrase of it), or None"""
+        key = search_cache_key(query)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.hits["memory"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            row = self._disk_get(key, now)
+            if row is None:
+                self.misses += 1
+                return None
+            result, expires = row
+            self._remember(key, result, expires)
+            self.hits["disk"] += 1
+            return result
+
+    def put(self, query: str, result: str):
+        """Store a search result with its query class's TTL"""
+        key = search_cache_key(query)
+        if not key or not result:
+            return
+        query_class = classify_search_query(query)
+        now = time.time()
+        expires = now + self.ttls.get(query_class, self.ttls["default"])
+        with self._lock:
+            self._remember(key, result, expires)
+            if self._db() is None:
+                return
+            try:
+                self._write_accessed()  # Batched hits ride along with this commit
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO searches (key, result, query_class, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, result, query_class, expires, now)
+                )
+                self._writes += 1
+                if self._writes % PURGE_EVERY == 0:
+                    self._sweep(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error saving search result: {e}")
+
+    def _sweep(self, now: float):
+        """Drop expired rows, then the least recently used beyond the cap (caller holds the lock)"""
+        self._write_accessed()  # LRU order must include the batched hits
+        self._conn.execute("DELETE FROM searches WHERE expires <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM searches WHERE key IN ("
+            "SELECT key FROM searches ORDER BY accessed LIMIT max(0, (SELECT count(*) FROM searches) - ?))",
+            (self.max_entries,)
+        )
+
+    def _remember(self, key: str, result: str, expires: float):
+        """Put an entry in the front tier (caller holds the lock)"""
+        self._memory[key] = (result, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        """Valid row for the key from the disk tier (caller holds the lock)"""
+        if self._db() is None:
+            return None
+        try:
+            row = self._conn.execute("SELECT result, expires FROM searches WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                return None  # Expired rows are left for the next sweep or overwrite
+            self._accessed[key] = now
+            if len(self._accessed) >= ACCESS_FLUSH_EVERY:
+                self._write_accessed()
+                self._conn.commit()
+            return row[0], row[1]
+        except sqlite3.Error as e:
+            print(f"Error reading search cache: {e}")
+            return None
+
+    def _write_accessed(self):
+        """Apply the batched access times; committed with the caller's transaction (caller holds the lock)"""
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE searches SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()]
+            )
+            self._accessed.clear()
+
+    def flush(self):
+        """Write batched access times now (also run at exit)"""
+        with self._lock:
+            if self._conn is None or not self._accessed:
+                return
+            try:
+                self._write_accessed()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error saving search cache access times: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._accessed.clear()
+            if self._db() is not None:
+                try:
+                    self._conn.execute("DELETE FROM searches")
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Error clearing search cache: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = self.hits["memory"] + self.hits["disk"]
+            lookups = hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+# Process-wide cache used by RealtimeSearchEngine.GoogleSearch
+search_cache = SearchCache()
@@ -0,0 +1,263 @@
+"""
+Speculative Routing for JARVIS
+Starts the general ChatBot answer at the same time as FirstLayerDMM instead of
+after it. If the decision is a single "general" task the speculative answer is
+used (its streamed text is replayed to the caller, then forwarded live);
+otherwise it is cancelled before it touches memory or the chat log. Tracks the
+latency saved on hits against the tokens spent on misses. Off by default: turn
+it on (SpeculativeRouting=True) once the logged hit rate justifies the tokens.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import dotenv_values
+
+from Backend.ContextBuilder import estimate_tokens
+from Backend.Memory import may_learn_from
+
+env_vars = dotenv_values(".env")
+SPECULATIVE_ROUTING = (env_vars.get("SpeculativeRouting") or "false").lower() == "true"  # Run DMM and ChatBot concurrently
+SPECULATION_GRACE = 0.05  # Seconds to wait for a fast-path decision before sending the speculative request
+SPECULATION_TIMEOUT = 30.0  # Seconds a finished speculative answer waits for the decision before giving up
+STATS_REPORT_EVERY = 20  # Speculations between summary log lines
+
+
+class SpeculationCancelled(Exception):
+    """Raised inside the speculative ChatBot call once the decision went elsewhere"""
+
+
+class SpeculationStats:
+    """Latency saved by used speculations vs tokens spent on discarded ones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.requests_avoided = 0  # Misses cancelled before the LLM request was sent
+            self.latency_saved = 0.0
+            self.wasted_tokens = 0
+
+    def record_hit(self, saved: float):
+        with self._lock:
+            self.hits += 1
+            self.latency_saved += saved
+        self._maybe_report()
+
+    def record_miss(self, wasted_tokens: int, sent: bool):
+        with self._lock:
+            self.misses += 1
+            self.wasted_tokens += wasted_tokens
+            if not sent:
+                self.requests_avoided += 1
+        self._maybe_report()
+
+    def _maybe_report(self):
+        stats = self.summary()
+        if stats["speculations"] % STATS_REPORT_EVERY == 0:
+            print(f"Speculative chat: {stats['hits']}/{stats['speculations']} used, "
+                  f"{stats['latency_saved']:.1f}s saved, ~{stats['wasted_tokens']} tokens wasted")
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            speculations = self.hits + self.misses
+            return {
+                "speculations": speculations,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / speculations if speculations else 0.0,
+                "requests_avoided": self.requests_avoided,
+                "latency_saved": self.latency_saved,
+                "latency_saved_per_hit": self.latency_saved / self.hits if self.hits else 0.0,
+                "wasted_tokens": self.wasted_tokens,
+                "wasted_tokens_per_miss": self.wasted_tokens / self.misses if self.misses else 0.0,
+            }
+
+
+speculation_stats = SpeculationStats()
+
+
+def get_speculation_stats() -> Dict[str, Any]:
+    """Hit rate, latency saved and tokens wasted by speculative routing so far"""
+    return speculation_stats.summary()
+
+
+class SpeculativeChat:
+    """
+    One ChatBot call started before the routing decision is known
+
+    The worker side (ChatBot) buffers its streamed output and calls
+    before_request()/track()/commit(); the router side calls result() to use
+    the answer or cancel() to drop it.
+    """
+
+    def __init__(self, query: str, mode: Optional[str] = None):
+        """
+        Initialize Speculative Chat
+
+        Args:
+            query: Query passed to ChatBot
+            mode: Assistant mode passed to ChatBot
+        """
+        self.query = query
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._decided = threading.Event()
+        self._used = False
+        self._events: List[tuple] = []  # Streamed (kind, args) held until the answer is used
+        self._on_delta: Optional[Callable] = None
+        self._on_sentence: Optional[Callable] = None
+        self._answer = None
+        self._error: Optional[BaseException] = None
+        self._sent = False
+        self._prompt_tokens = 0
+        self._completion_parts: List[str] = []
+        self._started_at = time.monotonic()
+        self._ready_at: Optional[float] = None  # Answer complete (before waiting for the decision)
+        self._finished_at: Optional[float] = None
+        self._settled = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="speculative-chat")
+
+    def start(self) -> "SpeculativeChat":
+        self._thread.start()
+        return self
+
+    @property
+    def cancelled(self) -> bool:
+        return self._decided.is_set() and not self._used
+
+    # ---- Worker side ----
+
+    def _run(self):
+        from Backend.Chatbot import ChatBot  # Chatbot imports this module
+        try:
+            self._answer = ChatBot(self.query, mode=self.mode, on_delta=self.on_delta,
+                                   on_sentence=self.on_sentence, speculation=self)
+        except SpeculationCancelled:
+            pass
+        except Exception as e:
+            self._error = e
+        finally:
+            self._finished_at = time.monotonic()
+            self._settle()
+
+    def _settle(self):
+        """Record a miss once the speculation is both cancelled and finished"""
+        with self._lock:
+            if self._settled or self._finished_at is None or not self.cancelled:
+                return
+            self._settled = True
+        wasted = self._prompt_tokens + estimate_tokens("".join(self._completion_parts)) if self._sent else 0
+        speculation_stats.record_miss(wasted, self._sent)
+
+    def on_delta(self, delta: str):
+        self._emit("delta", delta)
+
+    def on_sentence(self, sentence: str, ends_line: bool):
+        self._emit("sentence", sentence, ends_line)
+
+    def _emit(self, kind: str, *args):
+        with self._lock:  # Keeps live output ordered after the replayed buffer
+            if self.cancelled:
+                return
+            if not self._used:
+                self._events.append((kind, args))
+                return
+            callback = self._on_delta if kind == "delta" else self._on_sentence
+            if callback:
+                callback(*args)
+
+    def before_request(self):
+        """Give an instant (cache/rule) decision a moment to arrive, then send only if still wanted"""
+        self._decided.wait(SPECULATION_GRACE)
+        if self.cancelled:
+            raise SpeculationCancelled()
+        self._sent = True
+
+    def track(self, completion, messages: List[Dict[str, str]]):
+        """Wrap the streamed completion so a cancel stops reading (and closes the request)"""
+        self._prompt_tokens = sum(estimate_tokens(message.get("content", "")) + 4 for message in messages)
+        try:
+            for chunk in completion:
+                if self.cancelled:
+                    break
+                choices = getattr(chunk, "choices", None)
+                text = choices[0].delta.content if choices else None
+                if text:
+                    self._completion_parts.append(text)
+                yield chunk
+        finally:
+            if self.cancelled:
+                stop = getattr(completion, "cancel", None) or getattr(completion, "close", None)
+                if stop:
+                    stop()
+
+    def commit(self):
+        """Block until the decision is known; raises SpeculationCancelled unless the answer is used"""
+        self._ready_at = time.monotonic()
+        if not self._decided.wait(SPECULATION_TIMEOUT):
+            self.cancel()
+        if not self._used:
+            raise SpeculationCancelled()
+
+    # ---- Router side ----
+
+    def cancel(self):
+        """The decision was not a single general task: drop the speculative answer"""
+        with self._lock:
+            if self._decided.is_set():
+                return
+            self._decided.set()
+        self._settle()  # Already finished (e.g. an instant answer that never waited)
+
+    def result(self, on_delta: Optional[Callable] = None, on_sentence: Optional[Callable] = None):
+        """
+        Use the speculative answer
+
+        Replays what has streamed so far to the callbacks, forwards the rest
+        live and returns ChatBot's answer (or raises its error). If the
+        speculation already expired, ChatBot is simply called now.
+        """
+        decided_at = time.monotonic()
+        with self._lock:
+            expired = self._decided.is_set() and not self._used
+            if not expired:
+                self._used = True
+                self._on_delta = on_delta
+                self._on_sentence = on_sentence
+                self._decided.set()
+                events, self._events = self._events, []
+                for kind, args in events:
+                    callback = on_delta if kind == "delta" else on_sentence
+                    if callback:
+                        callback(*args)
+        if expired:
+            from Backend.Chatbot import ChatBot
+            return ChatBot(self.query, mode=self.mode, on_delta=on_delta, on_sentence=on_sentence)
+
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        # Sequential routing would have run the DMM and then the whole answer
+        decision_time = decided_at - self._started_at
+        answer_time = (self._ready_at or self._finished_at) - self._started_at
+        speculation_stats.record_hit(min(decision_time, answer_time))
+        return self._answer
+
+
+def start_speculative_chat(query: str, mode: Optional[str] = None) -> Optional[SpeculativeChat]:
+    """
+    Start a speculative ChatBot call
+
+    Returns None when speculative routing is off, or when the query would teach
+    memory something: the normal path learns it before building the context, so
+    a speculative answer would be built on stale context.
+    """
+    if not SPECULATIVE_ROUTING or not query or may_learn_from(query):
+        return None
+    return SpeculativeChat(query, mode).start()
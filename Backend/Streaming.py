@@ -0,0 +1,174 @@
+"""
+Streaming Responses for JARVIS
+Consumes a streamed chat completion, pushing text deltas and complete sentences
+to callbacks as they arrive (chat view, TTS) and measuring time-to-first-token.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+STREAM_STATS_WINDOW = 100  # Recent streams kept for the rolling latency summary
+MIN_SENTENCE_CHARS = 12  # Shorter fragments ("Dr.", "1.") are held for the next sentence
+
+# Sentence end: terminal punctuation (optionally closing quote/bracket) followed by whitespace
+_SENTENCE_BOUNDARY = re.compile(r"[.!?]+[\"')\]]*(?=\s)|\n")
+
+
+class SentenceChunker:
+    """
+    Splits streamed text into complete sentences
+
+    feed() returns the sentences completed by a delta as (sentence, ends_line)
+    pairs; ends_line is True when the sentence closed a line. flush() returns
+    whatever is left once the stream ends.
+    """
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[Tuple[str, bool]]:
+        self._buffer += delta
+        sentences = []
+        start = 0
+        for match in _SENTENCE_BOUNDARY.finditer(self._buffer):
+            ends_line = match.group() == "\n"
+            sentence = self._buffer[start:match.end()].strip()
+            if len(sentence) < self.min_chars and not ends_line:
+                continue  # Too short to be a sentence on its own; keep accumulating
+            if sentence:
+                sentences.append((sentence, ends_line))
+            elif ends_line and sentences:
+                sentences[-1] = (sentences[-1][0], True)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> List[Tuple[str, bool]]:
+        sentence = self._buffer.strip()
+        self._buffer = ""
+        return [(sentence, True)] if sentence else []
+
+
+class StreamStats:
+    """Rolling time-to-first-token / total-time statistics for streamed completions"""
+
+    def __init__(self, window: int = STREAM_STATS_WINDOW):
+        self._records = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, ttft: Optional[float], total: float, chunks: int, label: str = ""):
+        with self._lock:
+            self._records.append({"ttft": ttft, "total": total, "chunks": chunks, "label": label})
+
+    @staticmethod
+    def _percentile(values: List[float], fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        values = sorted(values)
+        return values[min(int(len(values) * fraction), len(values) - 1)]
+
+    def summary(self) -> Dict:
+        """Count and p50/p95 of TTFT and total time (seconds) over the window"""
+        with self._lock:
+            records = list(self._records)
+        ttfts = [r["ttft"] for r in records if r["ttft"] is not None]
+        totals = [r["total"] for r in records]
+        return {
+            "streams": len(records),
+            "ttft_p50": self._percentile(ttfts, 0.5),
+            "ttft_p95": self._percentile(ttfts, 0.95),
+            "total_p50": self._percentile(totals, 0.5),
+            "total_p95": self._percentile(totals, 0.95),
+        }
+
+
+stream_stats = StreamStats()
+
+
+def get_stream_stats() -> Dict:
+    """Rolling latency summary of recent streamed responses"""
+    return stream_stats.summary()
+
+
+def _safe_call(callback: Optional[Callable], *args):
+    # A failing view/TTS callback must never cut the answer short
+    if callback is None:
+        return
+    try:
+        callback(*args)
+    except Exception as e:
+        print(f"Error in stream callback: {e}")
+
+
+def stream_completion(
+    completion,
+    on_delta: Optional[Callable[[str], None]] = None,
+    on_sentence: Optional[Callable[[str, bool], None]] = None,
+    started_at: Optional[float] = None,
+    max_stream_time: Optional[float] = None,
+    stall_timeout: Optional[float] = None,
+    label: str = ""
+) -> str:
+    """
+    Read a streamed chat completion, forwarding text as it arrives
+
+    Args:
+        completion: Iterable of streamed chunks (chunk.choices[0].delta.content)
+        on_delta: Called with each new piece of text
+        on_sentence: Called with (sentence, ends_line) for every complete sentence
+        started_at: time.time() when the request was sent (for TTFT; default: now)
+        max_stream_time: Stop reading after this many seconds
+        stall_timeout: Stop after this many seconds without content
+        label: Name recorded with the latency stats (e.g. "chatbot")
+
+    Returns:
+        The full response text (whatever arrived before an error or timeout)
+    """
+    started_at = started_at or time.time()
+    chunker = SentenceChunker() if on_sentence else None
+    parts = []
+    chunk_count = 0
+    first_token_at = None
+    last_content_at = started_at
+
+    try:
+        for chunk in completion:
+            chunk_count += 1
+            now = time.time()
+            if max_stream_time and now - started_at > max_stream_time:
+                print(f"Stream timeout after {max_stream_time} seconds, received {chunk_count} chunks")
+                break
+
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                if stall_timeout and now - last_content_at > stall_timeout:
+                    print(f"No chunks for {stall_timeout} seconds, assuming stream complete")
+                    break
+                continue
+
+            if first_token_at is None:
+                first_token_at = now
+            last_content_at = now
+            parts.append(delta)
+            _safe_call(on_delta, delta)
+            if chunker:
+                for sentence, ends_line in chunker.feed(delta):
+                    _safe_call(on_sentence, sentence, ends_line)
+    except Exception as e:
+        print(f"Error processing stream: {e}")  # Use what we have so far
+
+    if chunker:
+        for sentence, ends_line in chunker.flush():
+            _safe_call(on_sentence, sentence, ends_line)
+
+    total = time.time() - started_at
+    ttft = first_token_at - started_at if first_token_at is not None else None
+    stream_stats.record(ttft, total, chunk_count, label)
+    if ttft is not None:
+        print(f"{label or 'stream'}: first token in {ttft * 1000:.0f} ms, complete in {total * 1000:.0f} ms ({chunk_count} chunks)")
+
+    return "".join(parts)
@@ -0,0 +1,232 @@
+"""
+LLM Telemetry for JARVIS
+Records every chat-completion request made through the gateway: route (dmm,
+chat, realtime, pitch, ...), model, prompt/completion tokens, and how latency
+splits between queueing for rate-limit headroom, time-to-first-token and
+generation, plus failovers. A rolling per-route summary can be written to a
+JSON file and/or POSTed to an endpoint (MetricsFile / MetricsEndpoint in .env).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from dotenv import dotenv_values
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+env_vars = dotenv_values(".env")
+
+METRICS_WINDOW = 500  # Recent requests kept for the rolling summary
+METRICS_EXPORT_INTERVAL = 60.0  # Seconds between automatic exports (when a target is configured)
+METRICS_FILE = env_vars.get("MetricsFile")  # e.g. Data/llm_metrics.json
+METRICS_ENDPOINT = env_vars.get("MetricsEndpoint")  # e.g. http://localhost:9000/metrics
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class LLMMetrics:
+    """
+    In-process registry of LLM request records
+
+    Keeps the last `window` requests for latency percentiles and running
+    token/request totals per route and model since startup.
+    """
+
+    def __init__(
+        self,
+        window: int = METRICS_WINDOW,
+        export_file: Optional[str] = METRICS_FILE,
+        export_endpoint: Optional[str] = METRICS_ENDPOINT,
+        export_interval: float = METRICS_EXPORT_INTERVAL
+    ):
+        """
+        Initialize LLM Metrics
+
+        Args:
+            window: Number of recent requests used for percentiles
+            export_file: JSON file the summary is written to periodically (None = off)
+            export_endpoint: URL the summary is POSTed to periodically (None = off)
+            export_interval: Seconds between periodic exports
+        """
+        self._records = deque(maxlen=window)
+        self._totals: Dict[tuple, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.export_file = export_file
+        self.export_endpoint = export_endpoint
+        self.export_interval = export_interval
+        self._exporter = None
+
+    def record(
+        self,
+        route: str,
+        model: Optional[str],
+        status: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        estimated_usage: bool = False,
+        queue_time: float = 0.0,
+        ttft: Optional[float] = None,
+        total: float = 0.0,
+        retries: int = 0,
+        stream: bool = False
+    ):
+        """
+        Record one request
+
+        Args:
+            route: Calling feature ("dmm", "chat", "realtime", "pitch", ...)
+            model: Model that served (or last failed) the request
+            status: "ok", "error", "unavailable" or "cancelled" (a hedge loser)
+            prompt_tokens: Prompt tokens (from the API usage when available)
+            completion_tokens: Completion tokens
+            estimated_usage: True when usage was estimated locally, not reported by the API
+            queue_time: Seconds spent waiting for rate-limit headroom
+            ttft: Seconds from sending the request to the first content token
+            total: Seconds from the request entering the gateway to its last chunk
+            retries: Failovers to another model before this outcome
+            stream: Whether the completion was streamed
+        """
+        record = {
+            "time": time.time(),
+            "route": route or "other",
+            "model": model,
+            "status": status,
+            "prompt_tokens": int(prompt_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+            "estimated_usage": estimated_usage,
+            "queue_time": queue_time,
+            "ttft": ttft,
+            "total": total,
+            "retries": retries,
+            "stream": stream,
+        }
+        with self._lock:
+            self._records.append(record)
+            totals = self._totals.setdefault((record["route"], model), {
+                "requests": 0, "errors": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            })
+            totals["requests"] += 1
+            totals["errors"] += status not in ("ok", "cancelled")
+            totals["retries"] += retries
+            totals["prompt_tokens"] += record["prompt_tokens"]
+            totals["completion_tokens"] += record["completion_tokens"]
+        self._ensure_exporter()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Rolling summary per route
+
+        Latency percentiles (seconds) cover the recent window; token and
+        request counts are totals since startup, broken down by model.
+        """
+        with self._lock:
+            records = list(self._records)
+            totals = {key: dict(value) for key, value in self._totals.items()}
+
+        routes: Dict[str, Dict[str, Any]] = {}
+        for (route, model), counts in totals.items():
+            entry = routes.setdefault(route, {"requests": 0, "errors": 0, "retries": 0,
+                                              "prompt_tokens": 0, "completion_tokens": 0, "models": {}})
+            for name in ("requests", "errors", "retries", "prompt_tokens", "completion_tokens"):
+                entry[name] += counts[name]
+            entry["models"][model or "none"] = counts
+
+        for route, entry in routes.items():
+            recent = [r for r in records if r["route"] == route and r["status"] == "ok"]
+            ttfts = [r["ttft"] for r in recent if r["ttft"] is not None]
+            generation = [r["total"] - r["queue_time"] - r["ttft"] for r in recent if r["ttft"] is not None]
+            for name, values in (
+                ("queue", [r["queue_time"] for r in recent]),
+                ("ttft", ttfts),
+                ("generation", generation),
+                ("total", [r["total"] for r in recent]),
+            ):
+                entry[f"{name}_p50"] = _percentile(values, 0.5)
+                entry[f"{name}_p95"] = _percentile(values, 0.95)
+            entry["estimated_usage"] = sum(1 for r in recent if r["estimated_usage"])
+
+        return {"generated_at": time.time(), "window": len(records), "routes": routes}
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """The most recent request records, newest last"""
+        with self._lock:
+            return list(self._records)[-limit:]
+
+    def export(self, path: Optional[str] = None, endpoint: Optional[str] = None) -> bool:
+        """
+        Write the summary to a JSON file and/or POST it to an endpoint
+
+        Args:
+            path: File to write (default: the configured export file)
+            endpoint: URL to POST to (default: the configured endpoint)
+
+        Returns:
+            True if every configured target succeeded
+        """
+        path = path or self.export_file
+        endpoint = endpoint or self.export_endpoint
+        summary = self.summary()
+        ok = True
+        if path:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(summary, f, indent=2)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing LLM metrics to {path}: {e}")
+                ok = False
+        if endpoint:
+            if requests is None:
+                print("Error exporting LLM metrics: requests is not installed")
+                ok = False
+            else:
+                try:
+                    requests.post(endpoint, json=summary, timeout=5).raise_for_status()
+                except Exception as e:
+                    print(f"Error posting LLM metrics to {endpoint}: {e}")
+                    ok = False
+        return ok
+
+    def _ensure_exporter(self):
+        if self._exporter is not None or not (self.export_file or self.export_endpoint):
+            return
+        with self._lock:
+            if self._exporter is not None:
+                return
+            self._exporter = threading.Thread(target=self._export_loop, daemon=True, name="llm-metrics-export")
+        self._exporter.start()
+
+    def _export_loop(self):
+        while True:
+            time.sleep(self.export_interval)
+            self.export()
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+
+# Process-wide registry fed by the LLM gateway
+llm_metrics = LLMMetrics()
+
+
+def get_llm_metrics() -> Dict[str, Any]:
+    """Rolling per-route token and latency summary of LLM requests"""
+    return llm_metrics.summary()
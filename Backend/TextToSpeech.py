@@ -5,6 +5,8 @@ import edge_tts
 import os
 import pyttsx3
 import platform
+import queue
+import threading
 from dotenv import dotenv_values
 
 env_vars = dotenv_values(".env")
@@ -270,6 +272,70 @@ def fallback_tts(text):
             pass
         return False
 
+class SentenceSpeaker:
+    """
+    Speaks a streamed answer sentence by sentence while it is still being generated
+
+    Sentences are queued from the streaming thread and spoken in order on a
+    background thread with fallback_tts. Like prepare_tts_text, only the first
+    max_lines lines are spoken; if the answer goes on, "Please see the chat for
+    more information." is spoken at the end instead.
+    """
+
+    def __init__(self, max_lines=2):
+        self.max_lines = max_lines
+        self.lines_spoken = 0
+        self.truncated = False
+        self.started = False  # True once a sentence has been queued
+        self.cancelled = False
+        self._queue = queue.Queue()
+        self._worker = None
+
+    def speak(self, sentence, ends_line=False):
+        """Queue one complete sentence (usable directly as a stream on_sentence callback)"""
+        if self.cancelled or not sentence.strip():
+            return
+        if self.lines_spoken >= self.max_lines:
+            self.truncated = True
+            return
+        if ends_line:
+            self.lines_spoken += 1
+        self.started = True
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._speak_loop, daemon=True, name="sentence-tts")
+            self._worker.start()
+        self._queue.put(sentence)
+
+    def _speak_loop(self):
+        while True:
+            sentence = self._queue.get()
+            if sentence is None:
+                return
+            if self.cancelled:
+                continue
+            # fallback_tts returns False when speech was interrupted (mic pressed) or failed
+            if not fallback_tts(sentence):
+                self.cancelled = True
+
+    def cancel(self):
+        """Drop everything not spoken yet"""
+        self.cancelled = True
+
+    def finish(self, timeout=None):
+        """
+        Wait until every queued sentence has been spoken
+
+        Returns:
+            True if any part of the answer was spoken through this speaker
+        """
+        if self._worker is None:
+            return False
+        if self.truncated and not self.cancelled:
+            self._queue.put("Please see the chat for more information.")
+        self._queue.put(None)
+        self._worker.join(timeout)
+        return True
+
 async def TextToAudioFile(text) -> None:
     # Cross-platform file path handling
     data_dir = os.path.join("Data")
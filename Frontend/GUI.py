@@ -102,6 +102,23 @@ def ShowTextToScreen(Text):
     with open (rf'{TempDirPath}\Responses.data','w', encoding='utf-8') as file:
         file.write(Text)
 
+def ShowStreamingText(Text):
+    """Show a partial answer in the live chat bubble while it is still being generated"""
+    # Write-then-rename so the GUI never reads a half-written update; if the GUI
+    # has the file open the update is skipped (the next one carries the full text)
+    temp_path = rf'{TempDirPath}\Streaming.data.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(Text)
+        os.replace(temp_path, rf'{TempDirPath}\Streaming.data')
+    except OSError:
+        pass
+
+def ClearStreamingText():
+    """Remove the live chat bubble (the final answer is shown through ShowTextToScreen)"""
+    with open(rf'{TempDirPath}\Streaming.data', 'w', encoding='utf-8') as file:
+        file.write('')
+
     
 class ChatSection(QWidget):
     def __init__(self):
@@ -462,6 +479,7 @@ class ChatSection(QWidget):
         self.chat_text_edit.setFont(font)
 
         self.timer = QTimer(self)
+        self.timer.timeout.connect(self.loadStreamingMessage)
         self.timer.timeout.connect(self.loadMessages)
         self.timer.timeout.connect(self.SpeechRecogText)
         self.timer.start(10)  # Ultra fast - 10ms for maximum responsiveness
@@ -469,6 +487,10 @@ class ChatSection(QWidget):
         # Initialize displayed messages tracking to prevent duplicates
         self._displayed_messages = set()
         
+        # Live bubble for an answer that is still streaming in
+        self._stream_text = ""
+        self._stream_start = None  # Document position where the live bubble begins
+        
         # Add pulsing animation timer for status label
         self.pulse_timer = QTimer(self)
         self.pulse_timer.timeout.connect(self.pulse_status_label)
@@ -607,6 +629,7 @@ class ChatSection(QWidget):
                         
                         if message_key not in self._displayed_messages:
                             print(f"Loading message from {sender}: {len(message_content)} chars, preview: {message_content[:100]}...")
+                            self._remove_streaming_bubble()  # The final message replaces the live one
                             self.addMessage(f"{sender}: {message_content}", color='White')
                             self._displayed_messages.add(message_key)
                             displayed_count += 1
@@ -641,6 +664,40 @@ class ChatSection(QWidget):
             except:
                 pass
 
+    def loadStreamingMessage(self):
+        """Render the answer that is still streaming in as a live bubble at the end of the chat"""
+        try:
+            with open(rf'{TempDirPath}\Streaming.data', 'r', encoding='utf-8') as file:
+                text = file.read()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error reading streaming message: {e}")
+            return
+        if text == self._stream_text:
+            return
+
+        self._remove_streaming_bubble()
+        if text.strip():
+            cursor = self.chat_text_edit.textCursor()
+            cursor.movePosition(cursor.MoveOperation.End)
+            self._stream_start = cursor.position()
+            self.addMessage(text, color='White')
+        self._stream_text = text
+
+    def _remove_streaming_bubble(self):
+        """Delete the live bubble (everything from where it was inserted to the end)"""
+        if self._stream_start is None:
+            return
+        try:
+            cursor = self.chat_text_edit.textCursor()
+            cursor.setPosition(min(self._stream_start, self.chat_text_edit.document().characterCount() - 1))
+            cursor.movePosition(cursor.MoveOperation.End, cursor.MoveMode.KeepAnchor)
+            cursor.removeSelectedText()
+        except Exception as e:
+            print(f"Error removing streaming message: {e}")
+        self._stream_start = None
+
     def SpeechRecogText(self):
         try:
             with open(rf'{TempDirPath}\Status.data', 'r', encoding='utf-8') as file:
@@ -1055,9 +1112,8 @@ class ChatSection(QWidget):
                     f.write("")
                 with open(rf'{TempDirPath}\Database.data', 'w', encoding='utf-8') as f:
                     f.write("")
-                import json
-                with open(r'Data\ChatLog.json', 'w', encoding='utf-8') as f:
-                    json.dump([], f)
+                from Backend.ChatLog import chat_log
+                chat_log.clear()
             except Exception as e:
                 print(f"Error clearing chat files: {e}")
             
@@ -1094,6 +1150,7 @@ class ChatSection(QWidget):
             # Clear displayed messages tracking to prevent duplicates after reset
             if hasattr(self, '_displayed_messages'):
                 self._displayed_messages.clear()
+            self._stream_start = None
             
             # Show reset confirmation
             self.addMessage("JARVIS: All chats cleared! I'm ready to help!", "LightGreen")
@@ -1117,9 +1174,8 @@ class ChatSection(QWidget):
                     f.write("")
                 with open(rf'{TempDirPath}\Database.data', 'w', encoding='utf-8') as f:
                     f.write("")
-                import json
-                with open(r'Data\ChatLog.json', 'w', encoding='utf-8') as f:
-                    json.dump([], f)
+                from Backend.ChatLog import chat_log
+                chat_log.clear()
             except Exception as e:
                 print(f"Error clearing chat files: {e}")
             
@@ -1137,6 +1193,7 @@ class ChatSection(QWidget):
             # Clear displayed messages tracking to prevent duplicates
             if hasattr(self, '_displayed_messages'):
                 self._displayed_messages.clear()
+            self._stream_start = None
             if hasattr(self, '_processing_messages'):
                 self._processing_messages.clear()
             if hasattr(self, '_last_displayed_answer'):
@@ -2131,24 +2188,18 @@ class ChatSection(QWidget):
             elif file_extension in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp']:
                 # Process image files with OCR
                 try:
-                    import pytesseract
-                    from PIL import Image
-                    import cv2
-                    import numpy as np
+                    from Backend.DocumentProcessor import extract_image_text, OCR_AVAILABLE
+                    if not OCR_AVAILABLE:
+                        raise ImportError("Install pytesseract, PIL, cv2, and numpy")
                     
-                    # Load image
-                    image = cv2.imread(file_path)
+                    # Extract text using the shared OCR pipeline (result is cached, so
+                    # process_document below reuses it instead of running OCR again)
+                    content = extract_image_text(file_path)
                     
-                    if image is None:
+                    if content is None:
                         content = "Could not read image file"
                         file_type = "Image (Error)"
                     else:
-                        # Convert to RGB
-                        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                        
-                        # Extract text using OCR
-                        content = pytesseract.image_to_string(image_rgb)
-                        
                         if not content.strip():
                             content = "No text detected in image. This might be a photo without readable text."
                         
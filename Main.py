@@ -2,6 +2,8 @@ from Frontend.GUI import (
     GraphicalUserInterface,
     SetAsssistantStatus,
     ShowTextToScreen,
+    ShowStreamingText,
+    ClearStreamingText,
     TempDirectoryPath,
     SetMicrophoneStatus,
     AnswerModifier,
@@ -14,7 +16,9 @@ from Backend.RealtimeSearchEngine import RealtimeSearchEngine
 from Backend.Automation import Automation
 from Backend.SpeechToText import SpeechRecognition, ContinuousSpeechRecognition
 from Backend.Chatbot import ChatBot
-from Backend.TextToSpeech import TextToSpeech, interrupt_speech, reset_speech_interrupt
+from Backend.ChatLog import chat_log
+from Backend.SpeculativeRouting import start_speculative_chat
+from Backend.TextToSpeech import TextToSpeech, SentenceSpeaker, interrupt_speech, reset_speech_interrupt
 from Backend.ModeManager import get_mode_manager, get_current_mode, set_mode, get_mode_prompt
 from Backend.WakeWordDetection import create_wake_word_detector, WakeWordDetector
 from Backend.Logger import get_logger, log_wake_word, log_command_routing, log_tts
@@ -27,6 +31,7 @@ except ImportError:
 from dotenv import dotenv_values
 from asyncio import run
 from time import sleep
+import time
 import subprocess
 import threading
 import json
@@ -61,6 +66,7 @@ processing_query = False  # Flag to prevent concurrent processing
 last_response_text = None  # Track last response to prevent duplicates
 last_spoken_text = None  # Track last spoken text to prevent duplicate TTS
 last_spoken_time = 0  # Track when last TTS occurred
+STREAM_VIEW_INTERVAL = 0.15  # Seconds between live chat-view updates while an answer streams
 
 def on_wake_word_detected():
     """Callback when wake word is detected"""
@@ -170,32 +176,56 @@ def safe_interrupt_speech():
 
 
 
+class ResponseStreamer:
+    """
+    Shows an answer in the chat while it streams in and speaks it sentence by sentence
+
+    Pass on_delta/on_sentence to ChatBot or RealtimeSearchEngine; call close() once
+    the call returns (before ShowTextToScreen) and finish_speaking() instead of
+    speaking the whole answer again.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._last_shown = 0.0
+        self.speaker = SentenceSpeaker()
+        reset_speech_interrupt()  # A stale interrupt must not drop the first sentence
+
+    def on_delta(self, delta):
+        self.text += delta
+        current = time.time()
+        if current - self._last_shown >= STREAM_VIEW_INTERVAL:
+            self._last_shown = current
+            ShowStreamingText(f"{Assistantname}: {self.text.lstrip()}")
+
+    def on_sentence(self, sentence, ends_line):
+        self.speaker.speak(sentence, ends_line)
+
+    def close(self):
+        try:
+            ClearStreamingText()
+        except Exception as e:
+            print(f"Error clearing streaming text: {e}")
+
+    def cancel_speech(self):
+        self.speaker.cancel()
+
+    def finish_speaking(self):
+        """Wait for the streamed speech; False if nothing was spoken while streaming"""
+        return self.speaker.finish()
+
+
 # Ensure a default chat log exists if no chats are logged
 def ShowDefaultChatIfNoChats():
-    try:
-        with open(r'Data\ChatLog.json', "r", encoding='utf-8') as file:
-            if len(file.read()) < 5:
-                with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as temp_file:
-                    temp_file.write("")
-                with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as response_file:
-                    response_file.write(DefaultMessage)
-    except FileNotFoundError:
-        print("ChatLog.json file not found. Creating default response.")
-        os.makedirs("Data", exist_ok=True)
-        with open(r'Data\ChatLog.json', "w", encoding='utf-8') as file:
-            file.write("[]")
+    if len(chat_log) == 0:
+        with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as temp_file:
+            temp_file.write("")
         with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as response_file:
             response_file.write(DefaultMessage)
 
-# Read chat log from JSON
+# Read chat log (served from the in-memory chat log service)
 def ReadChatLogJson():
-    try:
-        with open(r'Data\ChatLog.json', 'r', encoding='utf-8') as file:
-            chatlog_data = json.load(file)
-        return chatlog_data
-    except FileNotFoundError:
-        print("ChatLog.json not found.")
-        return []
+    return chat_log.messages()
 
 # Integrate chat logs into a readable format
 
@@ -278,6 +308,7 @@ def MainExecution():
     try:
         TaskExecution = False
         ImageExecution = False
+        speculation = None
         ImageGenerationQuery = ""
 
         # Check for wake word in continuous listening mode
@@ -476,6 +507,9 @@ def MainExecution():
             except Exception as e:
                 print(f"Error clearing chat history: {e}")
         
+        # Start the general answer while the decision model runs; it is used only if the decision is "general"
+        speculation = start_speculative_chat(QueryModifier(Query), mode=get_current_mode())
+
         # Add fallback for Decision making
         try:
             Decision = FirstLayerDMM(Query)
@@ -543,6 +577,14 @@ def MainExecution():
                 ImageGenerationQuery = str(queries)
                 ImageExecution = True
 
+        # The speculative answer only stands in for a lone general task asking exactly what was speculated
+        if speculation:
+            lone_general = len(Decision) == 1 and Decision[0].startswith("general") and not ImageExecution
+            general_query = (Decision[0].replace("general", "").strip() or Query) if lone_general else None
+            if not lone_general or QueryModifier(general_query) != speculation.query:
+                speculation.cancel()
+                speculation = None
+
         for queries in Decision:
             if not TaskExecution:
                 if any(queries.startswith(func) for func in functions):
@@ -586,12 +628,16 @@ def MainExecution():
 
         if G and R or R:
             SetAsssistantStatus("Searching...")
-            Answer = RealtimeSearchEngine(QueryModifier(Merged_query))
+            # Stream the answer into the chat and start speaking it while it's generated
+            streamer = ResponseStreamer()
+            Answer = RealtimeSearchEngine(QueryModifier(Merged_query), on_delta=streamer.on_delta, on_sentence=streamer.on_sentence)
+            streamer.close()
             ShowTextToScreen(f"{Assistantname}: {Answer}")
             SetAsssistantStatus("Answering...")
             # Check for interruption before speaking
             if check_for_interruption():
                 print("Interrupted before speaking")
+                streamer.cancel_speech()
                 return True
             currently_speaking = True
             log_tts(Answer, "start")
@@ -600,9 +646,12 @@ def MainExecution():
             print(f"Main.py TTS (realtime): About to speak answer (length: {len(Answer)})")
             try:
                 from Backend.TextToSpeech import fallback_tts, reset_speech_interrupt
-                reset_speech_interrupt()
-                print("Main.py TTS (realtime): Calling fallback_tts (ONLY ONCE - no duplicates)...")
-                result = fallback_tts(Answer)
+                if streamer.finish_speaking():
+                    result = True  # Already spoken sentence by sentence while streaming
+                else:
+                    reset_speech_interrupt()
+                    print("Main.py TTS (realtime): Calling fallback_tts (ONLY ONCE - no duplicates)...")
+                    result = fallback_tts(Answer)
                 print(f"Main.py TTS (realtime): fallback_tts returned: {result}")
                 if result:
                     log_tts(Answer, "stop")
@@ -662,8 +711,14 @@ def MainExecution():
                     logger.debug(f"Processing query in {current_mode} mode")
                     print(f"Main.py: Current mode: {current_mode}")
                     
+                    # Stream the answer into the chat and start speaking it while it's generated
+                    streamer = ResponseStreamer()
                     try:
-                        Answer = ChatBot(QueryModifier(QueryFinal), mode=current_mode)
+                        if speculation:
+                            # Already generating since the query arrived; replays what has streamed so far
+                            Answer = speculation.result(on_delta=streamer.on_delta, on_sentence=streamer.on_sentence)
+                        else:
+                            Answer = ChatBot(QueryModifier(QueryFinal), mode=current_mode, on_delta=streamer.on_delta, on_sentence=streamer.on_sentence)
                         print(f"Main.py: ChatBot returned answer (length: {len(Answer) if Answer else 0})")
                         response_generated = True
                     except Exception as e:
@@ -672,6 +727,7 @@ def MainExecution():
                         print(f"Main.py: ChatBot ERROR: {traceback.format_exc()}")
                         Answer = "I'm here to help! What would you like to know?"
                         response_generated = True
+                    streamer.close()
                     
                     # Ensure Answer is not None or empty
                     if not Answer or not Answer.strip():
@@ -710,6 +766,7 @@ def MainExecution():
                     
                     if is_duplicate_text:
                         print(f"Main.py: Duplicate response text detected, skipping display and TTS")
+                        streamer.cancel_speech()
                         processing_query = False  # Reset flag
                         return True  # Return early - don't display or speak
                     else:
@@ -723,6 +780,7 @@ def MainExecution():
                     # Check for interruption before speaking
                     if check_for_interruption():
                         print("Interrupted before speaking")
+                        streamer.cancel_speech()
                         return True
                     
                     # Check if this exact text was already spoken recently (within 5 seconds)
@@ -734,6 +792,7 @@ def MainExecution():
                     if (last_spoken_text == answer_normalized_tts and 
                         (current_tts_time - last_spoken_time) < 5.0):
                         print(f"Main.py TTS: Duplicate speech detected, skipping TTS: '{Answer[:50]}...'")
+                        streamer.cancel_speech()
                         currently_speaking = False
                         processing_query = False
                         return True
@@ -756,9 +815,12 @@ def MainExecution():
                     tts_called = False
                     try:
                         from Backend.TextToSpeech import fallback_tts, reset_speech_interrupt
-                        reset_speech_interrupt()
-                        print("Main.py TTS: Calling fallback_tts (ONLY ONCE - no duplicates)...")
-                        result = fallback_tts(Answer)
+                        if streamer.finish_speaking():
+                            result = True  # Already spoken sentence by sentence while streaming
+                        else:
+                            reset_speech_interrupt()
+                            print("Main.py TTS: Calling fallback_tts (ONLY ONCE - no duplicates)...")
+                            result = fallback_tts(Answer)
                         tts_called = True
                         print(f"Main.py TTS: fallback_tts returned: {result}")
                         if result:
@@ -829,16 +891,19 @@ def MainExecution():
                 elif "realtime" in queries:
                     SetAsssistantStatus("Searching...")
                     QueryFinal = queries.replace("realtime", "")
+                    streamer = ResponseStreamer()
                     try:
-                        Answer = RealtimeSearchEngine(QueryModifier(QueryFinal))
+                        Answer = RealtimeSearchEngine(QueryModifier(QueryFinal), on_delta=streamer.on_delta, on_sentence=streamer.on_sentence)
                     except Exception as e:
                         print(f"Error in RealtimeSearchEngine: {e}")
                         Answer = "I'm here to help! What would you like to know?"
+                    streamer.close()
                     ShowTextToScreen(f"{Assistantname}: {Answer}")
                     SetAsssistantStatus("Answering...")
                     # Check for interruption before speaking
                     if check_for_interruption():
                         print("Interrupted before speaking")
+                        streamer.cancel_speech()
                         return True
                     currently_speaking = True
                     log_tts(Answer, "start")
@@ -848,9 +913,12 @@ def MainExecution():
                     print(f"Main.py TTS (realtime-only): Answer preview: {Answer[:100]}...")
                     try:
                         from Backend.TextToSpeech import fallback_tts, reset_speech_interrupt
-                        reset_speech_interrupt()
-                        print("Main.py TTS (realtime-only): Calling fallback_tts (ONLY ONCE - no duplicates)...")
-                        result = fallback_tts(Answer)
+                        if streamer.finish_speaking():
+                            result = True  # Already spoken sentence by sentence while streaming
+                        else:
+                            reset_speech_interrupt()
+                            print("Main.py TTS (realtime-only): Calling fallback_tts (ONLY ONCE - no duplicates)...")
+                            result = fallback_tts(Answer)
                         print(f"Main.py TTS (realtime-only): fallback_tts returned: {result}")
                         if result:
                             log_tts(Answer, "stop")
@@ -931,6 +999,9 @@ def MainExecution():
         # Don't crash, just return False and continue
         return False
     finally:
+        # A speculation still pending here was never used; release its worker instead of letting it time out
+        if speculation:
+            speculation.cancel()
         # Always reset processing flag when done
         processing_query = False
         print(f"MainExecution: Reset processing_query flag to False")
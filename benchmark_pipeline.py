@@ -0,0 +1,174 @@
+"""
+Offline latency/throughput benchmark of the LLM pipeline
+Starts the local mock LLM server, points the shared gateway at it and drives
+FirstLayerDMM, ChatBot, generate_sales_pitch and (optionally) RealtimeSearchEngine,
+reporting client-side latency, throughput and the gateway's per-route telemetry.
+No API keys or network access are needed (the realtime stage still tries a web search).
+
+The DMM runs against a throwaway decision cache and intent classifier, so the
+benchmark neither reads nor trains the real ones. Note: ChatBot and
+RealtimeSearchEngine append to the chat log like real queries do, so run this
+from a scratch checkout (as on CI).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from Backend.MockLLMServer import MockLLMConfig, MockLLMServer, DEFAULT_TTFT, DEFAULT_TOKENS_PER_SECOND
+from Backend.LLMGateway import gateway
+from Backend.Telemetry import llm_metrics
+from Backend.ResponseCache import response_cache
+from Backend.DecisionCache import DecisionCache
+from Backend.IntentClassifier import IntentClassifier
+
+QUERIES = [
+    "how can i study more effectively?",
+    "what is python programming language?",
+    "explain the difference between a lead and a prospect",
+    "give me three tips for a discovery call",
+    "what should a follow up email include?",
+]
+STAGES = ["dmm", "chat", "pitch", "realtime"]
+DEFAULT_STAGES = ["dmm", "chat", "pitch"]  # realtime also searches the web
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def _stage_calls() -> Dict[str, Callable[[str], Any]]:
+    # Imported here so the gateway is already pointed at the mock server when they load
+    from Backend.Model import FirstLayerDMM
+    from Backend.Chatbot import ChatBot
+    from Backend.SalesAutomation import generate_sales_pitch
+    from Backend.RealtimeSearchEngine import RealtimeSearchEngine
+    return {
+        "dmm": FirstLayerDMM,
+        "chat": lambda query: ChatBot(query, mode="General Assistant"),
+        "pitch": lambda query: generate_sales_pitch("Alex", "Acme Corp", "CRM software", context=query),
+        "realtime": lambda query: RealtimeSearchEngine(query, mode="General Assistant"),
+    }
+
+def _scratch_dmm_state(scratch_dir: str) -> List[Any]:
+    """Point FirstLayerDMM at a fresh decision cache and intent classifier in scratch_dir"""
+    import Backend.Model as model
+    model.decision_cache = DecisionCache(path=os.path.join(scratch_dir, "DecisionCache.json"))
+    model.intent_classifier = IntentClassifier(
+        log_file=os.path.join(scratch_dir, "DecisionLog.jsonl"),
+        seed_examples=model.intent_classifier.seed_examples
+    )
+    return [model.decision_cache, model.intent_classifier]
+
+def run_stage(
+    call: Callable[[str], Any],
+    iterations: int,
+    concurrency: int,
+    keep_cache: bool,
+    caches: Optional[List[Any]] = None
+) -> Dict[str, Any]:
+    """Run one stage and return its client-side latency/throughput (caches are cleared before each call)"""
+    latencies, failures = [], 0
+    caches = [response_cache] + list(caches or [])
+
+    def one(i: int):
+        nonlocal failures
+        if not keep_cache:
+            for cache in caches:
+                cache.clear()
+        started = time.perf_counter()
+        try:
+            call(QUERIES[i % len(QUERIES)])
+        except Exception as e:
+            failures += 1
+            print(f"Benchmark call failed: {e}")
+        latencies.append(time.perf_counter() - started)
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(iterations)))
+    wall = time.perf_counter() - wall_started
+    return {
+        "iterations": iterations,
+        "failures": failures,
+        "latency_p50": _percentile(latencies, 0.5),
+        "latency_p95": _percentile(latencies, 0.95),
+        "throughput_rps": iterations / wall if wall else None,
+    }
+
+def run_benchmark(
+    stages: List[str],
+    iterations: int = 20,
+    concurrency: int = 1,
+    config: Optional[MockLLMConfig] = None,
+    keep_cache: bool = False
+) -> Dict[str, Any]:
+    """
+    Benchmark the given stages against a fresh mock server
+
+    Args:
+        stages: Stage names from STAGES
+        iterations: Calls per stage
+        concurrency: Parallel callers per stage
+        config: Mock server behaviour (TTFT, token rate, error/429 injection, script)
+        keep_cache: Let the response and decision caches answer repeated queries
+
+    Returns:
+        Client-side results per stage, gateway telemetry and mock server counters
+    """
+    server = MockLLMServer(config, port=0).start()
+    gateway.use_endpoint(server.base_url)
+    llm_metrics.clear()
+    import Backend.Model as model
+    real_state = (model.decision_cache, model.intent_classifier)
+    try:
+        with tempfile.TemporaryDirectory(prefix="jarvis_benchmark_") as scratch_dir:
+            calls = _stage_calls()
+            caches = _scratch_dmm_state(scratch_dir)
+            try:
+                results = {stage: run_stage(calls[stage], iterations, concurrency, keep_cache, caches) for stage in stages}
+            finally:
+                caches[0].flush()  # Before the scratch directory goes away
+                model.decision_cache, model.intent_classifier = real_state
+    finally:
+        server.stop()
+    return {
+        "stages": results,
+        "telemetry": llm_metrics.summary()["routes"],
+        "hedging": gateway.hedge_stats(),
+        "server": server.stats(),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the LLM pipeline against the local mock server")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=DEFAULT_STAGES)
+    parser.add_argument("-n", "--iterations", type=int, default=20, help="Calls per stage")
+    parser.add_argument("-c", "--concurrency", type=int, default=1, help="Parallel callers per stage")
+    parser.add_argument("--ttft", type=float, default=DEFAULT_TTFT, help="Mock time to first token (seconds)")
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--script", help="JSON file with scripted responses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-cache", action="store_true", help="Don't clear the response and decision caches between calls")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    options = dict(
+        ttft=args.ttft, tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed
+    )
+    mock_config = MockLLMConfig.from_script_file(args.script, **options) if args.script else MockLLMConfig(**options)
+    report = run_benchmark(args.stages, args.iterations, args.concurrency, mock_config, args.keep_cache)
+
+    for stage, result in report["stages"].items():
+        print(f"{stage:>9}: p50 {result['latency_p50'] * 1000:.0f} ms, p95 {result['latency_p95'] * 1000:.0f} ms, "
+              f"{result['throughput_rps']:.1f} req/s, {result['failures']} failed")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -1,73 +1,197 @@
 """
 Script to process Google Drive link and export all data to a file
+Also imports exports back into the sales memory store (e.g. to move knowledge between machines)
 """
+import argparse
+import gzip
 import json
 import os
 from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
 from Backend.DriveProcessor import process_drive_link
-from Backend.SalesMemory import sales_memory_manager
+from Backend.SalesMemory import sales_memory_manager, SalesMemoryManager
 
-def export_drive_data(drive_link: str, output_file: str = None):
+def _open_export(path: str, mode: str, compress: Optional[bool] = None):
+    """Open an export file as text, gzip-compressed when requested or when the name ends in .gz"""
+    if compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def write_jsonl_export(
+    output_file: str,
+    header: Dict[str, Any],
+    source_prefix: str,
+    store: SalesMemoryManager = sales_memory_manager,
+    include_vectors: bool = False,
+    compress: Optional[bool] = None
+) -> int:
+    """
+    Stream entries for a source straight from the store's source index to a JSONL file
+
+    The first line is a {"type": "header", ...} record; every following line is
+    one {"type": "entry", ...} record, written as it is read, so memory use does
+    not grow with the size of the export.
+
+    Args:
+        output_file: Output path (.jsonl, or .jsonl.gz for gzip)
+        header: Metadata for the header record
+        source_prefix: Source name prefix of the entries to export
+        store: Sales memory store to export from
+        include_vectors: Include embeddings so imports don't need to re-embed
+        compress: Force gzip on/off (default: by file extension)
+
+    Returns:
+        Number of entries written
+    """
+    count = 0
+    with _open_export(output_file, "w", compress) as f:
+        f.write(json.dumps({"type": "header", **header}, ensure_ascii=False) + "\n")
+        for entry in store.iter_entries_by_source(source_prefix):
+            record = {"type": "entry", **entry}
+            if include_vectors:
+                embedding = store.get_embedding(entry.get("id"))
+                if embedding:
+                    record["embedding"] = embedding
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def iter_export_entries(input_file: str) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the entries in an export file
+
+    Supports streaming JSONL exports (optionally gzip-compressed) and the
+    original single-document JSON export format.
+    """
+    if input_file.endswith(".json"):
+        with open(input_file, "r", encoding="utf-8") as f:
+            yield from json.load(f).get("extracted_data", {}).get("entries", [])
+        return
+
+    with _open_export(input_file, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.pop("type", "entry") == "entry":
+                yield record
+
+def import_drive_data(input_file: str, store: SalesMemoryManager = sales_memory_manager) -> Dict[str, int]:
+    """
+    Bulk-load an export into a sales memory store
+
+    Entries exported with vectors are stored without re-embedding.
+
+    Args:
+        input_file: Export file (.jsonl, .jsonl.gz or legacy .json)
+        store: Sales memory store to load into
+
+    Returns:
+        Dict with 'imported', 'skipped' and 'embedded' counts
+    """
+    print(f"Importing knowledge from: {input_file}")
+    counts = store.import_entries(iter_export_entries(input_file))
+    print(f"✅ Imported {counts['imported']} entries "
+          f"({counts['skipped']} skipped, {counts['embedded']} re-embedded)")
+    return counts
+
+def export_drive_data(
+    drive_link: str,
+    output_file: str = None,
+    streaming: bool = False,
+    compress: bool = False,
+    include_vectors: bool = False
+):
     """
     Process a Google Drive link and export all extracted data to a file
-    
+
     Args:
         drive_link: Google Drive folder or file link
-        output_file: Optional output file path (default: Data/drive_data_export.json)
+        output_file: Optional output file path (default: Data/drive_data_export_<timestamp>.json)
+        streaming: Write a streaming JSONL export instead of one JSON document
+        compress: Gzip the streaming export
+        include_vectors: Include embeddings in the streaming export
     """
     if not output_file:
         # Create Data directory if it doesn't exist
         os.makedirs("Data", exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = f"Data/drive_data_export_{timestamp}.json"
-    
+        extension = (".jsonl.gz" if compress else ".jsonl") if streaming else ".json"
+        output_file = f"Data/drive_data_export_{timestamp}{extension}"
+
     print(f"Processing Google Drive link: {drive_link}")
     print("=" * 60)
-    
+
     # Process the Drive link
     result = process_drive_link(drive_link)
-    
+
     print("\nProcessing Results:")
     print(f"  Success: {result.get('success')}")
     print(f"  Files Processed: {result.get('files_processed', 0)}")
     print(f"  Entries Created: {result.get('entries_created', 0)}")
-    
+
     if result.get('errors'):
         print(f"\n  Errors: {len(result.get('errors', []))} files had issues")
-    
-    # Get all memory entries related to this source
+
+    # Entries from this source (looked up through the store's source index)
     source_name = result.get('source', 'Drive')
-    # Access memory directly (it's a list)
-    all_memory = sales_memory_manager.memory
-    
-    # Filter entries from this source
-    drive_entries = [
-        entry for entry in all_memory 
-        if source_name in entry.get('source', '')
-    ]
-    
-    # Prepare export data
-    export_data = {
-        "drive_link": drive_link,
-        "processed_at": datetime.now().isoformat(),
-        "processing_result": result,
-        "extracted_data": {
-            "total_entries": len(drive_entries),
-            "entries": drive_entries
+
+    if streaming:
+        header = {
+            "drive_link": drive_link,
+            "processed_at": datetime.now().isoformat(),
+            "processing_result": result,
+            "includes_vectors": include_vectors
+        }
+        total_entries = write_jsonl_export(
+            output_file, header, source_name,
+            include_vectors=include_vectors, compress=compress
+        )
+    else:
+        drive_entries = list(sales_memory_manager.iter_entries_by_source(source_name))
+        total_entries = len(drive_entries)
+
+        # Prepare export data
+        export_data = {
+            "drive_link": drive_link,
+            "processed_at": datetime.now().isoformat(),
+            "processing_result": result,
+            "extracted_data": {
+                "total_entries": total_entries,
+                "entries": drive_entries
+            }
         }
-    }
-    
-    # Export to JSON file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(export_data, f, indent=2, ensure_ascii=False)
-    
+
+        # Export to JSON file
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(export_data, f, indent=2, ensure_ascii=False)
+
     print(f"\n✅ Data exported to: {output_file}")
-    print(f"   Total entries exported: {len(drive_entries)}")
-    
+    print(f"   Total entries exported: {total_entries}")
+
     return output_file
 
 if __name__ == "__main__":
-    # Test with the provided Drive link
-    drive_link = "https://drive.google.com/drive/folders/1RVE5zmBVKngSKo3OUxc9WECOsPKoqymm?usp=sharing"
-    export_drive_data(drive_link)
+    parser = argparse.ArgumentParser(description="Process a Google Drive link and export its knowledge, or import an export")
+    parser.add_argument("drive_link", nargs="?",
+                        default="https://drive.google.com/drive/folders/1RVE5zmBVKngSKo3OUxc9WECOsPKoqymm?usp=sharing",
+                        help="Google Drive folder or file link")
+    parser.add_argument("-o", "--output", help="Output file path")
+    parser.add_argument("--jsonl", action="store_true", help="Streaming JSONL export")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the JSONL export")
+    parser.add_argument("--vectors", action="store_true", help="Include embeddings in the JSONL export")
+    parser.add_argument("--import", dest="import_file", help="Import an export file instead of processing a link")
+    args = parser.parse_args()
 
+    if args.import_file:
+        import_drive_data(args.import_file)
+    else:
+        export_drive_data(
+            args.drive_link,
+            args.output,
+            streaming=args.jsonl or args.gzip or args.vectors,
+            compress=args.gzip,
+            include_vectors=args.vectors
+        )
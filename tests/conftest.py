@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app modules the same way Main.py does ("from Backend.X import ...")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cwd(tmp_path, monkeypatch):
+    """Run each test in a scratch directory so Data/ caches never touch the checkout"""
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("requests")
+
+from Backend import Chatbot
+from Backend.ChatLog import ChatLogService
+from Backend.ResponseCache import ResponseCache
+from Backend.SalesMemory import SalesMemoryManager
+
+ANSWER = "Plants turn light into sugar. They release oxygen as they do it."
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeGateway:
+    """Streams a fixed answer in small pieces and records each request"""
+
+    available = True
+
+    def __init__(self):
+        self.requests = []
+
+    def chat(self, messages, models, **kwargs):
+        self.requests.append(messages)
+        return iter([_chunk(ANSWER[i:i + 7]) for i in range(0, len(ANSWER), 7)])
+
+
+@pytest.fixture
+def chatbot(tmp_path, monkeypatch):
+    fake = FakeGateway()
+    memory = []
+    monkeypatch.setattr(Chatbot, "gateway", fake)
+    monkeypatch.setattr(Chatbot, "chat_log", ChatLogService(path=str(tmp_path / "ChatLog.json")))
+    monkeypatch.setattr(Chatbot, "response_cache", ResponseCache())
+    monkeypatch.setattr(Chatbot, "sales_memory_manager", SalesMemoryManager(
+        memory_file=str(tmp_path / "sales_memory.json"), embeddings_file=str(tmp_path / "sales_embeddings.json")))
+    monkeypatch.setattr(Chatbot, "add_user_message", lambda text: memory.append(("user", text)))
+    monkeypatch.setattr(Chatbot, "add_assistant_message", lambda text: memory.append(("assistant", text)))
+    monkeypatch.setattr(Chatbot, "get_conversation_context", lambda query, include_recent=True: "")
+    return SimpleNamespace(gateway=fake, memory=memory)
+
+
+def test_answer_is_streamed_from_the_gateway(chatbot):
+    deltas, sentences = [], []
+    answer = Chatbot.ChatBot(
+        "explain photosynthesis briefly",
+        on_delta=deltas.append,
+        on_sentence=lambda sentence, ends_line: sentences.append(sentence)
+    )
+    assert answer == ANSWER
+    assert len(chatbot.gateway.requests) == 1
+    assert chatbot.gateway.requests[0][-1] == {"role": "user", "content": "explain photosynthesis briefly"}
+    assert "".join(deltas) == ANSWER
+    assert sentences == ["Plants turn light into sugar.", "They release oxygen as they do it."]
+    assert chatbot.memory == [("user", "explain photosynthesis briefly"), ("assistant", ANSWER)]
+    assert Chatbot.chat_log.window(2) == [
+        {"role": "user", "content": "explain photosynthesis briefly"},
+        {"role": "assistant", "content": ANSWER},
+    ]
+
+
+def test_repeated_question_is_answered_from_the_cache(chatbot):
+    assert Chatbot.ChatBot("explain photosynthesis briefly") == ANSWER
+    assert Chatbot.ChatBot("Explain photosynthesis briefly!") == ANSWER
+    assert len(chatbot.gateway.requests) == 1
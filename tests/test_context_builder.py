@@ -0,0 +1,25 @@
+from Backend.ContextBuilder import ContextBuilder
+
+
+class _Facts:
+    def relevant(self, query, limit):
+        return []
+
+
+class _Memory:
+    user_info = {"name": "Sam"}
+    facts = _Facts()
+
+    def get_recent_context(self, num_messages=None):
+        return [{"role": "User", "message": "hi there"}, {"role": "JARVIS", "message": "hello Sam"}]
+
+
+def test_recent_turns_are_included_by_default():
+    context = ContextBuilder(_Memory()).build("anything")
+    assert "Recent conversation context:\nUser: hi there\nJARVIS: hello Sam" in context
+
+
+def test_recent_turns_left_out_when_history_is_sent_as_messages():
+    context = ContextBuilder(_Memory()).build("anything", include_recent=False)
+    assert "- Name: Sam" in context
+    assert "hi there" not in context and "Recent conversation" not in context
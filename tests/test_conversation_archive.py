@@ -0,0 +1,44 @@
+import os
+
+from Backend.ConversationArchive import ConversationArchive
+
+
+def _archive(tmp_path, turns=()):
+    archive = ConversationArchive(db_file=str(tmp_path / "archive.db"))
+    for i, message in enumerate(turns):
+        archive.add("User" if i % 2 == 0 else "JARVIS", message, f"2026-01-01T00:00:{i:02d}")
+    archive.flush()
+    return archive
+
+
+def test_database_is_created_on_first_use(tmp_path):
+    archive = ConversationArchive(db_file=str(tmp_path / "Data" / "archive.db"))
+    assert not os.path.exists(tmp_path / "Data")
+    assert archive.count() == 0
+    assert os.path.exists(tmp_path / "Data" / "archive.db")
+
+
+def test_recent_boundary_with_fewer_turns_than_the_window(tmp_path):
+    archive = _archive(tmp_path, ["my dog is called rex", "nice name"])
+    assert archive.recent_boundary(6) == 0
+    assert archive.search("dog called rex", exclude_after=archive.recent_boundary(6)) == []
+    assert [turn["message"] for turn in archive.search("dog called rex")] == ["my dog is called rex"]
+
+
+def test_recent_boundary_skips_the_newest_turns(tmp_path):
+    archive = _archive(tmp_path, ["my dog is called rex", "nice", "i like pizza", "ok", "tell me about rex"])
+    boundary = archive.recent_boundary(3)
+    assert boundary == 2
+    assert [turn["message"] for turn in archive.search("rex", exclude_after=boundary)] == ["my dog is called rex"]
+
+
+def test_recent_boundary_counts_queued_turns(tmp_path):
+    archive = _archive(tmp_path, ["first", "second", "third", "fourth"])
+    with archive._lock:  # Hold the worker off so the next turns stay queued
+        archive.add("User", "fifth", "2026-01-01T00:01:00")
+        archive.add("JARVIS", "sixth", "2026-01-01T00:01:01")
+        # Window of 3 = sixth, fifth (queued) and fourth (archived id 4)
+        assert archive.recent_boundary(3) == 3
+    archive.flush()
+    assert archive.recent_boundary(3) == 3
+    assert archive.count() == 6
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from Backend.DecisionCache import DecisionCache
+
+
+def _cache(tmp_path, **kwargs):
+    return DecisionCache(path=str(tmp_path / "DecisionCache.json"), **kwargs)
+
+
+def test_routes_are_reapplied_to_the_new_wording(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("What is Python?", ["general what is python?"])
+    assert cache.get("what is python") == ["general what is python"]
+
+
+def test_time_independent_tasks_are_cached(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("open chrome and play despacito", ["open chrome", "play despacito"])
+    assert cache.get("Open Chrome and play Despacito!") == ["open chrome", "play despacito"]
+
+
+@pytest.mark.parametrize("prompt, decision", [
+    ("remind me to call mom", ["reminder call mom"]),
+    ("schedule a meeting with the sales team", ["schedule meeting with the sales team"]),
+    ("write an email to the client", ["content email to the client"]),
+    ("open notepad tomorrow at 9", ["open notepad"]),
+    ("what's on next friday", ["general what's on next friday"]),
+    ("mute in 10 minutes", ["system mute"]),
+])
+def test_clock_dependent_decisions_are_not_cached(tmp_path, prompt, decision):
+    cache = _cache(tmp_path)
+    cache.put(prompt, decision)
+    assert cache.get(prompt) is None
+
+
+def test_previously_persisted_reminders_are_dropped_on_load(tmp_path):
+    path = tmp_path / "DecisionCache.json"
+    expires = 4102444800  # 2100-01-01
+    path.write_text(json.dumps({
+        "remind me to stretch": {"expires": expires, "decision": ["reminder 2024-01-05 09:00 stretch"]},
+        "open chrome": {"expires": expires, "decision": ["open chrome"]},
+        "what is python": {"expires": expires, "route": "general"},
+    }), encoding="utf-8")
+    cache = DecisionCache(path=str(path))
+    assert cache.get("remind me to stretch") is None
+    assert cache.get("open chrome") == ["open chrome"]
+    assert cache.get("what is python") == ["general what is python"]
@@ -0,0 +1,37 @@
+import os
+import time
+
+from Backend.DriveCache import DriveCache
+
+
+def _put(cache, tmp_path, file_id="file1", data=b"hello"):
+    temp = tmp_path / f"temp_{file_id}"
+    temp.write_bytes(data)
+    download = {"name": "notes.txt", "size": len(data), "sha256": file_id * 4, "content_type": "text/plain"}
+    return cache.put(file_id, "etag=1", str(temp), download)
+
+
+def test_hits_do_not_rewrite_the_index_every_time(tmp_path):
+    cache = DriveCache(str(tmp_path / "cache"), flush_delay=0.05)
+    _put(cache, tmp_path)
+    written_at = os.stat(cache.index_file).st_mtime_ns
+
+    for _ in range(20):
+        assert cache.get("file1", "etag=1")["cached"] is True
+    assert os.stat(cache.index_file).st_mtime_ns == written_at
+
+    time.sleep(0.3)  # Writer flushes once after the quiet period
+    assert os.stat(cache.index_file).st_mtime_ns != written_at
+    assert DriveCache(str(tmp_path / "cache")).lookup("file1")["name"] == "notes.txt"
+
+
+def test_stale_validator_is_a_miss(tmp_path):
+    cache = DriveCache(str(tmp_path / "cache"))
+    _put(cache, tmp_path)
+    assert cache.get("file1", "etag=2") is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_importing_drive_processor_creates_no_cache_dir(tmp_path):
+    import Backend.DriveProcessor  # noqa: F401
+    assert not (tmp_path / "Data").exists()
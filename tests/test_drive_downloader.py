@@ -0,0 +1,185 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from Backend.DriveDownloader import DownloadScheduler
+from Backend.DriveProcessor import DriveProcessor
+
+BODY = bytes(range(256)) * 1024  # 256 KB, several chunks past the sniffed head
+ETAG = '"rev-1"'
+
+
+class FakeDrive(BaseHTTPRequestHandler):
+    """Stand-in for drive.google.com/uc; behaviour is picked by the file id"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        file_id = params.get("id", "")
+        self.server.requests.append((url.path, params, self.headers.get("Range"), self.headers.get("If-Range")))
+        handler = getattr(self, f"_serve_{file_id.split('-')[0]}", None)
+        if handler is None:
+            self._send(404, b"missing")
+        else:
+            handler(file_id, params)
+
+    def _send(self, status, body, headers=None, declared_length=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body) if declared_length is None else declared_length))
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+
+    def _send_file(self, name):
+        self._send(200, BODY, self._file_headers(name))
+
+    def _file_headers(self, name):
+        return {
+            "Content-Type": "application/octet-stream",
+            "Content-Disposition": f'attachment; filename="{name}"',
+            "ETag": ETAG,
+        }
+
+    def _serve_plain(self, file_id, params):
+        self._send_file("plain.bin")
+
+    def _serve_flaky(self, file_id, params):
+        """First response drops the connection after 100 KB; Range requests get a 206"""
+        byte_range = self.headers.get("Range")
+        if byte_range is None:
+            self._send(200, BODY[:100 * 1024], self._file_headers("flaky.bin"), declared_length=len(BODY))
+            self.close_connection = True
+            return
+        start = int(byte_range.split("=")[1].rstrip("-"))
+        headers = dict(self._file_headers("flaky.bin"), **{"Content-Range": f"bytes {start}-{len(BODY) - 1}/{len(BODY)}"})
+        self._send(206, BODY[start:], headers)
+
+    def _serve_big(self, file_id, params):
+        """Virus-scan redirect: the real file only comes back with the confirm token"""
+        if params.get("confirm") == "tok123":
+            self._send_file("big.bin")
+        else:
+            self._send(302, b"", {"Location": f"/uc?export=download&id={file_id}&download_warning=1&confirm=tok123"})
+
+    def _serve_page(self, file_id, params):
+        """Virus-scan warning page carrying the confirm token in its form"""
+        if params.get("confirm") == "pagetok":
+            self._send_file("page.bin")
+            return
+        page = (b"<html><body>Google Drive - Virus scan warning"
+                b'<a href="/uc?export=download&amp;confirm=pagetok&amp;id=page">Download</a></body></html>')
+        self._send(200, page, {"Content-Type": "text/html; charset=utf-8"})
+
+    def _serve_busy(self, file_id, params):
+        """Throttled until the server's allowance runs out"""
+        if self.server.throttle > 0:
+            self.server.throttle -= 1
+            self._send(429, b"slow down", {"Retry-After": "0"})
+        else:
+            self._send_file("busy.bin")
+
+
+@pytest.fixture
+def drive_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDrive)
+    server.requests = []
+    server.throttle = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _processor(server, tmp_path, **scheduler_args):
+    scheduler_args = dict({"requests_per_second": 0, "backoff_base": 0.01, "max_retries": 2}, **scheduler_args)
+    return DriveProcessor(
+        download_dir=str(tmp_path / "downloads"),
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        scheduler=DownloadScheduler(**scheduler_args),
+        use_cache=False,
+    )
+
+
+def _assert_is_body(manifest, name):
+    assert manifest is not None
+    assert manifest["name"] == name
+    assert manifest["size"] == len(BODY)
+    assert manifest["sha256"] == hashlib.sha256(BODY).hexdigest()
+    with open(manifest["path"], "rb") as f:
+        assert hashlib.sha256(f.read()).hexdigest() == manifest["sha256"]
+
+
+def test_download_manifest_hashes_the_content(drive_server, tmp_path):
+    manifest = _processor(drive_server, tmp_path).download_file_info("plain-1")
+    _assert_is_body(manifest, "plain.bin")
+    assert manifest["path"] == os.path.join(str(tmp_path / "downloads"), "plain.bin")
+    assert not os.path.exists(os.path.join(str(tmp_path / "downloads"), "temp_plain-1"))
+
+
+def test_same_name_in_different_subfolders_does_not_collide(drive_server, tmp_path):
+    processor = _processor(drive_server, tmp_path)
+    first = processor.download_file_info("plain-1", folder="Q1/")
+    second = processor.download_file_info("plain-2", folder="Q2/")
+    assert (first["name"], second["name"]) == ("Q1/plain.bin", "Q2/plain.bin")
+    assert first["path"] != second["path"]
+    assert os.path.exists(first["path"]) and os.path.exists(second["path"])
+
+
+def test_dropped_connection_resumes_with_range(drive_server, tmp_path):
+    manifest = _processor(drive_server, tmp_path).download_file_info("flaky-1")
+    _assert_is_body(manifest, "flaky.bin")
+    resumed = [request for request in drive_server.requests if request[2]]
+    assert len(resumed) == 1
+    _, _, byte_range, if_range = resumed[0]
+    assert byte_range.startswith("bytes=") and byte_range != "bytes=0-"
+    assert if_range == ETAG
+
+
+def test_confirm_token_redirect_is_followed(drive_server, tmp_path):
+    manifest = _processor(drive_server, tmp_path).download_file_info("big-1")
+    _assert_is_body(manifest, "big.bin")
+    assert drive_server.requests[-1][1].get("confirm") == "tok123"
+
+
+def test_confirm_token_from_warning_page(drive_server, tmp_path):
+    manifest = _processor(drive_server, tmp_path).download_file_info("page")
+    _assert_is_body(manifest, "page.bin")
+    assert [params.get("confirm") for _, params, _, _ in drive_server.requests] == [None, "pagetok"]
+
+
+def test_throttled_requests_back_off_and_retry(drive_server, tmp_path):
+    drive_server.throttle = 2
+    manifest = _processor(drive_server, tmp_path, max_retries=2).download_file_info("busy-1")
+    _assert_is_body(manifest, "busy.bin")
+    assert len(drive_server.requests) == 3
+
+
+def test_throttling_past_the_retry_budget_gives_up(drive_server, tmp_path):
+    drive_server.throttle = 10
+    assert _processor(drive_server, tmp_path, max_retries=2).download_file_info("busy-1") is None
+    assert len(drive_server.requests) == 3
+    assert os.listdir(str(tmp_path / "downloads")) == []
+
+
+def test_backoff_honours_retry_after_up_to_the_cap():
+    class Throttled:
+        def __init__(self, retry_after):
+            self.headers = {"Retry-After": retry_after}
+
+    scheduler = DownloadScheduler(backoff_base=0.5, backoff_max=4.0)
+    assert scheduler._backoff_delay(0, Throttled("2")) == 2.0
+    assert scheduler._backoff_delay(0, Throttled("120")) == 4.0
+    for attempt in range(6):
+        assert 0 < scheduler._backoff_delay(attempt) <= 4.0
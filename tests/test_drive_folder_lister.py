@@ -0,0 +1,47 @@
+import json
+
+from Backend.DriveFolderLister import DriveFolderLister, parse_drive_ivd
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+
+def _ivd_page(entries, ascii_only):
+    """Folder page embedding entries the way Drive does: a single-quoted JS string with \\x22 quotes"""
+    data = json.dumps([[[entry_id, None, name, mime] for entry_id, name, mime in entries]], ensure_ascii=ascii_only)
+    literal = json.dumps(data, ensure_ascii=ascii_only)[1:-1].replace('\\"', "\\x22").replace("'", "\\'")
+    return f"<script>window['_DRIVE_ivd'] = '{literal}';</script>"
+
+
+def test_drive_ivd_names_keep_non_ascii_characters():
+    names = ["Café menü.pdf", "日本語.docx", "emoji 😀.txt", "it's \"quoted\".txt"]
+    entries = [(f"id{i}", name, "application/pdf") for i, name in enumerate(names)]
+    for ascii_only in (True, False):
+        items = parse_drive_ivd(_ivd_page(entries, ascii_only))
+        assert [item["name"] for item in items] == names
+
+
+def test_drive_ivd_marks_folders():
+    items = parse_drive_ivd(_ivd_page([("f1", "Reports", FOLDER_MIME), ("d1", "a.pdf", "application/pdf")], True))
+    assert [(item["id"], item["type"]) for item in items] == [("f1", "folder"), ("d1", "file")]
+
+
+class _Lister(DriveFolderLister):
+    def __init__(self, tree):
+        super().__init__(scheduler=None, base_url="http://drive.invalid", is_valid_file_id=lambda _: True)
+        self.tree = tree
+
+    def _fetch_listing(self, folder_id):
+        return self.tree.get(folder_id, [])
+
+
+def test_recursive_listing_keeps_subfolder_paths():
+    lister = _Lister({
+        "root": [{"id": "a", "name": "Q1", "type": "folder"}, {"id": "b", "name": "Q2", "type": "folder"},
+                 {"id": "r", "name": "notes.txt", "type": "file"}, {"id": "up", "name": "..", "type": "folder"}],
+        "a": [{"id": "a1", "name": "summary.pdf", "type": "file"}],
+        "b": [{"id": "b1", "name": "summary.pdf", "type": "file"}],
+        "up": [{"id": "u1", "name": "x.txt", "type": "file"}],
+    })
+    files = {item["id"]: item["folder"] + item["name"] for item in lister.list_files("root")}
+    assert files == {"r": "notes.txt", "a1": "Q1/summary.pdf", "b1": "Q2/summary.pdf", "u1": "folder_up/x.txt"}
+    assert [item["id"] for item in lister.list_files("root", recursive=False)] == ["r"]
@@ -0,0 +1,55 @@
+import threading
+
+import Backend.DrivePipeline as drive_pipeline
+from Backend.DrivePipeline import DrivePipeline
+
+
+class _Scheduler:
+    max_workers = 2
+
+
+class _Processor:
+    scheduler = _Scheduler()
+
+    def __init__(self, tmp_path):
+        self.tmp_path = tmp_path
+
+    def download_file_info(self, file_id, filename=None, folder=""):
+        if file_id == "boom":
+            raise RuntimeError("connection reset")
+        if file_id == "missing":
+            return None
+        path = self.tmp_path / f"{file_id}.txt"
+        path.write_text(file_id)
+        return {"id": file_id, "name": f"{folder}{file_id}.txt", "path": str(path)}
+
+
+def _extract(path, source):
+    if path.endswith("empty.txt"):
+        return {"success": True, "chunks": []}
+    if path.endswith("bad.txt"):
+        raise ValueError("corrupt file")
+    return {"success": True, "chunks": [{"content": f"text of {source}", "source": source}]}
+
+
+def test_failures_are_reported_without_stalling_the_pipeline(tmp_path, monkeypatch):
+    stored = []
+    monkeypatch.setattr(drive_pipeline, "extract_document", _extract)
+    monkeypatch.setattr(drive_pipeline, "learn_from_docs_batch",
+                        lambda chunks: stored.extend(chunks) or [f"id{i}" for i in range(len(chunks))])
+    files = [{"id": file_id} for file_id in ("a", "boom", "empty", "missing", "bad", "b")]
+
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(DrivePipeline(_Processor(tmp_path), "Drive_test").run(files)))
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive(), "pipeline stalled"
+
+    assert sorted(result["processed_files"]) == ["a.txt", "b.txt"]
+    assert result["files_processed"] == 2
+    assert result["entries_created"] == 2 == len(stored)
+    errors = "\n".join(result["errors"])
+    for expected in ("boom", "empty.txt: no text extracted", "missing", "bad.txt: corrupt file"):
+        assert expected in errors
+    assert result["pipeline_stats"]["download"]["errors"] == 2
+    assert result["pipeline_stats"]["extract"]["errors"] == 2
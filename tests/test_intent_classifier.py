@@ -0,0 +1,54 @@
+import json
+
+from Backend.IntentClassifier import IntentClassifier, match_rules
+
+GENERAL = ["what is photosynthesis", "explain how magnets work", "what is a black hole",
+           "how do vaccines work", "explain machine learning", "what is the meaning of life"]
+REALTIME = ["who is the current president of france", "latest news about tesla", "what is the bitcoin price now",
+            "today's cricket score", "who won the football match yesterday", "current weather in delhi"]
+OTHER = [("send email to john about the project proposal", "send email john project proposal"),
+         ("send an email to priya about the invoice", "send email priya invoice"),
+         ("email the team about the offsite", "send email team offsite"),
+         ("set a reminder at 9pm for my meeting", "reminder 9:00pm meeting"),
+         ("remind me to call mom at 6pm", "reminder 6:00pm call mom"),
+         ("schedule meeting with sales team tomorrow at 3pm", "schedule meeting sales team tomorrow 3pm")]
+
+
+def _classifier(tmp_path):
+    log_file = tmp_path / "DecisionLog.jsonl"
+    with open(log_file, "w", encoding="utf-8") as f:
+        for prompt in GENERAL:
+            f.write(json.dumps({"prompt": prompt, "decision": f"general {prompt}"}) + "\n")
+        for prompt in REALTIME:
+            f.write(json.dumps({"prompt": prompt, "decision": f"realtime {prompt}"}) + "\n")
+        for prompt, decision in OTHER:
+            f.write(json.dumps({"prompt": prompt, "decision": decision}) + "\n")
+    return IntentClassifier(log_file=str(log_file))
+
+
+def test_task_decisions_train_the_other_class():
+    assert IntentClassifier._label("general what is python") == "general"
+    assert IntentClassifier._label("send email john hello") == "other"
+    assert IntentClassifier._label("open chrome, general tell me about gandhi") == "other"
+    assert IntentClassifier._label("") is None
+
+
+def test_other_class_wins_hand_the_prompt_to_the_llm(tmp_path):
+    classifier = _classifier(tmp_path)
+    label, _, _ = classifier.predict("send an email to sarah about the budget")
+    assert label == "other"
+    assert classifier.classify("send an email to sarah about the budget") is None
+    assert classifier.classify("remind me to water the plants at 7pm") is None
+
+
+def test_confident_general_and_realtime_predictions(tmp_path):
+    classifier = _classifier(tmp_path)
+    assert classifier.classify("explain how vaccines work") == ["general explain how vaccines work"]
+    assert classifier.classify("who is the current president of usa") == ["realtime who is the current president of usa"]
+    assert classifier.stats()["model"] == 2
+
+
+def test_rules_handle_unambiguous_commands():
+    assert match_rules("open chrome and firefox") == ["open chrome", "open firefox"]
+    assert match_rules("play shape of you on spotify") == ["play spotify shape of you"]
+    assert match_rules("open chrome and tell me a joke") is None
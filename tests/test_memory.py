@@ -0,0 +1,36 @@
+import pytest
+
+from Backend.Memory import MemoryManager
+
+
+@pytest.fixture
+def memory(tmp_path):
+    manager = MemoryManager(
+        memory_file=str(tmp_path / "conversation_memory.json"),
+        user_info_file=str(tmp_path / "user_info.json")
+    )
+    yield manager
+    manager.close()
+
+
+def test_explicit_name_beats_i_am(memory):
+    memory.extract_user_info("I am going to the store, my name is Bob.")
+    assert memory.user_info["name"] == "Bob"
+
+
+def test_name_is_learned_inside_a_remember_clause(memory):
+    memory.extract_user_info("Remember that I'm Sarah")
+    assert memory.user_info["name"] == "Sarah"
+
+
+def test_remembered_name_is_also_stored_as_a_fact(memory):
+    memory.extract_user_info("remember that my name is John")
+    assert memory.user_info["name"] == "John"
+    assert memory.facts.facts() == ["my name is john"]
+
+
+def test_remember_it_stores_the_fact_once(memory):
+    memory.extract_user_info("Remember it: the demo is on Friday. Thanks")
+    memory.extract_user_info("remember that the demo is on friday")
+    assert memory.facts.facts() == ["the demo is on friday"]
+    assert "name" not in memory.user_info
@@ -0,0 +1,67 @@
+import json
+import urllib.request
+
+import pytest
+
+from Backend.MockLLMServer import DEFAULT_RESPONSE, MockLLMConfig, MockLLMServer
+
+# Tail of the DMM few-shot history as FirstLayerDMM sends it (no system prompt)
+DMM_TAIL = [
+    {"role": "user", "content": "open chrome and firefox"},
+    {"role": "assistant", "content": "open chrome, open firefox"},
+    {"role": "user", "content": "chat with me."},
+    {"role": "assistant", "content": "general chat with me."},
+]
+CHAT_PROMPT = [
+    {"role": "system", "content": "You are JARVIS, a helpful assistant."},
+    {"role": "user", "content": "chat with me."},
+    {"role": "assistant", "content": "Sure, what about?"},
+]
+
+
+def _ask(messages, query, model="llama-3.1-8b-instant"):
+    return MockLLMConfig().respond(model, messages + [{"role": "user", "content": query}])
+
+
+def test_default_script_routes_dmm_requests():
+    assert _ask(DMM_TAIL, "what is python?") == "general what is python?"
+
+
+def test_default_script_matches_the_real_dmm_prompt():
+    pytest.importorskip("dotenv")
+    pytest.importorskip("rich")
+    from Backend.Model import FEW_SHOT_MESSAGES
+    assert not any(message["role"] == "system" for message in FEW_SHOT_MESSAGES)
+    assert _ask(FEW_SHOT_MESSAGES, "how do magnets work") == "general how do magnets work"
+
+
+def test_chat_requests_get_the_default_answer():
+    assert _ask(CHAT_PROMPT, "what is python?") == DEFAULT_RESPONSE
+    assert _ask([], "general chat with me.") == DEFAULT_RESPONSE  # The user's own words are not history
+
+
+def test_rules_combine_model_system_and_match():
+    config = MockLLMConfig(script=[
+        {"model": "big", "match": "^hi$", "response": "big hi"},
+        {"system": "JARVIS", "response": "chat {query}"},
+    ], default_response="fallback")
+    hi = [{"role": "user", "content": "hi"}]
+    assert config.respond("big", hi) == "big hi"
+    assert config.respond("small", hi) == "fallback"
+    assert config.respond("small", CHAT_PROMPT[:1] + hi) == "chat hi"
+
+
+def test_server_answers_over_http():
+    server = MockLLMServer(MockLLMConfig(ttft=0, tokens_per_second=0), port=0).start()
+    try:
+        body = json.dumps({"model": "mock", "messages": DMM_TAIL + [{"role": "user", "content": "tell me a joke"}]})
+        request = urllib.request.Request(
+            f"{server.base_url}/openai/v1/chat/completions", data=body.encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            reply = json.load(response)
+    finally:
+        server.stop()
+    assert reply["choices"][0]["message"]["content"] == "general tell me a joke"
+    assert server.stats()["requests"] == 1
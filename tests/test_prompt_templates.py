@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from Backend.PromptTemplates import PromptTemplate, TemplateCache
+
+
+def _cache(name="test", env_file=".env"):
+    builds = []
+
+    def build(key, env):
+        builds.append((key, dict(env)))
+        return PromptTemplate([("base", f"You are {env.get('Assistantname', 'JARVIS')} in {key} mode."), ("context", None)])
+
+    return TemplateCache(name, build, env_file=env_file), builds
+
+
+def test_templates_are_compiled_once_without_an_env_file():
+    cache, builds = _cache()
+    assert not os.path.exists(".env")
+    for _ in range(3):
+        assert cache.render("General", context="hi") == "You are JARVIS in General mode.\n\nhi"
+    assert builds == [("General", {})]
+
+
+def test_empty_env_file_is_cached_too():
+    with open(".env", "w", encoding="utf-8") as f:
+        f.write("# nothing set\n")
+    cache, builds = _cache()
+    cache.get("General")
+    cache.get("General")
+    assert len(builds) == 1
+
+
+def test_env_changes_rebuild_the_templates():
+    cache, builds = _cache()
+    assert cache.render("Sales") == "You are JARVIS in Sales mode."
+    with open(".env", "w", encoding="utf-8") as f:
+        f.write("Assistantname=Friday\n")
+    assert cache.render("Sales") == "You are Friday in Sales mode."
+    assert cache.render("Sales") == "You are Friday in Sales mode."
+    assert len(builds) == 2
@@ -0,0 +1,63 @@
+import pytest
+
+from Backend.ResponseCache import ResponseCache, normalize_query
+
+CACHEABLE = [
+    "What is Python?",
+    "how do I install python",
+    "what is the time complexity of quicksort",
+    "how many hours are in a day",
+    "tell me about the iPhone and its features",
+    "what's the difference between this and that pattern in Java",
+    "explain more about neural networks",
+    "who was the last emperor of China",
+]
+UNCACHEABLE = [
+    "tell me more",
+    "and what about her?",
+    "it doesn't work",
+    "That's wrong, try again",
+    "what's my name?",
+    "who am I",
+    "how do I reset my password",
+    "what is my favorite color",
+    "where do I work",
+    "what did I tell you about the Acme deal",
+    "remind me what I said about pricing",
+    "summarize our conversation",
+    "what did we discuss earlier",
+    "what time is it",
+    "what's today's date?",
+    "any news today",
+    "what's happening right now",
+    "plans for next week",
+    "",
+]
+
+
+@pytest.mark.parametrize("query", CACHEABLE)
+def test_self_contained_questions_are_cached(query):
+    cache = ResponseCache()
+    assert ResponseCache.is_cacheable(query)
+    cache.put("general", query, "answer")
+    assert cache.get("general", query.upper()) == "answer"
+
+
+@pytest.mark.parametrize("query", UNCACHEABLE)
+def test_context_and_clock_dependent_questions_are_not_cached(query):
+    cache = ResponseCache()
+    assert not ResponseCache.is_cacheable(query)
+    cache.put("general", query, "answer")
+    assert cache.get("general", query) is None
+
+
+def test_entries_are_scoped_by_mode_and_generation():
+    cache = ResponseCache()
+    cache.put("general", "What is a CRM?", "answer", mode="Sales", generation=1)
+    assert cache.get("general", "what is a crm", mode="Sales", generation=1) == "answer"
+    assert cache.get("general", "what is a crm", mode="General Assistant", generation=1) is None
+    assert cache.get("general", "what is a crm", mode="Sales", generation=2) is None
+
+
+def test_normalize_query():
+    assert normalize_query("  What's   the PRICE?! ") == "what s the price"
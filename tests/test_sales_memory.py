@@ -0,0 +1,24 @@
+from Backend.SalesMemory import SalesMemoryManager
+
+
+def _manager():
+    manager = SalesMemoryManager(memory_file="Data/sales_memory.json", embeddings_file="Data/sales_embeddings.json")
+    manager.add_knowledge("pricing starts at 10 dollars", "Drive_1_pricing.pdf")
+    manager.add_knowledge("onboarding takes a week", "Drive_1_onboarding.pdf")
+    manager.add_knowledge("unrelated note", "Upload_notes.txt")
+    return manager
+
+
+def test_iter_entries_by_source_filters_by_prefix():
+    contents = sorted(entry["content"] for entry in _manager().iter_entries_by_source("Drive_1"))
+    assert contents == ["onboarding takes a week", "pricing starts at 10 dollars"]
+
+
+def test_iteration_survives_concurrent_clear():
+    manager = _manager()
+    entries = manager.iter_entries_by_source("Drive_1")
+    first = next(entries)
+    manager.clear_memory()
+    rest = list(entries)
+    assert {first["content"]} | {entry["content"] for entry in rest} == {
+        "pricing starts at 10 dollars", "onboarding takes a week"}
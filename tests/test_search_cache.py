@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from Backend.SearchCache import SearchCache, classify_search_query, search_cache_key
+
+
+def test_paraphrases_share_a_key():
+    assert search_cache_key("What's the CEO of Tesla?") == search_cache_key("what is the ceo of tesla")
+    assert search_cache_key("Hey Jarvis, please search for the price of bitcoin") == "price of bitcoin"
+
+
+def test_interrogatives_stay_in_the_key():
+    assert search_cache_key("who is apple") != search_cache_key("what is apple")
+    assert search_cache_key("where is apple") != search_cache_key("when is apple")
+
+
+@pytest.mark.parametrize("query, query_class", [
+    ("latest news about tesla", "live"),
+    ("bitcoin price", "market"),
+    ("who is the ceo of tesla", "people"),
+    ("capital of france", "reference"),
+    ("python decorators", "default"),
+])
+def test_query_classes(query, query_class):
+    assert classify_search_query(query) == query_class
+
+
+def test_database_is_opened_on_first_use():
+    cache = SearchCache(db_file="Data/search_cache.db")
+    assert not os.path.exists("Data")
+    assert cache.get("who is apple") is None
+    assert os.path.exists("Data/search_cache.db")
+
+
+def test_results_persist_and_expire():
+    cache = SearchCache(db_file="search.db")
+    cache.put("who is the ceo of tesla", "Elon Musk")
+    assert cache.get("Who is the CEO of Tesla?") == "Elon Musk"
+    assert cache.get("what is the ceo of tesla") is None
+    assert SearchCache(db_file="search.db").get("who is the ceo of tesla") == "Elon Musk"
+
+    expired = SearchCache(db_file="search.db", ttls={"people": -1})
+    expired.put("who is the ceo of tesla", "Elon Musk")
+    assert expired.get("who is the ceo of tesla") is None
+
+
+def test_memory_only_cache():
+    cache = SearchCache(db_file=None, memory_entries=2)
+    for query in ("one thing", "two thing", "three thing"):
+        cache.put(query, query.upper())
+    assert cache.get("one thing") is None
+    assert cache.get("three thing") == "THREE THING"
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_hits_are_not_committed_on_the_read_path():
+    SearchCache(db_file="search.db").put("who is the ceo of tesla", "Elon Musk")
+    cache = SearchCache(db_file="search.db", memory_entries=0)  # Every hit goes to the disk tier
+    assert cache.get("who is the ceo of tesla") == "Elon Musk"
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    for _ in range(3):
+        assert cache.get("who is the ceo of tesla") == "Elon Musk"
+    assert statements and all(statement.startswith("SELECT") for statement in statements)
+
+    cache.put("capital of france", "Paris")
+    assert any(statement.startswith("UPDATE searches SET accessed") for statement in statements)
+
+
+def test_flush_writes_batched_access_times():
+    SearchCache(db_file="search.db").put("who is the ceo of tesla", "Elon Musk")
+    cache = SearchCache(db_file="search.db", memory_entries=0)
+    cache.get("who is the ceo of tesla")
+    accessed = cache._accessed["who ceo of tesla"]
+    cache.flush()
+    stored = SearchCache(db_file="search.db")
+    stored._db()
+    assert stored._conn.execute("SELECT accessed FROM searches").fetchone()[0] == accessed